@@ -0,0 +1,242 @@
+"""
+Load test of synchronization git operations against a local fake platform: GitHub ("from") and Gitea ("to") APIs answered from
+tests/http_mocks templates (see sync_scale) for repositories of a directory, served and updated by 'git http-backend' (smart HTTP).
+
+"From" repositories are synthetic histories of configurable size. Scenarios:
+- mirror: repositories not existing on "to" platform, created and pushed as mirrors
+- branches: repositories existing on "to" platform, each branch (except main) one commit behind "from" one
+
+Usage: python -m benchmarks.fake_platform [--scenario mirror|branches] [--repos N] [--commits C] [--branches M] [--tags K] [--file-size S]
+                                          [--output FILE] [--compare PREVIOUS_FILE] [--serve] [-- OPTIONS]
+"""
+import os
+import re
+import json
+import shutil
+import hashlib
+import argparse
+import tempfile
+import threading
+import subprocess
+from urllib.parse import urlsplit, parse_qs
+from benchmarks.sync_scale import ORG_FROM, ORG_TO, TEMPLATE_REPO, ScaledPlatforms, ScaledPlatformsHandler, start_server, run_synchronization, report
+
+# Git smart HTTP requests, answered by 'git http-backend'
+GIT_PATH_PATTERN = re.compile(r'^/(?P<org>[^/]+)/(?P<repo>[^/]+)\.git/(?P<service>info/refs|git-upload-pack|git-receive-pack)$')
+
+# Fixed identity and dates: same histories (commits) for same sizes
+GIT_IDENTITY = 'Benchmark <benchmark@localhost>'
+GIT_EPOCH = 1700000000
+
+
+def generate_repo(git_dir: str, commits: int = 100, branches: int = 10, tags: int = 10, branch_commits: int = 1, file_size: int = 4096, files: int = 20):
+    """
+    Create a bare repository of synthetic history (git fast-import): 'commits' commits on main, each one updating a file of 'file_size'
+    bytes (among 'files' ones), 'branches' branches (main included) forked from main with 'branch_commits' own commits, and 'tags'
+    lightweight tags on main commits.
+    """
+    subprocess.run(['git', 'init', '--bare', '--quiet', '--initial-branch', 'main', git_dir], check=True)
+    stream = []
+    mark = 0
+
+    def commit(ref: str, parent: int, message: str, path: str) -> int:
+        nonlocal mark
+        mark += 1
+        # Content not compressible: random-like, deterministic
+        seed = '{} {}'.format(ref, mark).encode()
+        content = ''.join(hashlib.sha256(seed + i.to_bytes(4, 'big')).hexdigest() for i in range(file_size // 64 + 1))[:file_size]
+        date = '{} {} +0000'.format(GIT_IDENTITY, GIT_EPOCH + mark)
+        stream.append('commit {}\nmark :{}\nauthor {}\ncommitter {}\ndata {}\n{}\n'.format(ref, mark, date, date, len(message), message))
+        if parent:
+            stream.append('from :{}\n'.format(parent))
+        stream.append('M 100644 inline {}\ndata {}\n{}\n\n'.format(path, len(content), content))
+        return mark
+
+    main = []
+    for i in range(commits):
+        main.append(commit('refs/heads/main', main[-1] if main else 0, 'Commit {}'.format(i), 'file-{:03d}.txt'.format(i % files)))
+    for j in range(1, branches):
+        branch = 'refs/heads/branch-{:05d}'.format(j)
+        fork = main[j * (commits - 1) // branches]
+        stream.append('reset {}\nfrom :{}\n\n'.format(branch, fork))
+        head = fork
+        for i in range(branch_commits):
+            head = commit(branch, head, 'Branch {} commit {}'.format(j, i), 'branch-{:05d}.txt'.format(j))
+    for k in range(tags):
+        stream.append('reset refs/tags/tag-{:05d}\nfrom :{}\n\n'.format(k, main[k * (commits - 1) // max(1, tags)]))
+    subprocess.run(['git', 'fast-import', '--quiet'], cwd=git_dir, input=''.join(stream).encode(), check=True)
+
+
+class GitPlatforms(ScaledPlatforms):
+    """
+    GitHub ("from") and Gitea ("to") platforms of bare repositories '<directory>/<organization>/<repository>.git',
+    new "to" repositories being created by Gitea repository creation API.
+    """
+
+    def __init__(self, root: str, directory: str):
+        super().__init__(root)
+        self.directory = directory
+        self.route('POST', '/api/v1/orgs/{}/repos'.format(ORG_TO), lambda m, q, b: self.create_repo(ORG_TO, json.loads(b)['name']))
+
+    def get_git_dir(self, org: str, repo: str) -> str:
+        return os.path.join(self.directory, org, repo + '.git')
+
+    def get_repos(self, org: str) -> list:
+        org_directory = os.path.join(self.directory, org)
+        if not os.path.isdir(org_directory):
+            return []
+        return sorted(name[:-len('.git')] for name in os.listdir(org_directory) if name.endswith('.git'))
+
+    def has_repo(self, org: str, repo: str) -> bool:
+        return os.path.isdir(self.get_git_dir(org, repo))
+
+    def get_refs(self, org: str, repo: str, kind: str) -> dict:
+        # Commit of annotated tags ('*objectname') rather than tag object
+        output = subprocess.run(['git', 'for-each-ref', '--format=%(refname:strip=2) %(objectname) %(*objectname)', 'refs/heads' if kind == 'branches' else 'refs/tags'],
+                                cwd=self.get_git_dir(org, repo), capture_output=True, text=True, check=True).stdout
+        return {fields[0]: fields[-1] for fields in (line.split() for line in output.splitlines())}
+
+    def create_repo(self, org: str, repo: str) -> tuple:
+        subprocess.run(['git', 'init', '--bare', '--quiet', self.get_git_dir(org, repo)], check=True)
+        return 201, {}, json.loads(self.gitea_repo.replace(TEMPLATE_REPO, repo))
+
+
+class GitPlatformsHandler(ScaledPlatformsHandler):
+
+    def do_GET(self):
+        self.do_request()
+
+    def do_POST(self):
+        self.do_request()
+
+    def do_request(self):
+        url = urlsplit(self.path)
+        body = self.read_body()
+        match = GIT_PATH_PATTERN.match(url.path)
+        if match:
+            query = parse_qs(url.query)
+            service = match.group('service') + ('?service=' + query['service'][0] if 'service' in query else '')
+            self.server.platforms.count('{} /{}/{{repo}}.git/{}'.format(self.command, match.group('org'), service))
+            self.git_http_backend(url, body)
+            return
+        self.send_json(*self.server.platforms.respond(self.command, url.path, parse_qs(url.query), body))
+
+    def read_body(self) -> bytes:
+        # Large git requests (push) are chunked
+        if self.headers.get('Transfer-Encoding', '').lower() != 'chunked':
+            return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        chunks = []
+        while True:
+            size = int(self.rfile.readline().split(b';')[0].strip(), 16)
+            if size == 0:
+                while self.rfile.readline() not in (b'\r\n', b'\n', b''):
+                    pass
+                return b''.join(chunks)
+            chunks.append(self.rfile.read(size))
+            self.rfile.readline()
+
+    def git_http_backend(self, url, body: bytes):
+        # CGI request, authenticated (push allowed) whatever the credentials
+        env = dict(os.environ, GIT_PROJECT_ROOT=self.server.platforms.directory, GIT_HTTP_EXPORT_ALL='1', PATH_INFO=url.path, QUERY_STRING=url.query,
+                   REQUEST_METHOD=self.command, CONTENT_TYPE=self.headers.get('Content-Type', ''), CONTENT_LENGTH=str(len(body)),
+                   REMOTE_USER='benchmark', REMOTE_ADDR=self.client_address[0])
+        for header, variable in [('Content-Encoding', 'HTTP_CONTENT_ENCODING'), ('Git-Protocol', 'GIT_PROTOCOL')]:
+            if header in self.headers:
+                env[variable] = self.headers[header]
+        process = subprocess.Popen(['git', 'http-backend'], stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env)
+
+        def write_body():
+            process.stdin.write(body)
+            process.stdin.close()
+        threading.Thread(target=write_body, daemon=True).start()
+
+        status, headers = 200, []
+        for line in iter(process.stdout.readline, b''):
+            line = line.decode().rstrip('\r\n')
+            if not line:
+                break
+            name, value = line.split(':', 1)
+            if name.lower() == 'status':
+                status = int(value.split()[0])
+            else:
+                headers.append((name, value.strip()))
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        # Response streamed, length not known
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        shutil.copyfileobj(process.stdout, self.wfile)
+        process.wait()
+        self.close_connection = True
+
+
+def prepare_repos(directory: str, scenario: str, repos: int, commits: int, branches: int, tags: int, file_size: int):
+    # Repositories generated once, then copied
+    template = os.path.join(directory, 'template.git')
+    generate_repo(template, commits, branches, tags, 1, file_size)
+    for i in range(repos):
+        shutil.copytree(template, os.path.join(directory, ORG_FROM, 'repo-{:05d}.git'.format(i)))
+    os.makedirs(os.path.join(directory, ORG_TO), exist_ok=True)
+    if scenario == 'branches':
+        generate_repo(template + '.to', commits, branches, tags, 0, file_size)
+        for i in range(repos):
+            shutil.copytree(template + '.to', os.path.join(directory, ORG_TO, 'repo-{:05d}.git'.format(i)))
+        shutil.rmtree(template + '.to')
+    shutil.rmtree(template)
+
+
+def check_synchronized(platforms: GitPlatforms):
+    for repo in platforms.get_repos(ORG_FROM):
+        for kind in ['branches', 'tags']:
+            if not platforms.has_repo(ORG_TO, repo) or platforms.get_refs(ORG_FROM, repo, kind) != platforms.get_refs(ORG_TO, repo, kind):
+                raise RuntimeError('Repository {} {} not synchronized on "to" platform.'.format(repo, kind))
+
+
+def run(scenario: str = 'mirror', repos: int = 10, commits: int = 100, branches: int = 10, tags: int = 10, file_size: int = 4096, options: list = None) -> dict:
+    """
+    Returns:
+        dict: Result of a synchronization against fake platforms (see sync_scale.run_synchronization), all repositories being then checked
+    """
+    parameters = {'scenario': scenario, 'repos': repos, 'commits': commits, 'branches': branches, 'tags': tags, 'file_size': file_size}
+    with tempfile.TemporaryDirectory() as directory:
+        prepare_repos(directory, scenario, repos, commits, branches, tags, file_size)
+        server = start_server(GitPlatformsHandler, lambda root: GitPlatforms(root, directory))
+        try:
+            result = run_synchronization(server, parameters, options)
+        finally:
+            server.shutdown()
+        check_synchronized(server.platforms)
+    return result
+
+
+def serve(scenario: str, repos: int, commits: int, branches: int, tags: int, file_size: int):
+    # Fake platforms kept running for manual tests, until interrupted
+    with tempfile.TemporaryDirectory() as directory:
+        prepare_repos(directory, scenario, repos, commits, branches, tags, file_size)
+        server = start_server(GitPlatformsHandler, lambda root: GitPlatforms(root, directory))
+        print('Fake platforms: {} (GitHub organization "{}", Gitea organization "{}"), repositories in {}'.format(server.root, ORG_FROM, ORG_TO, directory))
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Synchronization load test against fake platforms')
+    parser.add_argument('--scenario', choices=['mirror', 'branches'], help='Repositories to create and mirror, or branches to update.', default='mirror')
+    parser.add_argument('--repos', type=int, help='Repositories on "from" platform.', default=10)
+    parser.add_argument('--commits', type=int, help='Commits on main branch by repository.', default=100)
+    parser.add_argument('--branches', type=int, help='Branches by repository.', default=10)
+    parser.add_argument('--tags', type=int, help='Tags by repository.', default=10)
+    parser.add_argument('--file-size', type=int, help='Size (bytes) of file updated by each commit.', default=4096)
+    parser.add_argument('--output', help='JSON file of results.', default='fake_platform.json')
+    parser.add_argument('--compare', help='JSON file of previous results (e.g. of another commit) to compare with.')
+    parser.add_argument('--serve', help='Only serve fake platforms, until interrupted.', action='store_true')
+    parser.add_argument('options', nargs=argparse.REMAINDER, help='Synchronization options, after "--".')
+    args = parser.parse_args()
+    if args.serve:
+        serve(args.scenario, args.repos, args.commits, args.branches, args.tags, args.file_size)
+    else:
+        report(run(args.scenario, args.repos, args.commits, args.branches, args.tags, args.file_size, [option for option in args.options if option != '--']),
+               args.output, args.compare)
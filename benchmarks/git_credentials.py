@@ -0,0 +1,69 @@
+"""
+Micro-benchmark of git credentials delivery, per authenticated git HTTP operation ('git ls-remote' on a local server):
+askpass prompts (401 challenge, then git_askpass.py started for username and password) versus 'Authorization' header sent upfront.
+
+Usage: python -m benchmarks.git_credentials [--iterations N]
+"""
+import os
+import time
+import argparse
+import statistics
+import subprocess
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from modules.utils import get_git_credentials_env
+
+
+class AuthRequiredHandler(BaseHTTPRequestHandler):
+    # Basic challenge without credentials, repository not found otherwise (operation end, whatever the credentials delivery)
+    def do_GET(self):
+        if 'Authorization' not in self.headers:
+            self.send_response(401)
+            self.send_header('WWW-Authenticate', 'Basic realm="benchmark"')
+        else:
+            self.server.authorized += 1
+            self.send_response(404)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def time_git_operation(url: str, env: dict, iterations: int) -> list:
+    durations = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        subprocess.run(['git', 'ls-remote', url], env=dict(os.environ, **env), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def run(iterations: int = 20) -> dict:
+    """
+    Returns:
+        dict: Median duration (ms) of a git operation by credentials delivery, and saving per operation
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), AuthRequiredHandler)
+    server.authorized = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = 'http://127.0.0.1:{}/MyOrg/repo.git'.format(server.server_address[1])
+    try:
+        askpass = time_git_operation(url, get_git_credentials_env('foo', 'bar'), iterations)
+        if server.authorized < iterations:
+            raise RuntimeError('Credentials not answered by askpass, check git_askpass.py interpreter.')
+        header = time_git_operation(url, get_git_credentials_env('foo', 'bar', url), iterations)
+    finally:
+        server.shutdown()
+    result = {'askpass_ms': statistics.median(askpass) * 1000, 'header_ms': statistics.median(header) * 1000}
+    result['saving_ms'] = result['askpass_ms'] - result['header_ms']
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Git credentials delivery micro-benchmark')
+    parser.add_argument('--iterations', type=int, help='Git operations by credentials delivery.', default=20)
+    result = run(parser.parse_args().iterations)
+    print('Git operation with askpass prompts  : {:.1f} ms'.format(result['askpass_ms']))
+    print('Git operation with header upfront   : {:.1f} ms'.format(result['header_ms']))
+    print('Saving per authenticated operation  : {:.1f} ms'.format(result['saving_ms']))
@@ -0,0 +1,315 @@
+"""
+Benchmark of a synchronization run (GitHub to Gitea) at scale: platforms APIs served by a local server from tests/http_mocks templates,
+scaled up to N repositories of M branches and K tags, all already synchronized (API requests only, no git operation).
+
+Wall time, API requests by endpoint and peak memory of the run are written to a JSON file, to compare between commits.
+Options after '--' are given to the synchronization (e.g. '-- --jobs 8 --scan-concurrency 32').
+
+Usage: python -m benchmarks.sync_scale [--repos N] [--branches M] [--tags K] [--output FILE] [--compare PREVIOUS_FILE] [-- OPTIONS]
+"""
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+import datetime
+import tempfile
+import subprocess
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+ROOT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MOCKS_DIRECTORY = os.path.join(ROOT_DIRECTORY, 'tests', 'http_mocks')
+
+# Organizations and repository of templates
+ORG_FROM = 'spring-projects'
+ORG_TO = 'MyOrg'
+TEMPLATE_REPO = 'spring-petclinic'
+
+
+def load_template(path: str, root: str, mocked_roots: list, item_name: str = None) -> str:
+    # Template JSON text (listing item if 'item_name' provided, first one if empty), mocked platform URLs replaced by benchmark server one
+    with open(os.path.join(MOCKS_DIRECTORY, path)) as f:
+        content = f.read()
+    for mocked_root in mocked_roots:
+        content = content.replace(mocked_root, root)
+    data = json.loads(content)
+    if isinstance(data, list):
+        data = next(item for item in data if item_name is None or item['name'] == item_name)
+    return json.dumps(data)
+
+
+def get_sha(repo: str, ref: str) -> str:
+    # Same commit on both platforms: repositories already synchronized
+    return hashlib.sha1('{}/{}'.format(repo, ref).encode()).hexdigest()
+
+
+class ScaledPlatforms:
+    """
+    GitHub ("from") and Gitea ("to") responses generated from templates, 'repos' repositories of 'branches' branches and 'tags' tags.
+    Requests are counted by endpoint (repository name replaced by '{repo}').
+
+    Repositories and references are given by get_repos(), has_repo() and get_refs(), other platforms contents (see fake_platform)
+    overriding them.
+    """
+
+    def __init__(self, root: str, repos: int = 0, branches: int = 0, tags: int = 0):
+        self.root = root
+        self.repos = ['repo-{:05d}'.format(i) for i in range(repos)]
+        self.repos_set = set(self.repos)
+        self.branches = ['main'] + ['branch-{:05d}'.format(i) for i in range(1, branches)]
+        self.tags = ['tag-{:05d}'.format(i) for i in range(tags)]
+        self.requests = Counter()
+        self.lock = threading.Lock()
+
+        github = ['https://api.github.com', 'https://github.com']
+        gitea = ['http://localhost:3000']
+        repo_path = 'repos/{}/{}'.format(ORG_FROM, TEMPLATE_REPO)
+        self.github_user = load_template('github/users/{}.json'.format(ORG_FROM), root, github)
+        self.github_repo = load_template('github/{}.json'.format(repo_path), root, github)
+        self.github_repos_item = load_template('github/users/{}/repos.json'.format(ORG_FROM), root, github, TEMPLATE_REPO)
+        self.github_branch = load_template('github/{}/branches.json'.format(repo_path), root, github)
+        self.github_tag = load_template('github/{}/tags.json'.format(repo_path), root, github)
+        repo_path = 'api/v1/repos/{}/{}'.format(ORG_TO, TEMPLATE_REPO)
+        self.gitea_user = load_template('gitea/api/v1/users/{}.json'.format(ORG_TO), root, gitea)
+        self.gitea_org = load_template('gitea/api/v1/orgs/{}.json'.format(ORG_TO), root, gitea)
+        self.gitea_repo = load_template('gitea/{}.json'.format(repo_path), root, gitea)
+        self.gitea_repos_item = load_template('gitea/api/v1/users/{}/repos.json'.format(ORG_TO), root, gitea, TEMPLATE_REPO)
+        self.gitea_branch = load_template('gitea/{}/branches.json'.format(repo_path), root, gitea)
+        self.gitea_tag = load_template('gitea/{}/tags.json'.format(repo_path), root, gitea)
+
+        # Routes as (method, endpoint, path pattern, response(match, query, body) -> (status, headers, data))
+        self.routes = []
+        self.route('GET', '/users/' + ORG_FROM, lambda m, q, b: (200, {}, json.loads(self.github_user)))
+        self.route('GET', '/users/{}/repos'.format(ORG_FROM), lambda m, q, b: self.github_page(m, q, self.get_repos(ORG_FROM), self.repo_item(self.github_repos_item)))
+        self.route('GET', '/repos/{}/{{repo}}'.format(ORG_FROM), lambda m, q, b: self.repo(ORG_FROM, m, self.github_repo))
+        self.route('GET', '/repos/{}/{{repo}}/branches'.format(ORG_FROM), lambda m, q, b: self.refs_page(self.github_page, ORG_FROM, m, q, 'branches', self.github_branch, 'sha'))
+        self.route('GET', '/repos/{}/{{repo}}/tags'.format(ORG_FROM), lambda m, q, b: self.refs_page(self.github_page, ORG_FROM, m, q, 'tags', self.github_tag, 'sha'))
+        self.route('GET', '/api/v1/users/' + ORG_TO, lambda m, q, b: (200, {}, json.loads(self.gitea_user)))
+        self.route('GET', '/api/v1/orgs/' + ORG_TO, lambda m, q, b: (200, {}, json.loads(self.gitea_org)))
+        self.route('GET', '/api/v1/users/{}/repos'.format(ORG_TO), lambda m, q, b: self.gitea_page(m, q, self.get_repos(ORG_TO), self.repo_item(self.gitea_repos_item)))
+        self.route('GET', '/api/v1/repos/{}/{{repo}}'.format(ORG_TO), lambda m, q, b: self.repo(ORG_TO, m, self.gitea_repo))
+        self.route('GET', '/api/v1/repos/{}/{{repo}}/branches'.format(ORG_TO), lambda m, q, b: self.refs_page(self.gitea_page, ORG_TO, m, q, 'branches', self.gitea_branch, 'id'))
+        self.route('GET', '/api/v1/repos/{}/{{repo}}/tags'.format(ORG_TO), lambda m, q, b: self.refs_page(self.gitea_page, ORG_TO, m, q, 'tags', self.gitea_tag, 'sha'))
+
+    def route(self, method: str, endpoint: str, response):
+        self.routes.append((method, endpoint, re.compile('^' + re.escape(endpoint).replace(re.escape('{repo}'), '(?P<repo>[^/]+)') + '$'), response))
+
+    def get_repos(self, org: str) -> list:
+        return self.repos
+
+    def has_repo(self, org: str, repo: str) -> bool:
+        return repo in self.repos_set
+
+    def get_refs(self, org: str, repo: str, kind: str) -> dict:
+        # References names ('branches' or 'tags' kind) as keys and commits as values
+        return {name: get_sha(repo, name) for name in (self.branches if kind == 'branches' else self.tags)}
+
+    def respond(self, method: str, path: str, query: dict, body: bytes = b'') -> tuple:
+        """
+        Returns:
+            tuple: Status, headers and JSON data of request response
+        """
+        for route_method, endpoint, pattern, response in self.routes:
+            match = pattern.match(path)
+            if match and method == route_method:
+                self.count(method + ' ' + endpoint)
+                return response(match, query, body)
+        self.count(method + ' (not mocked)')
+        return 404, {}, {'message': 'Not Found'}
+
+    def count(self, endpoint: str):
+        with self.lock:
+            self.requests[endpoint] += 1
+
+    def repo(self, org: str, match, template: str) -> tuple:
+        if not self.has_repo(org, match.group('repo')):
+            return 404, {}, {'message': 'Not Found'}
+        return 200, {}, json.loads(template.replace(TEMPLATE_REPO, match.group('repo')))
+
+    def repo_item(self, template: str):
+        return lambda repo: json.loads(template.replace(TEMPLATE_REPO, repo))
+
+    def refs_page(self, page, org: str, match, query: dict, kind: str, template: str, sha_key: str) -> tuple:
+        # Listing of repository references from template, commit of template replaced
+        repo = match.group('repo')
+        if not self.has_repo(org, repo):
+            return 404, {}, {'message': 'Not Found'}
+        refs = self.get_refs(org, repo, kind)
+        template = template.replace(TEMPLATE_REPO, repo)
+        template_sha = json.loads(template)['commit'][sha_key]
+
+        def ref_item(name: str) -> dict:
+            item = json.loads(template.replace(template_sha, refs[name]))
+            item['name'] = name
+            return item
+        return page(match, query, list(refs), ref_item)
+
+    def github_page(self, match, query: dict, names: list, item) -> tuple:
+        page, per_page = int(query.get('page', ['1'])[0]), int(query.get('per_page', ['30'])[0])
+        last = max(1, -(-len(names) // per_page))
+        links = []
+        if page < last:
+            links.append('<{}{}?per_page={}&page={}>; rel="next"'.format(self.root, match.group(0), per_page, page + 1))
+            links.append('<{}{}?per_page={}&page={}>; rel="last"'.format(self.root, match.group(0), per_page, last))
+        headers = {'Link': ', '.join(links)} if links else {}
+        return 200, headers, [item(name) for name in names[(page - 1) * per_page:page * per_page]]
+
+    def gitea_page(self, match, query: dict, names: list, item) -> tuple:
+        page, limit = int(query.get('page', ['1'])[0]), int(query.get('limit', ['30'])[0])
+        return 200, {'X-Total-Count': str(len(names))}, [item(name) for name in names[(page - 1) * limit:page * limit]]
+
+
+class ScaledPlatformsHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        self.send_json(*self.server.platforms.respond(self.command, url.path, parse_qs(url.query)))
+
+    def send_json(self, status: int, headers: dict, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def get_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT_DIRECTORY, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_process(command: list) -> tuple[int, str, float]:
+    """
+    Run command from repository root, standard output discarded
+
+    Returns:
+        int: Exit code
+        str: Error output
+        float: Peak memory (MB) of the process (and of its children, e.g. git commands), None if not measurable (Windows)
+    """
+    with tempfile.TemporaryFile(mode='w+') as stderr:
+        process = subprocess.Popen(command, cwd=ROOT_DIRECTORY, stdout=subprocess.DEVNULL, stderr=stderr, text=True)
+        peak = None
+        if hasattr(os, 'wait4'):
+            # Resources of this process only, not of other benchmark children (e.g. fake platforms git commands) nor previous runs
+            _, status, usage = os.wait4(process.pid, 0)
+            process.returncode = os.waitstatus_to_exitcode(status)
+            # Kilobytes on Linux, bytes on macOS
+            peak = usage.ru_maxrss / (1024 * 1024) if sys.platform == 'darwin' else usage.ru_maxrss / 1024
+        else:
+            process.wait()
+        stderr.seek(0)
+        return process.returncode, stderr.read(), peak
+
+
+def start_server(handler, platforms) -> ThreadingHTTPServer:
+    # 'platforms(root)' creating the platforms answering requests
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    server.root = 'http://127.0.0.1:{}'.format(server.server_address[1])
+    server.platforms = platforms(server.root)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_synchronization(server: ThreadingHTTPServer, parameters: dict, options: list = None) -> dict:
+    """
+    Run a synchronization (in its own process) from "from" to "to" organization of server platforms
+
+    Returns:
+        dict: Parameters, wall time (s), peak memory (MB) and API requests (total and by endpoint) of the run
+    """
+    options = options or []
+    command = [sys.executable, 'git_platforms_synchro.py', '--from-url', server.root, '--from-type', 'GitHub', '--from-login', 'foo', '--from-password', 'bar',
+               '--to-url', server.root, '--to-type', 'Gitea', '--to-login', 'foo', '--to-password', 'bar', '--from-org', ORG_FROM, '--to-org', ORG_TO] + options
+    start = time.perf_counter()
+    returncode, errors, peak_memory = run_process(command)
+    wall_time = time.perf_counter() - start
+    if returncode != 0:
+        raise RuntimeError('Synchronization failed (exit code {}): {}'.format(returncode, errors[-2000:]))
+    requests = server.platforms.requests
+    return {
+        'commit': get_commit(),
+        'date': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'parameters': dict(parameters, options=options),
+        'wall_time_s': round(wall_time, 3),
+        'peak_memory_mb': round(peak_memory, 1) if peak_memory is not None else None,
+        'requests': sum(requests.values()),
+        'requests_by_endpoint': dict(sorted(requests.items()))
+    }
+
+
+def run(repos: int = 200, branches: int = 20, tags: int = 50, options: list = None) -> dict:
+    """
+    Returns:
+        dict: Result of a synchronization against scaled platforms, see run_synchronization()
+    """
+    server = start_server(ScaledPlatformsHandler, lambda root: ScaledPlatforms(root, repos, branches, tags))
+    try:
+        return run_synchronization(server, {'repos': repos, 'branches': branches, 'tags': tags}, options)
+    finally:
+        server.shutdown()
+
+
+def compare(previous: dict, current: dict) -> list:
+    """
+    Returns:
+        list: Lines of differences between two results (measures, then requests by endpoint)
+    """
+    lines = []
+    if previous['parameters'] != current['parameters']:
+        lines.append('Warning, different parameters: {} -> {}'.format(previous['parameters'], current['parameters']))
+    for measure in ['wall_time_s', 'peak_memory_mb', 'requests']:
+        before, after = previous.get(measure), current.get(measure)
+        if before is None or after is None:
+            continue
+        ratio = ' ({:+.1f}%)'.format((after - before) * 100 / before) if before else ''
+        lines.append('{:<16}: {} -> {}{}'.format(measure, before, after, ratio))
+    endpoints = sorted(set(previous['requests_by_endpoint']) | set(current['requests_by_endpoint']))
+    for endpoint in endpoints:
+        before, after = previous['requests_by_endpoint'].get(endpoint, 0), current['requests_by_endpoint'].get(endpoint, 0)
+        if before != after:
+            lines.append('  {}: {} -> {}'.format(endpoint, before, after))
+    return lines
+
+
+def report(result: dict, output: str, previous: str = None):
+    # Result written to 'output' JSON file and printed, compared to 'previous' JSON file one if provided
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print('Wall time      : {:.3f} s'.format(result['wall_time_s']))
+    print('Peak memory    : {} MB'.format(result['peak_memory_mb']))
+    print('API requests   : {}'.format(result['requests']))
+    for endpoint, count in result['requests_by_endpoint'].items():
+        print('  {}: {}'.format(endpoint, count))
+    if previous:
+        with open(previous) as f:
+            print('\nCompared to {}:'.format(previous))
+            for line in compare(json.load(f), result):
+                print(line)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Synchronization at scale benchmark')
+    parser.add_argument('--repos', type=int, help='Repositories on both platforms.', default=200)
+    parser.add_argument('--branches', type=int, help='Branches by repository.', default=20)
+    parser.add_argument('--tags', type=int, help='Tags by repository.', default=50)
+    parser.add_argument('--output', help='JSON file of results.', default='sync_scale.json')
+    parser.add_argument('--compare', help='JSON file of previous results (e.g. of another commit) to compare with.')
+    parser.add_argument('options', nargs=argparse.REMAINDER, help='Synchronization options, after "--".')
+    args = parser.parse_args()
+    report(run(args.repos, args.branches, args.tags, [option for option in args.options if option != '--']), args.output, args.compare)
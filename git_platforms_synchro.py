@@ -1,20 +1,41 @@
 import os
 import sys
+import shutil
+import threading
+import argparse
 import logging
 import modules.input_parser as input_parser
-from git import Repo
+import modules.profiler as profiler
+from git import Repo, InvalidGitRepositoryError, NoSuchPathError
+from queue import Queue
+from contextlib import nullcontext
+from dataclasses import dataclass, field
 from modules.git_clients import GitClientFactory, GitClient
-from modules.utils import TMP_REPO_GIT_DIRECTORY, delete_temporary_repo_git_directory
+from modules.git_refs import LsRemoteGitClient
+from modules.http_cache import HttpCache, CachingHTTPAdapter
+from modules.http_scheduler import RateLimitScheduler, ScheduledHTTPAdapter
+from modules.http_transport import PooledHTTPAdapter, enable_http2
+from modules.metrics import Metrics, MeasuredGitClient, MetricsHTTPAdapter, PushProgress, measure, get_repo_key, get_objects_files, get_fetched_size
+from modules.pipeline import Stage, run_pipeline
+from modules.profiler import profile_phase, profiled
+from modules.repo_scan import RepoScan, scan_repos
+from modules.server_import import ServerImports
+from modules.sync_state import SyncState
+from modules.utils import TMP_REPO_GIT_DIRECTORY, delete_temporary_repo_git_directory, get_worker_repo_git_directory, get_cache_repo_git_directory, get_git_credentials_env
 
 GIT_CONFIG_HTTP_PREFIX = 'http'
 GIT_REMOTE_TO = 'sync-to'
 
 logger = logging.getLogger(__name__)
 
+# Locks of cached mirrors directories (see git_mirror_cached), by directory
+cache_locks = {}
+cache_locks_lock = threading.Lock()
+
 
 def log_init(level: str):
-    logging.basicConfig(stream=sys.stdout,
-                        format='%(message)s', level=level)
+    # Synchronization stages run in their own threads, logs of several repositories are interleaved
+    logging.basicConfig(stream=sys.stdout, format='[%(threadName)s] %(message)s', level=level)
     if not any(level in s for s in ['TRACE', 'DEBUG']):
         logging.getLogger("urllib3").setLevel(logging.WARNING)
         logging.getLogger("requests").setLevel(logging.WARNING)
@@ -22,112 +43,213 @@ def log_init(level: str):
         logging.getLogger("gitea").setLevel(logging.WARNING)
 
 
-def set_git_credentials(username: str, password: str):
-    if not username and not password:
-        os.environ.pop('GIT_ASKPASS')
-        os.environ.pop('GIT_USERNAME')
-        os.environ.pop('GIT_PASSWORD')
-        return
-
-    working_dir = os.path.dirname(os.path.realpath(__file__))
-
-    os.environ['GIT_ASKPASS'] = os.path.join(working_dir, 'modules', 'git_askpass.py')
-    if username:
-        os.environ['GIT_USERNAME'] = username
-    if password:
-        os.environ['GIT_PASSWORD'] = password
-
-
-def git_clone(url: str, mirror: bool = False, disable_ssl_verify: bool = False, proxy: str = None) -> Repo:
-    if os.path.exists(TMP_REPO_GIT_DIRECTORY):
-        repo_cloned = Repo(TMP_REPO_GIT_DIRECTORY)
+def git_clone(url: str, mirror: bool = False, disable_ssl_verify: bool = False, proxy: str = None, git_dir: str = TMP_REPO_GIT_DIRECTORY,
+              cache_dir: str = None, env: dict = None) -> Repo:
+    """
+    Clone (or reuse) repository, 'env' being the environment of git commands (credentials, see get_git_credentials_env)
+    """
+    if cache_dir:
+        # Cached repos are always bare mirrors
+        return git_mirror_cached(url, disable_ssl_verify, proxy, cache_dir, env)
+    if os.path.exists(git_dir):
+        repo_cloned = Repo(git_dir)
         origin_url = repo_cloned.remote('origin').url
-        if repo_cloned.bare == mirror and origin_url == url:
+        if repo_cloned.bare and is_mirror(repo_cloned) == mirror and origin_url == url:
             # If already cloned, consider proxy & ssl verify are correct
             logging.debug('Reusing existing cloned repo %s', origin_url)
             return repo_cloned
         else:
-            delete_temporary_repo_git_directory()
+            delete_temporary_repo_git_directory(directory=git_dir)
+    return git_clone_from(url, git_dir, mirror, disable_ssl_verify, proxy, env)
+
+
+def git_clone_from(url: str, git_dir: str, mirror: bool = False, disable_ssl_verify: bool = False, proxy: str = None, env: dict = None) -> Repo:
     logging.debug('Cloning repo %s', url)
+    if not mirror:
+        return git_fetch_bare(url, git_dir, disable_ssl_verify, proxy, env)
     options = []
     if disable_ssl_verify:
         options += ['--config http.sslVerify=false']
     if proxy:
         options += ['--config http.proxy={} --config https.proxy={}'.format(proxy, proxy)]
-    repo_from_cloned = Repo.clone_from(url, TMP_REPO_GIT_DIRECTORY, mirror=mirror, allow_unsafe_options=True, multi_options=options)
+    repo_from_cloned = Repo.clone_from(url, git_dir, env=env, mirror=mirror, allow_unsafe_options=True, multi_options=options)
     return repo_from_cloned
 
 
+def git_fetch_bare(url: str, git_dir: str, disable_ssl_verify: bool = False, proxy: str = None, env: dict = None) -> Repo:
+    # Without working tree (never read), branches as remote-tracking ones and all tags
+    repo = Repo.init(git_dir, bare=True)
+    try:
+        origin = repo.create_remote('origin', url)
+        with repo.config_writer() as config:
+            if disable_ssl_verify:
+                config.set_value(GIT_CONFIG_HTTP_PREFIX, 'sslVerify', 'false')
+            if proxy:
+                config.set_value(GIT_CONFIG_HTTP_PREFIX, 'proxy', proxy)
+                config.set_value('https', 'proxy', proxy)
+        repo.git.update_environment(**(env or {}))
+        origin.fetch(tags=True)
+    except BaseException:
+        # Not reused by next clone
+        shutil.rmtree(git_dir, ignore_errors=True)
+        raise
+    return repo
+
+
+def git_fetch_delta(url: str, git_dir: str, branches: list, tags: list, disable_ssl_verify: bool = False, proxy: str = None, env: dict = None,
+                    clone_url_to: str = None, branches_to: list = None, disable_ssl_verify_to: bool = False, proxy_to: str = None, env_to: dict = None) -> Repo:
+    """
+    Fetch only 'branches' and 'tags' from repository, in a new bare repository. Tips of 'branches_to' on "to" repository are fetched
+    first (shallow) as negotiation bases: objects already on "to" are not transferred again from "from" repository.
+    """
+    logging.debug('Fetching delta of repo %s', url)
+    shutil.rmtree(git_dir, ignore_errors=True)
+    repo = Repo.init(git_dir, bare=True)
+    try:
+        origin = repo.create_remote('origin', url)
+        with repo.config_writer() as config:
+            section = GIT_CONFIG_HTTP_PREFIX + ' "' + url + '"'
+            config.set_value(section, 'sslVerify', str(not disable_ssl_verify).lower())
+            config.set_value(section, 'proxy', proxy if proxy is not None else '')
+        if clone_url_to:
+            configure_remote_to(repo, clone_url_to, proxy_to, not disable_ssl_verify_to)
+        if clone_url_to and branches_to:
+            with repo.git.custom_environment(**(env_to or {})):
+                repo.remote(GIT_REMOTE_TO).fetch(['+refs/heads/{}:refs/remotes/{}/{}'.format(branch, GIT_REMOTE_TO, branch) for branch in branches_to],
+                                                 depth=1, no_tags=True)
+        repo.git.update_environment(**(env or {}))
+        origin.fetch(['+refs/heads/{}:refs/remotes/origin/{}'.format(branch, branch) for branch in branches] + [get_tag_refspec(tag) for tag in tags],
+                     no_tags=True)
+    except BaseException:
+        shutil.rmtree(git_dir, ignore_errors=True)
+        raise
+    return repo
+
+
+def is_mirror(repo: Repo) -> bool:
+    # Mirrors have branches as local heads, fetched repositories as remote-tracking branches
+    with repo.config_reader() as config:
+        return repo.bare and not config.get_value('remote "origin"', 'fetch', '').endswith(':refs/remotes/origin/*')
+
+
+def git_mirror_cached(url: str, disable_ssl_verify: bool = False, proxy: str = None, cache_dir: str = None, env: dict = None) -> Repo:
+    git_dir = get_cache_repo_git_directory(cache_dir, url)
+    # Same mirror needed by several fetch workers (e.g. pairs with same "from" repository): fetched or cloned by one at a time
+    with get_cache_lock(git_dir):
+        return git_mirror_cached_update(url, git_dir, disable_ssl_verify, proxy, env)
+
+
+def get_cache_lock(git_dir: str) -> threading.Lock:
+    with cache_locks_lock:
+        return cache_locks.setdefault(os.path.abspath(git_dir), threading.Lock())
+
+
+def git_mirror_cached_update(url: str, git_dir: str, disable_ssl_verify: bool = False, proxy: str = None, env: dict = None) -> Repo:
+    if os.path.exists(git_dir):
+        try:
+            repo_cached = Repo(git_dir)
+            if repo_cached.bare and repo_cached.remote('origin').url == url:
+                logging.debug('Fetching cached mirror repo %s', url)
+                with repo_cached.config_writer() as config:
+                    config.set_value(GIT_CONFIG_HTTP_PREFIX, 'sslVerify', str(not disable_ssl_verify).lower())
+                    if proxy:
+                        config.set_value(GIT_CONFIG_HTTP_PREFIX, 'proxy', proxy)
+                    elif config.has_option(GIT_CONFIG_HTTP_PREFIX, 'proxy'):
+                        config.remove_option(GIT_CONFIG_HTTP_PREFIX, 'proxy')
+                with repo_cached.git.custom_environment(**(env or {})):
+                    repo_cached.git.fetch('origin', prune=True)
+                return repo_cached
+        except (InvalidGitRepositoryError, NoSuchPathError, ValueError):
+            pass
+        logging.debug('Discarding invalid cached mirror repo %s', git_dir)
+        shutil.rmtree(git_dir)
+    return git_clone_from(url, git_dir, True, disable_ssl_verify, proxy, env)
+
+
 def configure_remote_to(repo: Repo, clone_url_to: str, proxy: str = '', ssl_verify: bool = True):
     try:
         repo.remote(GIT_REMOTE_TO).set_url(clone_url_to)
     except ValueError:
         repo.create_remote(GIT_REMOTE_TO, clone_url_to)
-    repo.config_writer().set_value(GIT_CONFIG_HTTP_PREFIX + ' "' + clone_url_to + '"', 'sslVerify', str(ssl_verify).lower()).release()
-    repo.config_writer().set_value(GIT_CONFIG_HTTP_PREFIX + ' "' + clone_url_to + '"', 'proxy', proxy if proxy is not None else '').release()
-    # For pushing big files
-    repo.config_writer().set_value(GIT_CONFIG_HTTP_PREFIX + ' "' + clone_url_to + '"', 'postBuffer', '524288000').release()
-
-
-def repo_mirror(create_repo: bool, dry_run: bool, clone_url_from: str, login_from: str, password_from: str, proxy_from: str, disable_ssl_verify_from: bool,
-                git_to: GitClient, proxy_to: str, disable_ssl_verify_to: bool, org_to: str, repo: str, description: str = ''):
-    if dry_run:
-        logger.info('  Dry-run mode, skipping repository creation and mirroring.')
-        return
-    if create_repo:
-        git_to.create_repo(org_to, repo, description)
-    clone_url_to = git_to.get_repo_clone_url(org_to, repo)
-    set_git_credentials(login_from, password_from)
-    repo_from_cloned = git_clone(url=clone_url_from, mirror=True, disable_ssl_verify=disable_ssl_verify_from, proxy=proxy_from)
-    configure_remote_to(repo_from_cloned, clone_url_to, proxy_to, not disable_ssl_verify_to)
-    set_git_credentials(git_to.get_login_or_token(), git_to.get_password())
-    repo_from_cloned.remote(GIT_REMOTE_TO).push(mirror=True).raise_if_error()
+    with repo.config_writer() as config:
+        section = GIT_CONFIG_HTTP_PREFIX + ' "' + clone_url_to + '"'
+        config.set_value(section, 'sslVerify', str(ssl_verify).lower())
+        config.set_value(section, 'proxy', proxy if proxy is not None else '')
+        # For pushing big files
+        config.set_value(section, 'postBuffer', '524288000')
 
 
-def repo_tags_sync(args, clone_url_from: str, git_from: GitClient, git_to: GitClient, repo: str, branches_updated: int) -> bool:
-    if args.dry_run:
-        logger.info('  Dry-run mode, skipping tags synchronization.')
-        return False
+def get_branch_refspec(repo: Repo, branch: str) -> str:
+    # Mirror repos have all branches as local heads, others only as remote-tracking branches
+    if is_mirror(repo):
+        return 'refs/heads/{}:refs/heads/{}'.format(branch, branch)
+    return 'refs/remotes/origin/{}:refs/heads/{}'.format(branch, branch)
 
-    tags_commits_from = git_from.get_tags(args.from_org, repo)
-    tags_commits_to = git_to.get_tags(args.to_org, repo)
-    if branches_updated > 0 or len(tags_commits_from) == len(tags_commits_to):
-        return False
 
-    logger.info('  All branches already synchronized, do tags only...')
-    set_git_credentials(git_from.get_login_or_token(), git_from.get_password())
-    repo_from_cloned = git_clone(url=clone_url_from, disable_ssl_verify=args.from_disable_ssl_verify, proxy=args.from_proxy)
-    clone_url_to = git_to.get_repo_clone_url(args.to_org, repo)
-    configure_remote_to(repo_from_cloned, clone_url_to, args.to_proxy, not args.to_disable_ssl_verify)
-    set_git_credentials(git_to.get_login_or_token(), git_to.get_password())
-    repo_from_cloned.remote(GIT_REMOTE_TO).push(tags=True).raise_if_error()
-    return True
-
-
-def repo_branch_sync(dry_run: bool, clone_url_from: str, login_from: str, password_from: str, proxy_from: str, disable_ssl_verify_from: bool,
-                     git_to: GitClient, proxy_to: str, disable_ssl_verify_to: bool, org_to: str, repo: str, branch: str):
-    if dry_run:
-        logger.info('    Dry-run mode, skipping branch synchronization.')
-        return
-    set_git_credentials(login_from, password_from)
-    repo_from_cloned = git_clone(url=clone_url_from, disable_ssl_verify=disable_ssl_verify_from, proxy=proxy_from)
-    repo_from_cloned.git.checkout(branch)
-    clone_url_to = git_to.get_repo_clone_url(org_to, repo)
-    configure_remote_to(repo_from_cloned, clone_url_to, proxy_to, not disable_ssl_verify_to)
-    set_git_credentials(git_to.get_login_or_token(), git_to.get_password())
-    repo_from_cloned.remote(GIT_REMOTE_TO).push().raise_if_error()
+@dataclass
+class SyncPair:
+    """
+    Synchronization of a "from" organization to a "to" one (one by configuration file pair, see --config), with its options and platforms clients
+    """
+    args: argparse.Namespace
+    git_from: GitClient
+    git_to: GitClient
+    repos: list = field(default_factory=list)
+    sync_state: SyncState = None
+    scans: dict = field(default_factory=dict)
+    server_imports: ServerImports = None
 
 
-def repo_branches_sync(args, branches_commits_from: dict, branches_commits_to: dict,
-                       clone_url_from: str, repo: str, git_to: GitClient) -> tuple[int, int]:
+@dataclass
+class RepoJob:
     """
-    Main branches process sync
+    Repository synchronization going through pipeline stages: metadata (what to synchronize), fetch from "from" platform, push to "to" platform
+    """
+    repo: str
+    pair: SyncPair = None
+    clone_url_from: str = None
+    create: bool = False
+    description: str = ''
+    mirror: bool = False
+    branches: list = field(default_factory=list)
+    # Branches to synchronize already existing on "to" (delta fetch bases)
+    branches_existing_to: list = field(default_factory=list)
+    tags: list = field(default_factory=list)
+    last_activity: str = None
+    git_dir: str = None
+    repo_cloned: Repo = None
+    # Number of repositories updated (0 or 1), of branches scanned, of branches updated
+    result: tuple = (0, 0, 0)
+
+
+def get_tag_refspec(tag: str) -> str:
+    # Forced, tags moved to another commit on "from" have to be moved on "to"
+    return '+refs/tags/{}:refs/tags/{}'.format(tag, tag)
+
+
+def get_tags_to_sync(tags_commits_from: dict, tags_commits_to: dict) -> list:
+    # Tags missing on "to", or not referencing the same commit
+    return [tag for tag, commit in tags_commits_from.items() if tags_commits_to.get(tag, None) != commit]
+
+
+def repo_tags_diff(scan: RepoScan) -> list:
+    tags_to_sync = get_tags_to_sync(scan.tags_from(), scan.tags_to())
+    if len(tags_to_sync) > 0:
+        logger.info('  Tags to synchronize: %d', len(tags_to_sync))
+        logger.debug('    %s', ', '.join(tags_to_sync))
+    return tags_to_sync
+
+
+def repo_branches_diff(args, branches_commits_from: dict, branches_commits_to: dict) -> tuple[int, list]:
+    """
+    Branches to synchronize, depending includes/excludes
 
     Returns:
         int: Number of branches scanned
-        int: Numner of branches updated
+        list: Branches to synchronize
     """
-    branches_scanned = branches_updated = 0
+    branches_scanned = 0
+    branches_to_sync = []
     for branch in input_parser.reduce(branches_commits_from.keys(), args.branches_include, args.branches_exclude):
         branches_scanned += 1
         logger.info('  Branch: %s', branch)
@@ -139,85 +261,406 @@ def repo_branches_sync(args, branches_commits_from: dict, branches_commits_to: d
             logger.info('    Already synchronized.')
             continue
         logger.info('    Synchronize branch...')
-        branches_updated += 1
-        repo_branch_sync(args.dry_run, clone_url_from, args.from_login, args.from_password, args.from_proxy, args.from_disable_ssl_verify,
-                         git_to, args.to_proxy, args.to_disable_ssl_verify, args.to_org, repo, branch)
-    return branches_scanned, branches_updated
+        branches_to_sync.append(branch)
+    return branches_scanned, branches_to_sync
 
 
-def main() -> int:
-    delete_temporary_repo_git_directory()
-    args = input_parser.parse()
-    log_init(args.log_level)
-    logger.info('Starting Git Platforms Synchronization...')
-    input_parser.print_args(args)
+def get_repo_last_activity(git_from: GitClient, org: str, repo: str) -> str:
+    repo_info = git_from.get_indexed_repo_info(org, repo)
+    return repo_info.pushed_at if repo_info is not None else None
 
-    git_from = GitClientFactory.create_client(
-        args.from_url,
-        args.from_type,
-        args.from_login,
-        args.from_password,
-        not args.from_disable_ssl_verify,
-        args.from_proxy)
-    git_to = GitClientFactory.create_client(args.to_url, args.to_type, args.to_login, args.to_password, not args.to_disable_ssl_verify, args.to_proxy)
 
-    logger.info('\n------ Processing synchronization ------')
-    total_repos_scanned = total_repos_updated = total_branches_scanned = total_branches_updated = 0
+def repo_sync(args, git_from: GitClient, git_to: GitClient, job: RepoJob, sync_state: SyncState = None, scan: RepoScan = None,
+              server_imports: ServerImports = None) -> RepoJob:
+    """
+    Metadata stage of repository sync, skipped if "from" repository last activity unchanged since last synchronization (when state provided).
+    Repository metadata already scanned (see scan_repos) is not requested again.
+    New repository imported by "to" platform itself when server-side imports provided and supported, instead of being fetched and pushed.
+
+    Returns:
+        RepoJob: Repository to fetch and push, None if nothing to do
+    """
+    logger.info('Repository: %s', job.repo)
+    if sync_state is not None:
+        job.last_activity = get_repo_last_activity(git_from, args.from_org, job.repo)
+        if sync_state.is_unchanged(job.repo, job.last_activity):
+            logger.info('  Repository unchanged on "from" platform since last synchronization, skipping.')
+            return None
+    if repo_sync_refs(args, git_from, git_to, job, scan):
+        if not job.create or server_imports is None:
+            return job
+        if not git_to.is_import_supported():
+            logger.info('  Server-side import not supported by "to" platform, mirrored instead.')
+            return job
+        server_imports.submit(args.to_org, job.repo, job.clone_url_from, args.from_login, args.from_password, job.description,
+                              on_finished=lambda: repo_sync_done(args, job, sync_state))
+        return None
+    repo_sync_done(args, job, sync_state)
+    return None
+
+
+def repo_sync_refs(args, git_from: GitClient, git_to: GitClient, job: RepoJob, scan: RepoScan = None) -> bool:
+    """
+    Repository creation/mirroring or branches and tags to synchronize
+
+    Returns:
+        bool: True if repository has to be fetched and pushed
+    """
+    job.clone_url_from = git_from.get_repo_clone_url(args.from_org, job.repo)
+    scan = scan if scan is not None else RepoScan(git_from, git_to, args.from_org, args.to_org, job.repo)
+
+    # New repo to create and mirror
+    if not scan.exists_to():
+        logger.info('  Repository does not exist on "to" plaform, create as mirror...')
+        description = git_from.get_repo_description(args.from_org, job.repo)
+        job.create = job.mirror = True
+        job.description = args.to_description_prefix + (description if description is not None else '')
+        job.result = (1, 0, 0)
+        return is_mirror_to_do(args.dry_run)
+
+    # Branches on "from", skip if no commits
+    branches_commits_from = scan.branches_from()
+    if len(branches_commits_from) == 0:
+        logger.info('  Repository has no branches on "from" platform, skipping.')
+        return False
 
+    # Branches on "to", mirror repo if empty
+    branches_commits_to = scan.branches_to()
+    if len(branches_commits_to) == 0:
+        logger.info('  Repository has no branches on "to" platform, synchronize as mirror...')
+        job.mirror = True
+        job.result = (1, 0, 0)
+        return is_mirror_to_do(args.dry_run)
+
+    # Tags missing or moved on "to", pushed with branches
+    job.tags = repo_tags_diff(scan)
+    branches_scanned, job.branches = repo_branches_diff(args, branches_commits_from, branches_commits_to)
+    job.branches_existing_to = [branch for branch in job.branches if branch in branches_commits_to]
+    job.result = (int(len(job.branches) > 0 or len(job.tags) > 0), branches_scanned, len(job.branches))
+    if len(job.branches) == 0 and len(job.tags) == 0:
+        return False
+    if args.dry_run:
+        logger.info('  Dry-run mode, skipping branches and tags synchronization.')
+        return False
+    return True
+
+
+def is_mirror_to_do(dry_run: bool) -> bool:
+    if dry_run:
+        logger.info('  Dry-run mode, skipping repository creation and mirroring.')
+        return False
+    return True
+
+
+def repo_fetch(args, git_to: GitClient, job: RepoJob, git_dirs: Queue, metrics: Metrics = None) -> RepoJob:
+    """
+    Fetch stage of repository sync, "from" repository cloned (or cached mirror fetched) in a free git working directory, kept until pushed.
+    With delta fetch, only branches and tags to synchronize are fetched.
+    """
+    job.git_dir = git_dirs.get()
+    logger.info('  Fetch repository %s from "from" platform...', job.repo)
+    try:
+        # Objects already there (reused clone, cached mirror) not fetched again
+        objects_files = get_objects_files(get_cache_repo_git_directory(args.cache_dir, job.clone_url_from) if args.cache_dir else job.git_dir) if metrics else {}
+        with measure(metrics, 'clone', get_repo_key(args.from_org, job.repo, args.to_org)):
+            repo_clone(args, git_to, job)
+        if metrics is not None:
+            metrics.add('fetched_bytes', get_fetched_size(job.repo_cloned.git_dir, objects_files), get_repo_key(args.from_org, job.repo, args.to_org))
+    except BaseException:
+        git_dirs.put(job.git_dir)
+        raise
+    return job
+
+
+def repo_clone(args, git_to: GitClient, job: RepoJob):
+    if args.delta_fetch and not job.mirror and not args.cache_dir:
+        clone_url_to = git_to.get_repo_clone_url(args.to_org, job.repo)
+        job.repo_cloned = git_fetch_delta(job.clone_url_from, job.git_dir, job.branches, job.tags, args.from_disable_ssl_verify, args.from_proxy,
+                                          get_git_credentials_env(args.from_login, args.from_password, job.clone_url_from), clone_url_to,
+                                          job.branches_existing_to, args.to_disable_ssl_verify, args.to_proxy,
+                                          get_git_credentials_env(git_to.get_login_or_token(), git_to.get_password(), clone_url_to))
+        return
+    job.repo_cloned = git_clone(url=job.clone_url_from, mirror=job.mirror, disable_ssl_verify=args.from_disable_ssl_verify, proxy=args.from_proxy,
+                                git_dir=job.git_dir, cache_dir=args.cache_dir, env=get_git_credentials_env(args.from_login, args.from_password, job.clone_url_from))
+
+
+def repo_push(args, git_to: GitClient, job: RepoJob, git_dirs: Queue, sync_state: SyncState = None, metrics: Metrics = None):
+    """
+    Push stage of repository sync (after creation if new), git working directory released for next fetches
+    """
+    try:
+        if job.create:
+            git_to.create_repo(args.to_org, job.repo, job.description)
+        clone_url_to = git_to.get_repo_clone_url(args.to_org, job.repo)
+        if job.mirror:
+            logger.info('  Push repository %s as mirror to "to" platform...', job.repo)
+        else:
+            if len(job.branches) == 0:
+                logger.info('  All branches already synchronized, do tags only...')
+            logger.info('  Push %d branch(es) and %d tag(s) to "to" platform...', len(job.branches), len(job.tags))
+        # Cached mirror shared by pairs with same "from" repository: its "to" remote configured and pushed by one pair at a time
+        with get_cache_lock(job.repo_cloned.git_dir) if args.cache_dir else nullcontext():
+            repo_push_refs(args, git_to, job, clone_url_to, metrics)
+    finally:
+        job.repo_cloned = None
+        git_dirs.put(job.git_dir)
+    repo_sync_done(args, job, sync_state)
+
+
+def repo_push_refs(args, git_to: GitClient, job: RepoJob, clone_url_to: str, metrics: Metrics = None):
+    repo_key = get_repo_key(args.from_org, job.repo, args.to_org)
+    with measure(metrics, 'configure', repo_key):
+        configure_remote_to(job.repo_cloned, clone_url_to, args.to_proxy, not args.to_disable_ssl_verify)
+    # Credentials of "to" platform for push only, cloned repository environment having "from" ones
+    progress = PushProgress() if metrics is not None else None
+    with measure(metrics, 'push', repo_key), job.repo_cloned.git.custom_environment(**get_git_credentials_env(git_to.get_login_or_token(), git_to.get_password(), clone_url_to)):
+        if job.mirror:
+            job.repo_cloned.remote(GIT_REMOTE_TO).push(mirror=True, progress=progress).raise_if_error()
+        else:
+            # All refs in one push: single negotiation/connection, optionally all-or-nothing on remote side
+            refspecs = [get_branch_refspec(job.repo_cloned, branch) for branch in job.branches] + [get_tag_refspec(tag) for tag in job.tags]
+            job.repo_cloned.remote(GIT_REMOTE_TO).push(refspecs, atomic=args.atomic_push, progress=progress).raise_if_error()
+    if progress is not None:
+        metrics.add('pushed_bytes', progress.written_bytes, repo_key)
+
+
+def repo_sync_done(args, job: RepoJob, sync_state: SyncState = None):
+    if sync_state is not None and not args.dry_run:
+        sync_state.update(job.repo, job.last_activity)
+
+
+def repos_sync_pipeline(args, pairs: list, metrics: Metrics = None) -> list:
+    """
+    Repositories process sync as a pipeline of stages (metadata, fetch, push) having their own workers, so that a repository is pushed
+    while next ones are fetched and scanned. Repositories between fetch and push end are limited to 'jobs' git working directories.
+    Repositories of all pairs go through the same pipeline, workers being given by process options 'args'.
+
+    Returns:
+        list: Results (repositories updated, branches scanned, branches updated) of repositories by pair, in pairs and repositories order
+    """
+    git_dirs = Queue()
+    for worker in range(args.jobs):
+        git_dirs.put(get_worker_repo_git_directory(worker) if args.jobs > 1 else TMP_REPO_GIT_DIRECTORY)
+
+    jobs = [RepoJob(repo, pair) for pair in pairs for repo in pair.repos]
+    run_pipeline(jobs, [
+        Stage('metadata', profiled('metadata', lambda job: repo_sync(job.pair.args, job.pair.git_from, job.pair.git_to, job, job.pair.sync_state,
+                                                                     job.pair.scans.get(job.repo), job.pair.server_imports)), args.metadata_jobs),
+        Stage('fetch', profiled('clone', lambda job: repo_fetch(job.pair.args, job.pair.git_to, job, git_dirs, metrics)), args.fetch_jobs),
+        Stage('push', profiled('push', lambda job: repo_push(job.pair.args, job.pair.git_to, job, git_dirs, job.pair.sync_state, metrics)), args.push_jobs,
+              cancel=lambda job: git_dirs.put(job.git_dir))
+    ], args.queue_size)
+    return [[job.result for job in jobs if job.pair is pair] for pair in pairs]
+
+
+def create_pairs(pairs_args: list, http_adapter, metrics: Metrics = None) -> list:
+    """
+    Synchronization pairs, sharing what can be: platforms clients of same host and credentials (connections, memoized requests, repositories
+    index), server-side imports of same "to" client (imports concurrency) and state of same file (saved as a whole)
+    """
+    clients = {}
+    imports = {}
+    sync_states = {}
+    pairs = []
+    for args in pairs_args:
+        git_from = get_shared_client(clients, args, args.from_url, args.from_type, args.from_login, args.from_password, args.from_disable_ssl_verify,
+                                     args.from_proxy, http_adapter)
+        git_to = get_shared_client(clients, args, args.to_url, args.to_type, args.to_login, args.to_password, args.to_disable_ssl_verify, args.to_proxy,
+                                   http_adapter)
+        shared_git_to = git_to
+        if args.refs_discovery == 'git':
+            git_from = LsRemoteGitClient(git_from, not args.from_disable_ssl_verify, args.from_proxy)
+            git_to = LsRemoteGitClient(git_to, not args.to_disable_ssl_verify, args.to_proxy)
+        if metrics is not None:
+            git_from, git_to = get_measured_clients(args, git_from, git_to, metrics)
+        server_imports = None
+        if args.server_import:
+            # Imports of wrapped client (measured), shared by pairs of same "to" client
+            if id(shared_git_to) not in imports:
+                imports[id(shared_git_to)] = ServerImports(git_to, args.server_import_max_concurrency)
+            server_imports = imports[id(shared_git_to)]
+        sync_state = None
+        if args.state_file:
+            # Different platforms/organizations/branches filters have their own states
+            scope = '{} {} -> {} {} [{}] [{}]'.format(args.from_url, args.from_org, args.to_url, args.to_org, args.branches_include, args.branches_exclude)
+            if args.state_file in sync_states:
+                sync_state = sync_states[args.state_file].with_scope(scope)
+            else:
+                sync_state = sync_states[args.state_file] = SyncState(args.state_file, scope)
+        pairs.append(SyncPair(args, git_from, git_to, sync_state=sync_state, server_imports=server_imports))
+    return pairs
+
+
+def get_measured_clients(args, git_from: GitClient, git_to: GitClient, metrics: Metrics) -> tuple[MeasuredGitClient, MeasuredGitClient]:
+    # Repositories metrics of pair, see get_repo_key()
+    def repo_key(repo: str) -> str:
+        return get_repo_key(args.from_org, repo, args.to_org)
+    return MeasuredGitClient(git_from, metrics, 'from', repo_key), MeasuredGitClient(git_to, metrics, 'to', repo_key)
+
+
+def get_shared_client(clients: dict, args, url: str, type: str, login: str, password: str, disable_ssl_verify: bool, proxy: str, http_adapter) -> GitClient:
+    key = (url, type, login, password, disable_ssl_verify, proxy)
+    if key not in clients:
+        clients[key] = GitClientFactory.create_client(url, type, login, password, not disable_ssl_verify, proxy, args.api_cache_ttl, args.api_cache_size)
+        clients[key].mount_http_adapter(http_adapter)
+    return clients[key]
+
+
+def print_pairs_args(pairs_args: list):
+    for index, pair_args in enumerate(pairs_args):
+        if len(pairs_args) > 1:
+            logger.info('\nSynchronization pair %d/%d:', index + 1, len(pairs_args))
+        input_parser.print_args(pair_args)
+
+
+def index_pairs(pairs: list):
     # Loop on repositories to update depending includes/excludes
-    for repo in input_parser.reduce(git_from.get_repos(args.from_org), args.repos_include, args.repos_exclude):
-        logger.info('Repository: %s', repo)
-        total_repos_scanned += 1
-        clone_url_from = git_from.get_repo_clone_url(args.from_org, repo)
-
-        # New repo to create and mirror
-        if not git_to.has_repo(args.to_org, repo):
-            logger.info('  Repository does not exist on "to" plaform, create as mirror...')
-            total_repos_updated += 1
-            description = git_from.get_repo_description(args.from_org, repo)
-            repo_mirror(True, args.dry_run, clone_url_from, args.from_login, args.from_password, args.from_proxy, args.from_disable_ssl_verify,
-                        git_to, args.to_proxy, args.to_disable_ssl_verify, args.to_org, repo, args.to_description_prefix + (description if description is not None else ''))
-            continue
+    # Listing metadata (clone URL, description, ...) indexed, not requested again per repository
+    for pair in pairs:
+        pair.repos = input_parser.reduce(pair.git_from.index_repos(pair.args.from_org), pair.args.repos_include, pair.args.repos_exclude)
+        pair.git_to.index_repos(pair.args.to_org)
 
-        # Branches on "from", skip if no commits
-        branches_commits_from = git_from.get_branches(args.from_org, repo)
-        if len(branches_commits_from) == 0:
-            logger.info('  Repository has no branches on "from" platform, skipping.')
-            continue
 
-        # Branches on "to", mirror repo if empty
-        branches_commits_to = git_to.get_branches(args.to_org, repo)
-        if len(branches_commits_to) == 0:
-            logger.info('  Repository has no branches on "to" platform, synchronize as mirror...')
-            total_repos_updated += 1
-            repo_mirror(
-                False,
-                args.dry_run,
-                clone_url_from,
-                args.from_login,
-                args.from_password,
-                args.from_proxy,
-                args.from_disable_ssl_verify,
-                git_to,
-                args.to_proxy,
-                args.to_disable_ssl_verify,
-                args.to_org,
-                repo)
-            continue
+def scan_pairs(pairs: list, concurrency: int):
+    # Metadata of all repositories to synchronize requested concurrently first, unchanged ones (from state) not being scanned
+    for pair in pairs:
+        pair.scans = {repo: RepoScan(pair.git_from, pair.git_to, pair.args.from_org, pair.args.to_org, repo) for repo in pair.repos
+                      if pair.sync_state is None or not pair.sync_state.is_unchanged(repo, get_repo_last_activity(pair.git_from, pair.args.from_org, repo))}
+    logger.info('Scanning %d repositories metadata...', sum(len(pair.scans) for pair in pairs))
+    # Requests run in scan threads: all threads profiled
+    with profile_phase('scan', all_threads=True):
+        scan_repos([scan for pair in pairs for scan in pair.scans.values()], concurrency)
+
+
+def wait_server_imports(pairs: list) -> int:
+    """
+    Returns:
+        int: Number of failed server-side imports
+    """
+    failed_imports = 0
+    for server_imports in {id(pair.server_imports): pair.server_imports for pair in pairs if pair.server_imports is not None}.values():
+        # Imported repositories state updated once import finished, failed ones synchronized again on next run
+        failed = server_imports.wait()
+        logger.info('\nServer-side imports: %d requested, %d failed.', len(server_imports), len(failed))
+        failed_imports += len(failed)
+    return failed_imports
+
 
-        # Sync branches
-        branches_scanned, branches_updated = repo_branches_sync(args, branches_commits_from, branches_commits_to, clone_url_from, repo, git_to)
-        total_branches_scanned += branches_scanned
+def get_totals(pairs: list, results: list, metrics: Metrics = None) -> tuple[int, int, int, int]:
+    """
+    Pairs results summed (logged by pair when several), added to metrics
+
+    Returns:
+        tuple: Repositories updated and scanned, branches updated and scanned
+    """
+    total_repos_updated = total_branches_scanned = total_branches_updated = 0
+    for pair, pair_results in zip(pairs, results):
+        # Repositories updated, branches scanned and updated of pair
+        pair_repos_updated, pair_branches_scanned, pair_branches_updated = [sum(values) for values in zip((0, 0, 0), *pair_results)]
+        if len(pairs) > 1:
+            logger.info('\n%s %s -> %s %s: Repos updated: %d/%d. Branches updated: %d/%d.', pair.args.from_url, pair.args.from_org, pair.args.to_url,
+                        pair.args.to_org, pair_repos_updated, len(pair.repos), pair_branches_updated, pair_branches_scanned)
+        total_repos_updated += pair_repos_updated
+        total_branches_scanned += pair_branches_scanned
+        total_branches_updated += pair_branches_updated
+    total_repos_scanned = sum(len(pair.repos) for pair in pairs)
+    if metrics is not None:
+        for name, value in [('repos_scanned', total_repos_scanned), ('repos_updated', total_repos_updated),
+                            ('branches_scanned', total_branches_scanned), ('branches_updated', total_branches_updated)]:
+            metrics.add(name, value)
+    return total_repos_updated, total_repos_scanned, total_branches_updated, total_branches_scanned
+
+
+def log_rate_limit_report(scheduler: RateLimitScheduler):
+    logger.info('\nAPI requests by host:')
+    for host in scheduler.report():
+        budget = ''
+        if host['limit'] is not None:
+            budget = ', rate limit budget consumed {} (remaining {}/{})'.format(host['consumed'], host['remaining'], host['limit'])
+        logger.info('  %s: %d requests%s, %d throttled, %d retries.', host['host'], host['requests'], budget, host['throttled'], host['retries'])
+
+
+def log_connections_report(adapter: PooledHTTPAdapter):
+    logger.info('\nHTTP connections by host:')
+    for host in adapter.connections_report():
+        logger.info('  %s: %d requests, %d connections opened, %d reused.', host['host'], host['requests'], host['connections'], host['reused'])
+
+
+def log_http_reports(scheduler: RateLimitScheduler, pooled_adapter: PooledHTTPAdapter, http_cache_adapter: CachingHTTPAdapter = None):
+    if http_cache_adapter is not None:
+        logger.info('\nHTTP cache: %d responses not modified, %d cached.', http_cache_adapter.not_modified, len(http_cache_adapter.cache))
+    log_rate_limit_report(scheduler)
+    log_connections_report(pooled_adapter)
+
+
+def write_reports(args, metrics: Metrics):
+    if args.report_file:
+        metrics.write_json(args.report_file)
+        logger.info('\nRun report written to %s.', args.report_file)
+    if args.prometheus_file:
+        metrics.write_prometheus(args.prometheus_file)
+        logger.info('\nPrometheus metrics written to %s.', args.prometheus_file)
+
+
+def write_profiles(directory: str, phases_profiler: profiler.SamplingProfiler):
+    phases_profiler.write(directory)
+    logger.info('\nProfiles written to %s, threads time by phase:', directory)
+    for phase in phases_profiler.summary():
+        logger.info('  %s: %.1fs in git commands, %.1fs waiting network, %.1fs waiting other threads, %.1fs in Python.', phase['phase'], phase['git'],
+                    phase['network'], phase['wait'], phase['python'])
 
-        # Sync tags if no branches updated and needed (nbr tags diff between "from" and "to")
-        tag_updated = repo_tags_sync(args, clone_url_from, git_from, git_to, repo, branches_updated)
 
-        # Items updated calculation
-        if branches_updated > 0 or tag_updated:
-            total_repos_updated += 1
-            total_branches_updated += branches_updated
+def main() -> int:
+    delete_temporary_repo_git_directory()
+    pairs_args = input_parser.parse_pairs()
+    # Process options (workers, HTTP transport, reports) are the same for all pairs
+    args = pairs_args[0]
+    log_init(args.log_level)
+    logger.info('Starting Git Platforms Synchronization...')
+    print_pairs_args(pairs_args)
+
+    # Same connections pools, scheduler (budgets by host) and cache (responses keyed by URL and credentials) for all platforms
+    if args.http2:
+        enable_http2()
+    scheduler = RateLimitScheduler(args.api_max_concurrency, args.api_max_retries)
+    http_adapter = pooled_adapter = ScheduledHTTPAdapter(scheduler, args.http_pool_size, args.http_retries)
+    # Instrumentation (sent requests, not cached responses) only when a report is requested
+    metrics = Metrics() if args.report_file or args.prometheus_file else None
+    if metrics is not None:
+        http_adapter = MetricsHTTPAdapter(metrics, http_adapter)
+    http_cache_adapter = None
+    if args.http_cache_dir:
+        http_cache_adapter = CachingHTTPAdapter(HttpCache(args.http_cache_dir, args.http_cache_size * 1024 * 1024), http_adapter)
+        http_adapter = http_cache_adapter
+    pairs = create_pairs(pairs_args, http_adapter, metrics)
+
+    if args.profile:
+        profiler.start(args.profile_phases.split(','))
+    try:
+        logger.info('\n------ Processing synchronization ------')
+        index_pairs(pairs)
+        if args.scan_concurrency > 0:
+            scan_pairs(pairs, args.scan_concurrency)
+        results = repos_sync_pipeline(args, pairs, metrics)
+        failed_imports = wait_server_imports(pairs)
+        total_repos_updated, total_repos_scanned, total_branches_updated, total_branches_scanned = get_totals(pairs, results, metrics)
+    finally:
+        # Repositories synchronized before a failure are kept
+        for sync_state in {pair.sync_state.path: pair.sync_state for pair in pairs if pair.sync_state is not None}.values():
+            sync_state.save()
+        # Reports and profiles also written on failure (phases until failure, listing and scan included)
+        if metrics is not None:
+            write_reports(args, metrics)
+        if args.profile:
+            write_profiles(args.profile, profiler.stop())
 
     delete_temporary_repo_git_directory()
+    log_http_reports(scheduler, pooled_adapter, http_cache_adapter)
+    if failed_imports > 0:
+        # Other repositories synchronized (and state saved), run failed to be noticed (e.g. scheduled job)
+        logger.error('\nGit Platforms Synchronization finished with %d failed server-side import(s). Repos updated: %d/%d. Branches updated: %d/%d.',
+                     failed_imports, total_repos_updated, total_repos_scanned, total_branches_updated, total_branches_scanned)
+        return 1
     logger.info('\nGit Platforms Synchronization finished sucessfully. Repos updated: {}/{}. Branches updated: {}/{}.'.format(total_repos_updated,
                 total_repos_scanned, total_branches_updated, total_branches_scanned))
     return 0
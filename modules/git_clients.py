@@ -1,7 +1,13 @@
 import re
+import threading
+from urllib.parse import quote, urlsplit, urlunsplit
 from abc import ABC
+from dataclasses import dataclass
+from modules.memo_cache import MemoCache
+from modules.pagination import fetch_all_pages
 try:
     from atlassian import Bitbucket
+    from requests import HTTPError
     BITBUCKET_AVAILABLE = True
 except ImportError:
     BITBUCKET_AVAILABLE = False
@@ -27,6 +33,15 @@ MSG_EMPTY_ORG = 'Organization name cannot be empty.'
 MSG_EMPTY_REPO = 'Repository name cannot be empty.'
 MSG_CREATE_REPO_DESCRIPTION = 'TODO - Provide a description for this repository.'
 
+# Server-side import status (see GitClient.get_import_status()), others meaning in progress
+IMPORT_FINISHED = 'finished'
+IMPORT_FAILED = 'failed'
+
+# Maximum page sizes of platforms listings
+GITEA_MAX_PAGE_SIZE = 50
+GITHUB_MAX_PAGE_SIZE = 100
+GITLAB_MAX_PAGE_SIZE = 100
+
 
 def check_input(param: str, message: str):
     if param is None or len(param) == 0:
@@ -38,8 +53,67 @@ def check_inputs(org: str, repo: str = None):
     check_input(repo, MSG_EMPTY_REPO)
 
 
+def mount_http_adapter(session, adapter):
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+
+def to_iso_date(date) -> str:
+    # Platforms clients return dates as string or datetime
+    if date is None or isinstance(date, str):
+        return date
+    return date.isoformat()
+
+
+@dataclass
+class RepoInfo:
+    # Repository metadata, as provided by platforms organization listing (None when not provided)
+    name: str
+    clone_url: str = None
+    description: str = None
+    default_branch: str = None
+    size: int = None
+    pushed_at: str = None
+
+
 class GitClient(ABC):
 
+    # Platforms objects (organizations, users, repositories) memoization, configured by GitClientFactory
+    memo_cache: MemoCache = None
+
+    def memoize(self, key: tuple, loader):
+        if self.memo_cache is None:
+            self.memo_cache = MemoCache()
+        return self.memo_cache.get(key, loader)
+
+    # Existing repositories (name -> RepoInfo) by organization, see index_repos()
+    repos_index: dict = None
+
+    def index_repos(self, org: str) -> list:
+        # List organization repositories once, has_repo(), get_repo_clone_url() and get_repo_description() being then
+        # answered from this index for listed ones. Not listed ones (not existing or not visible in listing) are still requested.
+        # Organization listed once by client, even if synchronized by several pairs (see --config).
+        if self.repos_index is None:
+            self.repos_index = {}
+        if org in self.repos_index:
+            return list(self.repos_index[org])
+        repos_info = self.get_repos_info(org)
+        self.repos_index[org] = {repo_info.name: repo_info for repo_info in repos_info}
+        return [repo_info.name for repo_info in repos_info]
+
+    def is_repo_indexed(self, org: str, repo: str) -> bool:
+        return self.repos_index is not None and repo in self.repos_index.get(org, {})
+
+    def get_indexed_repo_info(self, org: str, repo: str) -> RepoInfo:
+        if self.repos_index is None:
+            return None
+        return self.repos_index.get(org, {}).get(repo)
+
+    def add_repo_to_index(self, org: str, repo: str):
+        # Metadata of created repository not known, requested if needed
+        if self.repos_index is not None and org in self.repos_index:
+            self.repos_index[org].setdefault(repo, None)
+
     def get_login_or_token(self) -> str:
         # Should return the login or token of the platform
         pass
@@ -52,8 +126,19 @@ class GitClient(ABC):
         # Should return the base URL of the platform
         pass
 
+    def mount_http_adapter(self, adapter):
+        # Should mount the 'requests' transport adapter on the platform client HTTP session(s)
+        pass
+
     def get_repos(self, org: str) -> list:
-        # Should return a list of repositories names
+        return [repo_info.name for repo_info in self.get_repos_info(org)]
+
+    def get_repos_info(self, org: str) -> list:
+        # Should return a list of RepoInfo of the organization repositories, from listing only
+        pass
+
+    def get_repo_info(self, org: str, repo: str) -> RepoInfo:
+        # Should return the RepoInfo of the repository
         pass
 
     def has_repo(self, org: str, repo: str) -> bool:
@@ -69,17 +154,39 @@ class GitClient(ABC):
         pass
 
     def get_repo_description(self, org: str, repo: str) -> str:
-        # Should return the description of the repository
-        pass
+        check_inputs(org, repo)
+        return self._get_indexed_or_requested_repo_info(org, repo).description
 
     def get_repo_clone_url(self, org: str, repo: str) -> str:
-        # Should return the clone URL of the repository
-        pass
+        check_inputs(org, repo)
+        clone_url = self._get_indexed_or_requested_repo_info(org, repo).clone_url
+        if clone_url is None:
+            raise ValueError(f'Cannot found http clone URL of repository "{org}/{repo}"')
+        return clone_url
 
     def create_repo(self, org: str, repo: str, description: str = MSG_CREATE_REPO_DESCRIPTION):
         # Should create a repository in the platform
         pass
 
+    def is_import_supported(self) -> bool:
+        # True if the platform can import repositories itself, see import_repo()
+        return False
+
+    def import_repo(self, org: str, repo: str, clone_url: str, login_or_token: str = None, password: str = None,
+                    description: str = MSG_CREATE_REPO_DESCRIPTION):
+        # Should create a repository in the platform, imported by the platform itself from 'clone_url' (server-side, see is_import_supported())
+        pass
+
+    def get_import_status(self, org: str, repo: str) -> str:
+        # Should return IMPORT_FINISHED, IMPORT_FAILED or another status (in progress) of repository import
+        return IMPORT_FINISHED
+
+    def _get_indexed_or_requested_repo_info(self, org: str, repo: str) -> RepoInfo:
+        repo_info = self.get_indexed_repo_info(org, repo)
+        if repo_info is None:
+            repo_info = self.get_repo_info(org, repo)
+        return repo_info
+
 
 class BitbucketClient(GitClient):
 
@@ -98,27 +205,31 @@ class BitbucketClient(GitClient):
     def get_url(self) -> str:
         return self.bitbucket.url
 
-    def get_repos(self, org: str) -> list:
+    def mount_http_adapter(self, adapter):
+        mount_http_adapter(self.bitbucket._session, adapter)
+
+    def get_repos_info(self, org: str) -> list:
         check_input(org, MSG_EMPTY_ORG)
         repos = []
         for repo in self.bitbucket.repo_all_list(org):
-            repos.append(repo['slug'])
+            repos.append(self._to_repo_info(repo))
         return repos
 
-    def has_repo(self, org: str, repo: str) -> bool:
-        check_inputs(org, repo)
-        return self.bitbucket.repo_exists(org, repo)
-
-    def get_repo_description(self, org: str, repo: str) -> str:
+    def get_repo_info(self, org: str, repo: str) -> RepoInfo:
         check_inputs(org, repo)
-        return self.bitbucket.get_repo(org, repo)['description']
+        return self._to_repo_info(self._get_repo(org, repo))
 
-    def get_repo_clone_url(self, org: str, repo: str) -> str:
+    def has_repo(self, org: str, repo: str) -> bool:
         check_inputs(org, repo)
-        for link in self.bitbucket.get_repo(org, repo)['links']['clone']:
-            if 'http' == link['name']:
-                return link['href']
-        raise ValueError('Cannot not found http clone link')
+        if self.is_repo_indexed(org, repo):
+            return True
+        # Same as 'self.bitbucket.repo_exists(org, repo)', but memoized
+        try:
+            return self._get_repo(org, repo) is not None
+        except HTTPError as e:
+            if e.response.status_code in (401, 404):
+                return False
+            raise e
 
     def get_branches(self, org: str, repo: str) -> dict:
         check_inputs(org, repo)
@@ -138,6 +249,19 @@ class BitbucketClient(GitClient):
         check_inputs(org, repo)
         self.bitbucket.create_repo(org, repo)
         self.bitbucket.update_repo(org, repo, description=description)
+        self.add_repo_to_index(org, repo)
+
+    def _get_repo(self, org: str, repo: str) -> dict:
+        return self.memoize(('repo', org, repo), lambda: self.bitbucket.get_repo(org, repo))
+
+    @staticmethod
+    def _to_repo_info(repo: dict) -> RepoInfo:
+        # Default branch, size and last push not provided by repositories API
+        clone_url = None
+        for link in repo.get('links', {}).get('clone', []):
+            if 'http' == link['name']:
+                clone_url = link['href']
+        return RepoInfo(repo['slug'], clone_url, repo.get('description'))
 
 
 class GiteaClient(GitClient):
@@ -157,34 +281,34 @@ class GiteaClient(GitClient):
     def get_url(self) -> str:
         return self.gitea.url
 
-    def get_repos(self, org: str) -> list:
+    def mount_http_adapter(self, adapter):
+        mount_http_adapter(self.gitea.requests, adapter)
+
+    def get_repos_info(self, org: str) -> list:
         check_input(org, MSG_EMPTY_ORG)
         repos = []
-        for repo in User.request(self.gitea, org).get_repositories():
-            repos.append(repo.name)
+        for result in self._get_paginated('/users/%s/repos' % org):
+            repos.append(self._to_repo_info(Repository.parse_response(self.gitea, result)))
         return repos
 
+    def get_repo_info(self, org: str, repo: str) -> RepoInfo:
+        check_inputs(org, repo)
+        return self._to_repo_info(self._get_repo(org, repo))
+
     def has_repo(self, org: str, repo: str) -> bool:
         check_inputs(org, repo)
+        if self.is_repo_indexed(org, repo):
+            return True
         try:
-            return Repository.request(self.gitea, org, repo) is not None
+            return self._get_repo(org, repo) is not None
         except NotFoundException:
             return False
 
-    def get_repo_description(self, org: str, repo: str) -> str:
-        check_inputs(org, repo)
-        return Repository.request(self.gitea, org, repo).description
-
-    def get_repo_clone_url(self, org: str, repo: str) -> str:
-        check_inputs(org, repo)
-        return Repository.request(self.gitea, org, repo).clone_url
-
     def get_branches(self, org: str, repo: str) -> dict:
         check_inputs(org, repo)
         branches_commits = {}
         # 'Repository.request(self.gitea, org, repo).get_branches()' currently does not support pagination
-        results = self.gitea.requests_get_paginated(
-            '/repos/%s/%s/branches' % (org, repo))
+        results = self._get_paginated('/repos/%s/%s/branches' % (org, repo))
         for result in results:
             branches_commits[result['name']] = result['commit']['id']
         return branches_commits
@@ -192,20 +316,60 @@ class GiteaClient(GitClient):
     def get_tags(self, org: str, repo: str) -> dict:
         check_inputs(org, repo)
         tags_commits = {}
-        results = self.gitea.requests_get_paginated(
-            '/repos/%s/%s/tags' % (org, repo))
+        results = self._get_paginated('/repos/%s/%s/tags' % (org, repo))
         for result in results:
-            tags_commits[result['name']] = result['id']
+            # 'id' is the tag object for annotated tags, use commit like other platforms
+            tags_commits[result['name']] = result['commit']['sha']
         return tags_commits
 
     def create_repo(self, org: str, repo: str, description: str = MSG_CREATE_REPO_DESCRIPTION):
         check_inputs(org, repo)
         try:
-            Organization.request(self.gitea, org).create_repo(
-                repoName=repo, description=description, autoInit=False)
+            organization = self.memoize(('org', org), lambda: Organization.request(self.gitea, org))
         except NotFoundException:
-            User.request(self.gitea, org).create_repo(
+            self._get_user(org).create_repo(
                 repoName=repo, description=description, autoInit=False)
+            self.add_repo_to_index(org, repo)
+            return
+        organization.create_repo(repoName=repo, description=description, autoInit=False)
+        self.add_repo_to_index(org, repo)
+
+    def is_import_supported(self) -> bool:
+        return True
+
+    def import_repo(self, org: str, repo: str, clone_url: str, login_or_token: str = None, password: str = None,
+                    description: str = MSG_CREATE_REPO_DESCRIPTION):
+        # Migration done when answered (import status always finished)
+        check_inputs(org, repo)
+        Repository.migrate_repo(self.gitea, 'git', clone_url, repo, description, auth_username=login_or_token, auth_password=password, repo_owner=org)
+        self.add_repo_to_index(org, repo)
+
+    def _get_user(self, org: str):
+        return self.memoize(('user', org), lambda: User.request(self.gitea, org))
+
+    def _get_paginated(self, endpoint: str) -> list:
+        # Same as 'self.gitea.requests_get_paginated(endpoint)', but with maximum page size and concurrent pages (total from 'X-Total-Count')
+        def fetch_page(page: int) -> tuple:
+            response = self.gitea.requests.get(self.gitea.url + '/api/v1' + endpoint, headers=self.gitea.headers,
+                                               params={'page': page, 'limit': GITEA_MAX_PAGE_SIZE})
+            if response.status_code == 404:
+                raise NotFoundException(f'Received status code: {response.status_code} ({response.url})')
+            response.raise_for_status()
+            return self.gitea.parse_result(response) or [], response.headers
+        return fetch_all_pages(fetch_page, GITEA_MAX_PAGE_SIZE)
+
+    def _get_repo(self, org: str, repo: str):
+        return self.memoize(('repo', org, repo), lambda: Repository.request(self.gitea, org, repo))
+
+    @staticmethod
+    def _to_repo_info(repo) -> RepoInfo:
+        # Size in KB, last push not provided (last update used)
+        return RepoInfo(repo.name, repo.clone_url, repo.description, repo.default_branch, repo.size, to_iso_date(repo.updated_at))
+
+
+def get_thread_attribute(name: str) -> property:
+    # Attribute stored in 'pending' (threading.local) of instance
+    return property(lambda self: getattr(self.pending, name), lambda self, value: setattr(self.pending, name, value))
 
 
 class GitHubClient(GitClient):
@@ -221,7 +385,9 @@ class GitHubClient(GitClient):
                 auth = Auth.Token(login_or_token)
             elif password is not None:
                 auth = Auth.Login(login_or_token, password)
-        self.github = Github(base_url=url, auth=auth, verify=ssl_verify)
+        self.github = Github(base_url=url, auth=auth, verify=ssl_verify, per_page=GITHUB_MAX_PAGE_SIZE)
+        # Same configuration, objects built without being requested
+        self.lazy_github = self.github.withLazy(True)
         self.login_or_token = login_or_token
         self.password = password
 
@@ -234,56 +400,90 @@ class GitHubClient(GitClient):
     def get_url(self) -> str:
         return self.url
 
-    def get_repos(self, org: str) -> list:
+    def mount_http_adapter(self, adapter):
+        # PyGithub creates its session per connection (lazily, at first request), its connection class is extended to mount the adapter.
+        # PyGithub connection keeps request parameters until response is read: shared by threads, they are kept by thread.
+        for requester in (self.github.requester, self.lazy_github.requester):
+            connection_class = requester._Requester__connectionClass
+
+            class AdapterMountedConnectionClass(connection_class):
+                def __init__(self, *args, **kwargs):
+                    self.pending = threading.local()
+                    super().__init__(*args, **kwargs)
+                    mount_http_adapter(self.session, adapter)
+
+                verb = get_thread_attribute('verb')
+                url = get_thread_attribute('url')
+                input = get_thread_attribute('input')
+                headers = get_thread_attribute('headers')
+                stream = get_thread_attribute('stream')
+            requester._Requester__connectionClass = AdapterMountedConnectionClass
+
+    def get_repos_info(self, org: str) -> list:
         check_input(org, MSG_EMPTY_ORG)
         repos = []
-        for repo in self.github.get_user(org).get_repos():
-            repos.append(repo.name)
+        for repo in self._get_user(org).get_repos():
+            repos.append(self._to_repo_info(repo))
         return repos
 
+    def get_repo_info(self, org: str, repo: str) -> RepoInfo:
+        check_inputs(org, repo)
+        return self._to_repo_info(self._get_repo(org, repo))
+
     def has_repo(self, org: str, repo: str) -> bool:
         check_inputs(org, repo)
+        if self.is_repo_indexed(org, repo):
+            return True
         try:
-            return self.github.get_user(org).get_repo(repo) is not None
+            return self._get_repo(org, repo) is not None
         except GithubException as e:
             if e.status == 404:
                 return False
             raise e
 
-    def get_repo_description(self, org: str, repo: str) -> str:
-        check_inputs(org, repo)
-        return self.github.get_user(org).get_repo(repo).description
-
-    def get_repo_clone_url(self, org: str, repo: str) -> str:
-        check_inputs(org, repo)
-        return self.github.get_user(org).get_repo(repo).clone_url
-
     def get_branches(self, org: str, repo: str) -> dict:
         check_inputs(org, repo)
         branches_commits = {}
-        for branch in self.github.get_user(org).get_repo(repo).get_branches():
+        for branch in self._get_lazy_repo(org, repo).get_branches():
             branches_commits[branch.name] = branch.commit.sha
         return branches_commits
 
     def get_tags(self, org: str, repo: str) -> dict:
         check_inputs(org, repo)
         tags_commits = {}
-        for tag in self.github.get_user(org).get_repo(repo).get_tags():
+        for tag in self._get_lazy_repo(org, repo).get_tags():
             tags_commits[tag.name] = tag.commit.sha
         return tags_commits
 
     def create_repo(self, org: str, repo: str, description: str = MSG_CREATE_REPO_DESCRIPTION):
         check_inputs(org, repo)
         try:
-            self.github.get_organization(org).create_repo(
-                name=repo, description=description, auto_init=False)
+            organization = self.memoize(('org', org), lambda: self.github.get_organization(org))
         except GithubException as e:
             if e.status == 404:
                 # Use github.get_user().create_repo() for that case (get_user(xxx) does not have create_repo())
                 self.github.get_user().create_repo(
                     name=repo, description=description, auto_init=False)
-            else:
-                raise e
+                self.add_repo_to_index(org, repo)
+                return
+            raise e
+        organization.create_repo(name=repo, description=description, auto_init=False)
+        self.add_repo_to_index(org, repo)
+
+    def _get_user(self, org: str):
+        return self.memoize(('user', org), lambda: self.github.get_user(org))
+
+    def _get_repo(self, org: str, repo: str):
+        return self.memoize(('repo', org, repo), lambda: self._get_user(org).get_repo(repo))
+
+    def _get_lazy_repo(self, org: str, repo: str):
+        # Repository not requested, only its sub-resources (branches, tags) are
+        return self.memoize(('lazy-repo', org, repo), lambda: self.lazy_github.get_repo('{}/{}'.format(org, repo)))
+
+    @staticmethod
+    def _to_repo_info(repo) -> RepoInfo:
+        # Size in KB
+        return RepoInfo(repo.name, repo.clone_url, repo.description, repo.default_branch, repo.size, to_iso_date(repo.pushed_at))
 
 
 class GitLabClient(GitClient):
@@ -324,52 +524,99 @@ class GitLabClient(GitClient):
     def get_url(self) -> str:
         return self.url
 
-    def get_repos(self, org: str) -> list:
+    def mount_http_adapter(self, adapter):
+        mount_http_adapter(self.gitlab.session, adapter)
+
+    def get_repos_info(self, org: str) -> list:
         check_input(org, MSG_EMPTY_ORG)
         repos = []
-        for repo in self.gitlab.users.list(username=org)[0].projects.list(all=True, include_subgroups=True):
-            repos.append(repo.name)
+        for attributes in self._get_paginated('/users/%s/projects' % self._get_user(org).id, {'include_subgroups': True}):
+            repos.append(self._to_repo_info(attributes))
         return repos
 
+    def get_repo_info(self, org: str, repo: str) -> RepoInfo:
+        check_inputs(org, repo)
+        return self._to_repo_info(self._get_project(org, repo).attributes)
+
     def has_repo(self, org: str, repo: str) -> bool:
         check_inputs(org, repo)
+        if self.is_repo_indexed(org, repo):
+            return True
         try:
-            return self.gitlab.projects.get(str(org + '/' + repo)) is not None
+            return self._get_project(org, repo) is not None
         except GitlabError as e:
             if e.response_code == 404:
                 return False
             raise e
 
-    def get_repo_description(self, org: str, repo: str) -> str:
-        check_inputs(org, repo)
-        return self.gitlab.projects.get(str(org + '/' + repo)).description
-
-    def get_repo_clone_url(self, org: str, repo: str) -> str:
-        check_inputs(org, repo)
-        return self.gitlab.projects.get(str(org + '/' + repo)).http_url_to_repo
-
     def get_branches(self, org: str, repo: str) -> dict:
         check_inputs(org, repo)
         branches_commits = {}
-        for branch in self.gitlab.projects.get(str(org + '/' + repo)).branches.list():
-            branches_commits[branch.name] = branch.commit['id']
+        for branch in self._get_paginated('/projects/%s/repository/branches' % self._get_project(org, repo).id):
+            branches_commits[branch['name']] = branch['commit']['id']
         return branches_commits
 
     def get_tags(self, org: str, repo: str) -> dict:
         check_inputs(org, repo)
         tags_commits = {}
-        for tag in self.gitlab.projects.get(str(org + '/' + repo)).tags.list():
-            tags_commits[tag.name] = tag.commit['id']
+        for tag in self._get_paginated('/projects/%s/repository/tags' % self._get_project(org, repo).id):
+            tags_commits[tag['name']] = tag['commit']['id']
         return tags_commits
 
     def create_repo(self, org: str, repo: str, description: str = MSG_CREATE_REPO_DESCRIPTION):
         check_inputs(org, repo)
         self.gitlab.projects.create({'name': repo, 'description': description, 'visibility': 'private'})
+        self.add_repo_to_index(org, repo)
+
+    def is_import_supported(self) -> bool:
+        return True
+
+    def import_repo(self, org: str, repo: str, clone_url: str, login_or_token: str = None, password: str = None,
+                    description: str = MSG_CREATE_REPO_DESCRIPTION):
+        # Import scheduled by GitLab, credentials of source repository being provided in import URL
+        check_inputs(org, repo)
+        if login_or_token or password:
+            url = urlsplit(clone_url)
+            credentials = quote(login_or_token or '', safe='') + ':' + quote(password or '', safe='')
+            clone_url = urlunsplit(url._replace(netloc=credentials + '@' + url.netloc.rsplit('@', 1)[-1]))
+        self.gitlab.projects.create({'name': repo, 'description': description, 'visibility': 'private', 'import_url': clone_url})
+        self.add_repo_to_index(org, repo)
+
+    def get_import_status(self, org: str, repo: str) -> str:
+        # Not memoized, status changing during import
+        return self.gitlab.http_get('/projects/{}/import'.format(quote(org + '/' + repo, safe=''))).get('import_status')
+
+    def _get_user(self, org: str):
+        return self.memoize(('user', org), lambda: self.gitlab.users.list(username=org)[0])
+
+    def _get_project(self, org: str, repo: str):
+        return self.memoize(('repo', org, repo), lambda: self.gitlab.projects.get(str(org + '/' + repo)))
+
+    def _get_paginated(self, path: str, params: dict = None) -> list:
+        # Maximum page size and concurrent pages (total from 'X-Total-Pages' or 'Link' headers)
+        def fetch_page(page: int) -> tuple:
+            response = self.gitlab.http_request('get', path, query_data=dict(params or {}, page=page, per_page=GITLAB_MAX_PAGE_SIZE))
+            return response.json(), response.headers
+        return fetch_all_pages(fetch_page, GITLAB_MAX_PAGE_SIZE)
+
+    @staticmethod
+    def _to_repo_info(attributes: dict) -> RepoInfo:
+        # Size only provided with statistics (reporter access). Last push not provided, and last activity not usable instead (updated at most
+        # hourly, a push just after a synchronization would be skipped): unknown, always synchronized (see SyncState)
+        return RepoInfo(attributes['name'], attributes.get('http_url_to_repo'), attributes.get('description'), attributes.get('default_branch'),
+                        attributes.get('statistics', {}).get('repository_size'))
 
 
 class GitClientFactory:
     @staticmethod
-    def create_client(url, type: str, login_or_token: str = None, password: str = None, ssl_verify: bool = True, proxy: str = None) -> GitClient:
+    def create_client(url, type: str, login_or_token: str = None, password: str = None, ssl_verify: bool = True, proxy: str = None,
+                      cache_ttl: float = None, cache_size: int = None) -> GitClient:
+        client = GitClientFactory.create_platform_client(url, type, login_or_token, password, ssl_verify, proxy)
+        client.memo_cache = MemoCache(cache_ttl, cache_size)
+        return client
+
+    @staticmethod
+    def create_platform_client(url, type: str, login_or_token: str = None, password: str = None, ssl_verify: bool = True, proxy: str = None) -> GitClient:
         if BITBUCKET_AVAILABLE and ('bitbucket'.casefold() == type.casefold() or 'bitbucket' in url):
             return BitbucketClient(url, login_or_token, password, ssl_verify, proxy)
         elif GITEA_AVAILABLE and ('gitea'.casefold() == type.casefold() or 'gitea' in url):
@@ -0,0 +1,65 @@
+from git import Git
+from modules.git_clients import GitClient, check_inputs
+from modules.utils import get_git_credentials_env
+
+REFS_HEADS_PREFIX = 'refs/heads/'
+REFS_TAGS_PREFIX = 'refs/tags/'
+PEELED_SUFFIX = '^{}'
+
+
+def parse_ls_remote(output: str) -> tuple[dict, dict]:
+    """
+    Parse 'git ls-remote' output
+
+    Returns:
+        dict: Branch names as keys and commit hashes as values
+        dict: Tag names as keys and commit hashes as values (peeled commit for annotated tags, like platforms APIs)
+    """
+    branches_commits = {}
+    tags_commits = {}
+    peeled_tags_commits = {}
+    for line in output.splitlines():
+        commit, ref = line.split('\t', 1)
+        if ref.startswith(REFS_HEADS_PREFIX):
+            branches_commits[ref[len(REFS_HEADS_PREFIX):]] = commit
+        elif ref.startswith(REFS_TAGS_PREFIX) and ref.endswith(PEELED_SUFFIX):
+            peeled_tags_commits[ref[len(REFS_TAGS_PREFIX):-len(PEELED_SUFFIX)]] = commit
+        elif ref.startswith(REFS_TAGS_PREFIX):
+            tags_commits[ref[len(REFS_TAGS_PREFIX):]] = commit
+    tags_commits.update(peeled_tags_commits)
+    return branches_commits, tags_commits
+
+
+class LsRemoteGitClient:
+    """
+    Platform client discovering repositories branches and tags with a single 'git ls-remote' (protocol v2) per repository,
+    instead of platform API pagination. Other methods are delegated to the platform client.
+    """
+
+    def __init__(self, client: GitClient, ssl_verify: bool = True, proxy: str = None):
+        self.client = client
+        self.ssl_verify = ssl_verify
+        self.proxy = proxy
+
+    def __getattr__(self, name: str):
+        return getattr(self.client, name)
+
+    def get_branches(self, org: str, repo: str) -> dict:
+        check_inputs(org, repo)
+        return self._get_refs(org, repo)[0]
+
+    def get_tags(self, org: str, repo: str) -> dict:
+        check_inputs(org, repo)
+        return self._get_refs(org, repo)[1]
+
+    def _get_refs(self, org: str, repo: str) -> tuple[dict, dict]:
+        # Branches and tags listed together, memoized for the second call
+        return self.client.memoize(('refs', org, repo), lambda: parse_ls_remote(self.ls_remote(self.client.get_repo_clone_url(org, repo))))
+
+    def ls_remote(self, url: str) -> str:
+        # Only branches and tags advertised by server ('ref-prefix'), not pull/merge requests refs
+        command = ['git', '-c', 'protocol.version=2', '-c', 'http.sslVerify={}'.format(str(self.ssl_verify).lower())]
+        if self.proxy:
+            command += ['-c', 'http.proxy={}'.format(self.proxy)]
+        command += ['ls-remote', '--heads', '--tags', url]
+        return Git().execute(command, env=get_git_credentials_env(self.client.get_login_or_token(), self.client.get_password(), url))
@@ -0,0 +1,164 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from requests import PreparedRequest, Response
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+DEFAULT_MAX_SIZE = 100 * 1024 * 1024
+META_SUFFIX = '.json'
+BODY_SUFFIX = '.body'
+# Stored body is already decoded, headers describing the transferred one are not kept
+HEADERS_NOT_STORED = ('content-encoding', 'content-length', 'transfer-encoding', 'connection', 'set-cookie')
+# Headers carrying credentials (GitLab 'PRIVATE-TOKEN', ...), in addition to any header named after a token
+CREDENTIAL_HEADERS = ('authorization', 'proxy-authorization', 'cookie', 'private-token', 'job-token')
+
+
+class HttpCache:
+    """
+    On-disk cache of HTTP responses having validators (ETag, Last-Modified), kept between runs.
+
+    Total size of stored bodies is bounded by 'max_size' bytes, least recently used entries being evicted.
+    """
+
+    def __init__(self, directory: str, max_size: int = DEFAULT_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        # Recency of previous runs entries from files modification time
+        bodies = [f for f in os.listdir(directory) if f.endswith(BODY_SUFFIX)]
+        for body in sorted(bodies, key=lambda f: os.path.getmtime(os.path.join(directory, f))):
+            key = body[:-len(BODY_SUFFIX)]
+            if os.path.exists(self._path(key, META_SUFFIX)):
+                self._entries[key] = os.path.getsize(os.path.join(directory, body))
+                self._size += self._entries[key]
+        with self._lock:
+            self._evict()
+
+    @staticmethod
+    def key(request: PreparedRequest) -> str:
+        # Credentials are part of the key (responses depend on them), only hashed
+        credentials = sorted('{}: {}'.format(name.lower(), value) for name, value in request.headers.items()
+                             if name.lower() in CREDENTIAL_HEADERS or 'token' in name.lower())
+        return hashlib.sha256('{} {} {}'.format(request.method, request.url, '\n'.join(credentials)).encode()).hexdigest()
+
+    def get(self, key: str) -> tuple[dict, bytes]:
+        with self._lock:
+            if key not in self._entries:
+                return None, None
+            try:
+                with open(self._path(key, META_SUFFIX), encoding='utf-8') as file:
+                    meta = json.load(file)
+                with open(self._path(key, BODY_SUFFIX), 'rb') as file:
+                    body = file.read()
+            except (OSError, ValueError):
+                self._remove(key)
+                return None, None
+            self._entries.move_to_end(key)
+            os.utime(self._path(key, BODY_SUFFIX))
+            return meta, body
+
+    def put(self, key: str, meta: dict, body: bytes):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            # Bigger than cache never stored, previous response no more served
+            if len(body) > self.max_size:
+                return
+            # Written aside then renamed, concurrent runs never read a partial entry
+            for suffix, data in ((BODY_SUFFIX, body), (META_SUFFIX, json.dumps(meta).encode('utf-8'))):
+                tmp_path = self._path(key, suffix) + '.tmp'
+                with open(tmp_path, 'wb') as file:
+                    file.write(data)
+                os.replace(tmp_path, self._path(key, suffix))
+            self._entries[key] = len(body)
+            self._size += len(body)
+            self._evict()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def size(self) -> int:
+        with self._lock:
+            return self._size
+
+    def _evict(self):
+        while self._size > self.max_size and len(self._entries) > 0:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str):
+        self._size -= self._entries.pop(key, 0)
+        for suffix in (META_SUFFIX, BODY_SUFFIX):
+            if os.path.exists(self._path(key, suffix)):
+                os.remove(self._path(key, suffix))
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, key + suffix)
+
+
+class CachingHTTPAdapter(HTTPAdapter):
+    """
+    Transport adapter sending GET requests conditionally (If-None-Match, If-Modified-Since) when a response is cached,
+    a '304 Not Modified' being answered with the cached response. Mountable on any 'requests' session.
+
+    Requests are sent by 'transport' adapter if provided (adapters chaining), by this one otherwise.
+    """
+
+    def __init__(self, cache: HttpCache, transport: HTTPAdapter = None, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+        self.transport = transport
+        self.not_modified = 0
+
+    def send(self, request: PreparedRequest, stream: bool = False, **kwargs) -> Response:
+        if request.method != 'GET' or stream:
+            return self._send(request, stream=stream, **kwargs)
+
+        key = HttpCache.key(request)
+        meta, body = self.cache.get(key)
+        if meta is not None:
+            if meta.get('etag'):
+                request.headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                request.headers['If-Modified-Since'] = meta['last_modified']
+
+        response = self._send(request, stream=stream, **kwargs)
+        if response.status_code == 304 and meta is not None:
+            self.not_modified += 1
+            return self.build_cached_response(response, meta, body)
+        if response.status_code == 200 and 'no-store' not in response.headers.get('Cache-Control', ''):
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if etag or last_modified:
+                headers = {k: v for k, v in response.headers.items() if k.lower() not in HEADERS_NOT_STORED}
+                self.cache.put(key, {'url': request.url, 'etag': etag, 'last_modified': last_modified, 'headers': headers}, response.content)
+        return response
+
+    def close(self):
+        super().close()
+        if self.transport is not None:
+            self.transport.close()
+
+    def _send(self, request: PreparedRequest, **kwargs) -> Response:
+        if self.transport is not None:
+            return self.transport.send(request, **kwargs)
+        return super().send(request, **kwargs)
+
+    @staticmethod
+    def build_cached_response(not_modified: Response, meta: dict, body: bytes) -> Response:
+        # Headers received with '304 Not Modified' (rate limit, date, ...) updating stored ones
+        headers = CaseInsensitiveDict(meta['headers'])
+        headers.update({k: v for k, v in not_modified.headers.items() if k.lower() not in HEADERS_NOT_STORED})
+        not_modified.status_code = 200
+        not_modified.reason = 'OK'
+        not_modified.headers = headers
+        not_modified.encoding = get_encoding_from_headers(headers)
+        not_modified._content = body
+        return not_modified
@@ -0,0 +1,173 @@
+import time
+import random
+import logging
+import threading
+from urllib.parse import urlparse
+from requests import PreparedRequest, Response
+from modules.http_transport import PooledHTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Remaining budget ratio under which requests are spread until budget reset
+LOW_BUDGET_RATIO = 0.1
+
+
+def get_header_int(response: Response, *names: str) -> int:
+    # GitHub/Gitea use 'X-RateLimit-*' headers, GitLab 'RateLimit-*'
+    for name in names:
+        value = response.headers.get(name)
+        if value is not None:
+            try:
+                return int(float(value))
+            except ValueError:
+                continue
+    return None
+
+
+class HostBudget:
+    # Rate limit budget and concurrency of a platform host
+    def __init__(self, concurrency: float):
+        self.concurrency = concurrency
+        self.in_flight = 0
+        self.requests = 0
+        self.throttled = 0
+        self.retries = 0
+        self.consumed = 0
+        self.limit = None
+        self.remaining = None
+        self.reset = None
+
+
+class RateLimitScheduler:
+    """
+    Requests scheduler shared by platforms clients, tracking per host the rate limit budget from responses headers
+    (X-RateLimit-*, RateLimit-*, Retry-After).
+
+    Concurrency per host is adjusted AIMD-style: increased additively on successful responses up to 'max_concurrency',
+    halved when throttled (429, or 403/503 with exhausted budget or Retry-After). Throttled requests are retried up to
+    'max_retries' with jittered exponential backoff (or until announced reset), requests being spread until reset when budget is low.
+    """
+
+    def __init__(self, max_concurrency: int = 8, max_retries: int = 5, backoff_base: float = 1.0, backoff_max: float = 60.0,
+                 max_wait: float = 3600.0, sleep=time.sleep, clock=time.time):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_wait = max_wait
+        self.sleep = sleep
+        self.clock = clock
+        self.hosts = {}
+        self._condition = threading.Condition()
+
+    def acquire(self, host: str):
+        with self._condition:
+            budget = self.hosts.setdefault(host, HostBudget(self.max_concurrency))
+            while budget.in_flight >= max(1, int(budget.concurrency)):
+                self._condition.wait()
+            budget.in_flight += 1
+            budget.requests += 1
+            delay = self._pacing_delay(budget)
+        if delay > 0:
+            self.sleep(delay)
+
+    def release(self, host: str, response: Response = None, attempt: int = 0) -> float:
+        """
+        Release the host slot of a request, updating budget from response
+
+        Returns:
+            float: Delay (seconds) before retrying the request, None if not to retry
+        """
+        with self._condition:
+            budget = self.hosts[host]
+            budget.in_flight -= 1
+            self._condition.notify_all()
+            if response is None:
+                return None
+            self._update_budget(budget, response)
+            if not self._is_throttled(budget, response):
+                budget.concurrency = min(self.max_concurrency, budget.concurrency + 1 / max(1, budget.concurrency))
+                return None
+            budget.throttled += 1
+            budget.concurrency = max(1, budget.concurrency / 2)
+            if attempt >= self.max_retries:
+                return None
+            delay = self._retry_delay(budget, response, attempt)
+            if delay is None:
+                return None
+            budget.retries += 1
+            return delay
+
+    def report(self) -> list:
+        # Budget consumed during run by host
+        with self._condition:
+            return [{'host': host, 'requests': budget.requests, 'consumed': budget.consumed, 'limit': budget.limit, 'remaining': budget.remaining,
+                     'throttled': budget.throttled, 'retries': budget.retries} for host, budget in self.hosts.items()]
+
+    def _update_budget(self, budget: HostBudget, response: Response):
+        remaining = get_header_int(response, 'X-RateLimit-Remaining', 'RateLimit-Remaining')
+        if remaining is None:
+            return
+        if budget.remaining is not None and remaining < budget.remaining:
+            budget.consumed += budget.remaining - remaining
+        budget.remaining = remaining
+        budget.limit = get_header_int(response, 'X-RateLimit-Limit', 'RateLimit-Limit') or budget.limit
+        budget.reset = get_header_int(response, 'X-RateLimit-Reset', 'RateLimit-Reset') or budget.reset
+
+    @staticmethod
+    def _is_throttled(budget: HostBudget, response: Response) -> bool:
+        if response.status_code == 429:
+            return True
+        # Without budget information, 403 is a permission issue
+        return response.status_code in (403, 503) and ('Retry-After' in response.headers or budget.remaining == 0)
+
+    def _retry_delay(self, budget: HostBudget, response: Response, attempt: int) -> float:
+        retry_after = get_header_int(response, 'Retry-After')
+        if retry_after is not None:
+            delay = retry_after
+        elif budget.remaining == 0 and budget.reset is not None:
+            delay = max(0, budget.reset - self.clock())
+        else:
+            # Full jitter
+            return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if delay > self.max_wait:
+            return None
+        return delay + random.uniform(0, self.backoff_base)
+
+    def _pacing_delay(self, budget: HostBudget) -> float:
+        if budget.remaining is None or budget.limit is None or budget.reset is None or budget.remaining > budget.limit * LOW_BUDGET_RATIO:
+            return 0
+        until_reset = budget.reset - self.clock()
+        if until_reset <= 0:
+            return 0
+        if budget.remaining <= 0:
+            return min(until_reset, self.max_wait)
+        return until_reset / budget.remaining
+
+
+class ScheduledHTTPAdapter(PooledHTTPAdapter):
+    """
+    Pooled transport adapter sending requests through a RateLimitScheduler, retrying throttled ones. Mountable on any 'requests' session.
+    """
+
+    def __init__(self, scheduler: RateLimitScheduler, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.scheduler = scheduler
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:
+        host = urlparse(request.url).netloc
+        attempt = 0
+        while True:
+            self.scheduler.acquire(host)
+            try:
+                response = super().send(request, **kwargs)
+            except BaseException:
+                self.scheduler.release(host)
+                raise
+            delay = self.scheduler.release(host, response, attempt)
+            if delay is None:
+                return response
+            attempt += 1
+            logger.info('  Rate limited by %s (HTTP %d), retry %d in %.1fs...', host, response.status_code, attempt, delay)
+            response.close()
+            self.scheduler.sleep(delay)
@@ -0,0 +1,47 @@
+from urllib3.util.retry import Retry
+from requests.adapters import HTTPAdapter
+try:
+    import h2  # noqa: F401
+    import urllib3.http2 as urllib3_http2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+DEFAULT_POOL_SIZE = 16
+DEFAULT_CONNECTION_RETRIES = 3
+
+
+def enable_http2():
+    # Experimental urllib3 HTTP/2 support (HTTPS only), for all connections of the process
+    if not HTTP2_AVAILABLE:
+        raise ValueError('HTTP/2 requires "h2" python dependency (pip install h2).')
+    urllib3_http2.inject_into_urllib3()
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    Transport adapter keeping alive up to 'pool_size' connections by host, shared by platforms clients sessions.
+
+    Connection and read errors of idempotent requests are retried 'retries' times with backoff
+    (HTTP status retries being the responsibility of requests scheduler).
+    """
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE, retries: int = DEFAULT_CONNECTION_RETRIES, **kwargs):
+        retry = Retry(total=retries, connect=retries, read=retries, status=0, redirect=False, backoff_factor=0.5, raise_on_status=False)
+        super().__init__(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry, **kwargs)
+
+    def connections_report(self) -> list:
+        # Requests and connections opened by host, others requests having reused a kept alive connection
+        report = {}
+        pools = []
+        for manager in [self.poolmanager] + list(self.proxy_manager.values()):
+            pools += [manager.pools.get(key) for key in list(manager.pools.keys())]
+        for pool in pools:
+            if pool is None:
+                continue
+            host = '{}:{}'.format(pool.host, pool.port) if pool.port else pool.host
+            stats = report.setdefault(host, {'host': host, 'requests': 0, 'connections': 0, 'reused': 0})
+            stats['requests'] += pool.num_requests
+            stats['connections'] += pool.num_connections
+            stats['reused'] = max(0, stats['requests'] - stats['connections'])
+        return list(report.values())
@@ -1,9 +1,28 @@
+import os
 import re
+import sys
 import argparse
 import logging
+from modules.profiler import PHASES
+try:
+    import tomllib
+except ImportError:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+try:
+    import yaml
+except ImportError:
+    yaml = None
 
 logger = logging.getLogger(__name__)
 
+# Options of the whole process (workers, HTTP transport, clients caches, reports), same for all pairs of a configuration file
+PROCESS_OPTIONS = ['config', 'jobs', 'metadata-jobs', 'fetch-jobs', 'push-jobs', 'queue-size', 'api-cache-ttl', 'api-cache-size', 'api-max-concurrency',
+                   'api-max-retries', 'http-pool-size', 'http-retries', 'http2', 'http-cache-dir', 'http-cache-size', 'scan-concurrency', 'server-import-max-concurrency', 'report-file',
+                   'prometheus-file', 'profile', 'profile-phases', 'log-level']
+
 
 def hide(string: str, after: int = 4) -> str:
     if string is not None and len(string) > after:
@@ -18,9 +37,33 @@ def hide_url(url: str) -> str:
     return re.sub(r'//(.*?):*(.*?)@', lambda m: '//***@', url)
 
 
-def parse():
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError('{} is not a positive integer'.format(value))
+    return number
+
+
+def non_negative_int(value: str) -> int:
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError('{} is not a non-negative integer'.format(value))
+    return number
+
+
+def profile_phases(value: str) -> str:
+    unknown = [phase for phase in value.split(',') if phase not in PHASES]
+    if len(unknown) > 0:
+        raise argparse.ArgumentTypeError('unknown phase(s) {} (among {})'.format(', '.join(unknown), ', '.join(PHASES)))
+    return value
+
+
+def create_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description='Git Platforms Synchronization')
+    parser.add_argument('--config',
+                        help='TOML or YAML file of synchronization pairs ("pairs" list of options, "defaults" ones), synchronized together in this process. '
+                        'Command line options apply to all pairs.')
     parser.add_argument('--from-url', required=True,
                         help='Git "from" platform API URL (Required)')
     parser.add_argument('--from-login',
@@ -61,12 +104,126 @@ def parse():
                         help='Branches names patterns to exclude (comma separated).', default='\\.')
     parser.add_argument('-d', '--dry-run',
                         help='Dry-run : Just analyse which branches should be synchronized, without doning it really.', action='store_true')
+    parser.add_argument('-j', '--jobs', type=positive_int,
+                        help='Number of repositories synchronized in parallel (git working directories, and default workers of each synchronization stage).', default=1)
+    parser.add_argument('--metadata-jobs', type=positive_int,
+                        help='Number of workers of metadata stage (branches and tags to synchronize), default: jobs.')
+    parser.add_argument('--fetch-jobs', type=positive_int,
+                        help='Number of workers of fetch stage (clone from "from" platform), default: jobs.')
+    parser.add_argument('--push-jobs', type=positive_int,
+                        help='Number of workers of push stage (push to "to" platform), default: jobs.')
+    parser.add_argument('--queue-size', type=positive_int,
+                        help='Maximum number of repositories waiting between synchronization stages, default: jobs.')
+    parser.add_argument('--atomic-push',
+                        help='Push updated branches of a repository atomically (all or none updated on "to" platform).', action='store_true')
+    parser.add_argument('--api-cache-ttl', type=float,
+                        help='Time to live (seconds) of platforms objects (organizations, users, repositories) memoized during run (default: whole run).')
+    parser.add_argument('--api-cache-size', type=positive_int,
+                        help='Maximum number of platforms objects memoized during run, least recently used evicted (default: unbounded).')
+    parser.add_argument('--cache-dir',
+                        help='Directory of "from" repositories bare mirrors, kept between runs and updated incrementally (fetch).')
+    parser.add_argument('--delta-fetch',
+                        help='Fetch from "from" platform only branches and tags to synchronize, objects of "to" branches not being transferred again (ignored with --cache-dir).', action='store_true')
+    parser.add_argument('--server-import',
+                        help='New repositories imported by "to" platform itself (Gitea, GitLab), instead of being mirrored through this runner.', action='store_true')
+    parser.add_argument('--server-import-max-concurrency', type=positive_int,
+                        help='Maximum server-side imports in progress on "to" platform, others waiting.', default=4)
+    parser.add_argument('--api-max-concurrency', type=positive_int,
+                        help='Maximum concurrent requests by platform host, reduced when rate limited.', default=8)
+    parser.add_argument('--api-max-retries', type=int,
+                        help='Maximum retries of rate limited platforms requests (jittered backoff, or until rate limit reset).', default=5)
+    parser.add_argument('--http-pool-size', type=int,
+                        help='Maximum kept alive connections by platform host, shared by "from" and "to" clients.', default=16)
+    parser.add_argument('--http-retries', type=int,
+                        help='Maximum retries of platforms requests on connection or read errors.', default=3)
+    parser.add_argument('--http2',
+                        help='Use HTTP/2 for HTTPS platforms requests (experimental, requires "h2" python dependency).', action='store_true')
+    parser.add_argument('--http-cache-dir',
+                        help='Directory of platforms API responses cache, kept between runs and revalidated by conditional requests (ETag, Last-Modified).')
+    parser.add_argument('--http-cache-size', type=int,
+                        help='Maximum size (MB) of platforms API responses cache, least recently used evicted.', default=100)
+    parser.add_argument('--refs-discovery', choices=['api', 'git'],
+                        help='Repositories branches and tags discovery, by platforms API or by git (single "ls-remote" per repository).', default='api')
+    parser.add_argument('--scan-concurrency', type=non_negative_int,
+                        help='Scan repositories metadata (branches, tags) of both platforms concurrently before synchronization, with at most this number of requests at once (default: 0, scanned during synchronization).', default=0)
+    parser.add_argument('--state-file',
+                        help='JSON file of "from" repositories last activity at last synchronization, unchanged repositories being skipped at next runs.')
+    parser.add_argument('--report-file',
+                        help='JSON file of run report: time and calls by synchronization phase and platform client method (total and by repository), HTTP requests and bytes by host.')
+    parser.add_argument('--prometheus-file',
+                        help='Prometheus text file of run metrics (e.g. for node exporter textfile collector), repositories ones excepted.')
+    parser.add_argument('--profile',
+                        help='Directory of synchronization phases profiles: sampled stacks by phase (flame graph collapsed format) and time in git commands, network, Python.')
+    parser.add_argument('--profile-phases', type=profile_phases,
+                        help='Synchronization phases to profile (comma separated, among scan, metadata, clone, push).', default='scan,metadata,clone,push')
     parser.add_argument(
         '-l', '--log-level', help='Log level (DEBUG, INFO, WARNING, ERROR, CRITICAL)', default='INFO')
-    args = parser.parse_args()
+    return parser
+
+
+def parse(argv: list = None):
+    args = create_parser().parse_args(argv)
+    for stage_jobs in ['metadata_jobs', 'fetch_jobs', 'push_jobs', 'queue_size']:
+        if getattr(args, stage_jobs) is None:
+            setattr(args, stage_jobs, args.jobs)
     return args
 
 
+def parse_pairs() -> list:
+    """
+    Synchronization pairs options: command line ones, or one by configuration file pair (see --config). Pairs options are
+    the configuration file "defaults" ones, overridden by pair ones, then by command line ones. Process options (see PROCESS_OPTIONS)
+    cannot be given by pair.
+
+    Returns:
+        list: Options (argparse.Namespace) of each synchronization pair
+    """
+    config_parser = argparse.ArgumentParser(add_help=False)
+    config_parser.add_argument('--config')
+    config_file = config_parser.parse_known_args()[0].config
+    if not config_file:
+        return [parse()]
+
+    config = load_config(config_file)
+    if not config.get('pairs'):
+        raise ValueError('No synchronization pairs in configuration file {}.'.format(config_file))
+    pairs = []
+    for pair in config['pairs']:
+        for option in to_options(pair):
+            if option in PROCESS_OPTIONS:
+                raise ValueError('Option "{}" is a process one, not by pair: set it in "defaults" or command line.'.format(option))
+        pairs.append(parse(to_argv(config.get('defaults', {})) + to_argv(pair) + sys.argv[1:]))
+    return pairs
+
+
+def load_config(path: str) -> dict:
+    if os.path.splitext(path)[1].lower() in ['.yaml', '.yml']:
+        if yaml is None:
+            raise ValueError('YAML configuration file requires "PyYAML" python dependency (pip install pyyaml).')
+        with open(path, encoding='utf-8') as file:
+            return yaml.safe_load(file) or {}
+    if tomllib is None:
+        raise ValueError('TOML configuration file requires Python 3.11+ or "tomli" python dependency (pip install tomli).')
+    with open(path, 'rb') as file:
+        return tomllib.load(file)
+
+
+def to_options(options: dict) -> list:
+    # Command line options names, from configuration keys (dashes or underscores)
+    return [key.replace('_', '-') for key in options]
+
+
+def to_argv(options: dict) -> list:
+    # Flags given when true, lists joined (e.g. includes/excludes patterns)
+    argv = []
+    for option, value in zip(to_options(options), options.values()):
+        if value is True:
+            argv.append('--' + option)
+        elif value is not False and value is not None:
+            argv += ['--' + option, ','.join(str(item) for item in value) if isinstance(value, list) else str(value)]
+    return argv
+
+
 def print_args(args: argparse.Namespace):
     logger.info('\n------ Input arguments ------')
     logger.info('Git "from" platform URL     : %s', args.from_url)
@@ -88,6 +245,23 @@ def print_args(args: argparse.Namespace):
     logger.info('Branches include            : %s', args.branches_include)
     logger.info('Branches exclude            : %s', args.branches_exclude)
     logger.info('Dry-run                     : %s', args.dry_run)
+    logger.info('Jobs                        : %s', args.jobs)
+    logger.info('Jobs metadata/fetch/push    : %s / %s / %s', args.metadata_jobs, args.fetch_jobs, args.push_jobs)
+    logger.info('Queue size                  : %s', args.queue_size)
+    logger.info('Atomic push                 : %s', args.atomic_push)
+    logger.info('API cache TTL / size        : %s / %s', args.api_cache_ttl, args.api_cache_size)
+    logger.info('Cache directory             : %s', args.cache_dir)
+    logger.info('Delta fetch                 : %s', args.delta_fetch)
+    logger.info('Server import / concurrency : %s / %s', args.server_import, args.server_import_max_concurrency)
+    logger.info('API max concurrency/retries : %s / %s', args.api_max_concurrency, args.api_max_retries)
+    logger.info('HTTP pool size / retries    : %s / %s', args.http_pool_size, args.http_retries)
+    logger.info('HTTP/2                      : %s', args.http2)
+    logger.info('HTTP cache directory / size : %s / %s MB', args.http_cache_dir, args.http_cache_size)
+    logger.info('Refs discovery              : %s', args.refs_discovery)
+    logger.info('State file                  : %s', args.state_file)
+    logger.info('Scan concurrency            : %s', args.scan_concurrency)
+    logger.info('Report file / Prometheus    : %s / %s', args.report_file, args.prometheus_file)
+    logger.info('Profile directory / phases  : %s / %s', args.profile, args.profile_phases)
     logger.info('Log Level                   : %s', args.log_level)
 
 
@@ -0,0 +1,51 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+class MemoCache:
+    """
+    Thread-safe memoization cache of platforms objects (organizations, users, repositories, ...).
+
+    Entries expire after 'ttl' seconds (never if None), least recently used entries are evicted
+    above 'max_size' entries (unbounded if None).
+    """
+
+    def __init__(self, ttl: float = None, max_size: int = None):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, loader):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (self.ttl is None or time.monotonic() - entry[0] < self.ttl):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # Loaded outside lock, not blocking other keys during HTTP calls. Exceptions are not cached.
+        value = loader()
+
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            if self.max_size is not None:
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
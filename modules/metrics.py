@@ -0,0 +1,260 @@
+import os
+import re
+import json
+import time
+import datetime
+import threading
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, asdict
+from git import RemoteProgress
+from urllib.parse import urlparse
+from requests import PreparedRequest, Response
+from requests.adapters import HTTPAdapter
+from modules.git_clients import GitClient
+
+PROMETHEUS_PREFIX = 'git_platforms_synchro'
+
+# Size in git progress messages (e.g. "1.21 MiB | 2.00 MiB/s")
+SIZE_PATTERN = re.compile(r'([0-9.]+) (bytes|KiB|MiB|GiB)')
+SIZE_UNITS = {'bytes': 1, 'KiB': 1024, 'MiB': 1024 ** 2, 'GiB': 1024 ** 3}
+
+# Platforms clients methods measured, with synchronization phase (by repository when given)
+MEASURED_METHODS = {
+    'index_repos': 'list_repos',
+    'get_repos': 'list_repos',
+    'has_repo': 'has_repo',
+    'get_branches': 'list_branches',
+    'get_tags': 'list_tags',
+    'create_repo': 'create_repo',
+    'import_repo': 'import_repo'
+}
+
+
+@dataclass
+class Timing:
+    calls: int = 0
+    seconds: float = 0.0
+
+
+class Metrics:
+    """
+    Run instrumentation: calls and time of synchronization phases (total and by repository) and of platforms clients methods,
+    requests and bytes transferred by platform host, and other counters (total and by repository). Thread safe.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.started = datetime.datetime.now(datetime.timezone.utc)
+        self.started_clock = clock()
+        self.phases = {}
+        self.methods = {}
+        self.http = {}
+        self.counters = {}
+        self.repos = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str, repo: str = None):
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.add_phase(name, self.clock() - start, repo)
+
+    def add_phase(self, name: str, seconds: float, repo: str = None):
+        with self._lock:
+            self._add_timing(self.phases, name, seconds)
+            if repo is not None:
+                self._add_timing(self._repo(repo)['phases'], name, seconds)
+
+    def add_method(self, platform: str, method: str, seconds: float):
+        with self._lock:
+            self._add_timing(self.methods, '{}.{}'.format(platform, method), seconds)
+
+    def add_http(self, host: str, sent_bytes: int, received_bytes: int):
+        with self._lock:
+            stats = self.http.setdefault(host, {'requests': 0, 'sent_bytes': 0, 'received_bytes': 0})
+            stats['requests'] += 1
+            stats['sent_bytes'] += sent_bytes
+            stats['received_bytes'] += received_bytes
+
+    def add(self, name: str, value: float = 1, repo: str = None):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+            if repo is not None:
+                counters = self._repo(repo)['counters']
+                counters[name] = counters.get(name, 0) + value
+
+    def report(self) -> dict:
+        """
+        Returns:
+            dict: Run report (JSON serializable)
+        """
+        with self._lock:
+            return {
+                'started': self.started.isoformat(timespec='seconds'),
+                'duration_seconds': self.clock() - self.started_clock,
+                'counters': dict(self.counters),
+                'phases': {name: asdict(timing) for name, timing in sorted(self.phases.items())},
+                'methods': {name: asdict(timing) for name, timing in sorted(self.methods.items())},
+                'http': {host: dict(stats) for host, stats in sorted(self.http.items())},
+                'repos': {repo: {'phases': {name: asdict(timing) for name, timing in sorted(metrics['phases'].items())}, 'counters': dict(metrics['counters'])}
+                          for repo, metrics in sorted(self.repos.items())}
+            }
+
+    def prometheus(self) -> str:
+        """
+        Returns:
+            str: Run metrics in Prometheus text format (node exporter textfile collector), without repositories ones (cardinality)
+        """
+        report = self.report()
+        lines = []
+
+        def metric(name: str, type: str, help: str, samples: list):
+            lines.append('# HELP {}_{} {}'.format(PROMETHEUS_PREFIX, name, help))
+            lines.append('# TYPE {}_{} {}'.format(PROMETHEUS_PREFIX, name, type))
+            for labels, value in samples:
+                labels = ','.join('{}="{}"'.format(key, escape_label(value)) for key, value in labels.items())
+                lines.append('{}_{}{} {}'.format(PROMETHEUS_PREFIX, name, '{' + labels + '}' if labels else '', value))
+
+        metric('last_run_timestamp_seconds', 'gauge', 'Start time of last run.', [({}, self.started.timestamp())])
+        metric('run_duration_seconds', 'gauge', 'Duration of last run.', [({}, report['duration_seconds'])])
+        for name, value in sorted(report['counters'].items()):
+            metric(name, 'gauge', 'Last run {}.'.format(name.replace('_', ' ')), [({}, value)])
+        metric('phase_calls_total', 'counter', 'Calls of synchronization phase.', [({'phase': name}, timing['calls']) for name, timing in report['phases'].items()])
+        metric('phase_seconds_total', 'counter', 'Time spent in synchronization phase.',
+               [({'phase': name}, timing['seconds']) for name, timing in report['phases'].items()])
+        methods = [(dict(zip(['platform', 'method'], name.split('.', 1))), timing) for name, timing in report['methods'].items()]
+        metric('client_calls_total', 'counter', 'Calls of platform client method.', [(labels, timing['calls']) for labels, timing in methods])
+        metric('client_seconds_total', 'counter', 'Time spent in platform client method.', [(labels, timing['seconds']) for labels, timing in methods])
+        for key, help in [('requests', 'HTTP requests sent to platform host.'), ('sent_bytes', 'HTTP requests bodies bytes sent to platform host.'),
+                          ('received_bytes', 'HTTP responses bodies bytes received from platform host.')]:
+            metric('http_{}_total'.format(key), 'counter', help, [({'host': host}, stats[key]) for host, stats in report['http'].items()])
+        return '\n'.join(lines) + '\n'
+
+    def write_json(self, path: str):
+        write_file(path, json.dumps(self.report(), indent=2))
+
+    def write_prometheus(self, path: str):
+        write_file(path, self.prometheus())
+
+    def _repo(self, repo: str) -> dict:
+        return self.repos.setdefault(repo, {'phases': {}, 'counters': {}})
+
+    @staticmethod
+    def _add_timing(timings: dict, name: str, seconds: float):
+        timing = timings.setdefault(name, Timing())
+        timing.calls += 1
+        timing.seconds += seconds
+
+
+def measure(metrics: Metrics, phase: str, repo: str = None):
+    # Phase context manager, doing nothing without metrics
+    return metrics.phase(phase, repo) if metrics is not None else nullcontext()
+
+
+def get_repo_key(from_org: str, repo: str, to_org: str) -> str:
+    # Repository of a synchronization pair: same repository names of several pairs (see --config) not merged
+    return '{}/{} -> {}'.format(from_org, repo, to_org)
+
+
+def escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def write_file(path: str, content: str):
+    # Written then renamed: readers (e.g. textfile collector) never see a partial file
+    temporary = path + '.tmp'
+    with open(temporary, 'w') as f:
+        f.write(content)
+    os.replace(temporary, path)
+
+
+def get_objects_files(git_dir: str) -> dict:
+    """
+    Returns:
+        dict: Objects files of repository (packs and loose objects, not indexes) as keys and their size (bytes) as values
+    """
+    files = {}
+    for root, _, names in os.walk(os.path.join(git_dir, 'objects')):
+        for name in names:
+            if name.endswith('.pack') or len(os.path.basename(root)) == 2:
+                files[os.path.join(root, name)] = os.path.getsize(os.path.join(root, name))
+    return files
+
+
+def get_fetched_size(git_dir: str, objects_files_before: dict) -> int:
+    # Objects files added by fetch (received packs, or loose objects unpacked from small ones), already present objects excluded
+    return sum(size for file, size in get_objects_files(git_dir).items() if file not in objects_files_before)
+
+
+def parse_size(message: str) -> int:
+    match = SIZE_PATTERN.search(message)
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2)]) if match else 0
+
+
+class PushProgress(RemoteProgress):
+    """
+    Push progress keeping size (bytes) of pack sent, from git "Writing objects" progress. Nothing written when remote already has all objects.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.written_bytes = 0
+
+    def update(self, op_code: int, cur_count, max_count=None, message: str = ''):
+        if op_code & RemoteProgress.WRITING and op_code & RemoteProgress.END:
+            self.written_bytes = parse_size(message)
+
+
+class MeasuredGitClient:
+    """
+    Platform client measuring calls of MEASURED_METHODS ('platform' being "from" or "to"), by method and by synchronization phase
+    (for the repository given as second argument, reported as 'repo_key(repo)' if given). Other methods are delegated to the platform client.
+    """
+
+    def __init__(self, client: GitClient, metrics: Metrics, platform: str, repo_key=None):
+        self.client = client
+        self.metrics = metrics
+        self.platform = platform
+        self.repo_key = repo_key
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self.client, name)
+        if name not in MEASURED_METHODS:
+            return attribute
+
+        def measured(*args, **kwargs):
+            start = self.metrics.clock()
+            try:
+                return attribute(*args, **kwargs)
+            finally:
+                seconds = self.metrics.clock() - start
+                self.metrics.add_method(self.platform, name, seconds)
+                repo = args[1] if len(args) > 1 else kwargs.get('repo')
+                self.metrics.add_phase(MEASURED_METHODS[name], seconds, self.repo_key(repo) if repo is not None and self.repo_key is not None else repo)
+        return measured
+
+
+class MetricsHTTPAdapter(HTTPAdapter):
+    """
+    Transport adapter counting requests and bodies bytes by host into Metrics, requests being sent by 'transport' adapter
+    (adapters chaining). Mountable on any 'requests' session.
+    """
+
+    def __init__(self, metrics: Metrics, transport: HTTPAdapter, **kwargs):
+        super().__init__(**kwargs)
+        self.metrics = metrics
+        self.transport = transport
+
+    def send(self, request: PreparedRequest, stream: bool = False, **kwargs) -> Response:
+        response = self.transport.send(request, stream=stream, **kwargs)
+        body = request.body.encode() if isinstance(request.body, str) else request.body
+        # Response read now rather than by session (not streamed), to be counted
+        received = len(response.content) if not stream else 0
+        self.metrics.add_http(urlparse(request.url).netloc, len(body) if isinstance(body, bytes) else 0, received)
+        return response
+
+    def close(self):
+        super().close()
+        self.transport.close()
@@ -0,0 +1,68 @@
+import re
+import math
+from urllib.parse import urlparse, parse_qs
+from concurrent.futures import ThreadPoolExecutor
+
+# Concurrent pages requests by listing, platforms hosts concurrency being also bounded by requests scheduler
+MAX_CONCURRENT_PAGES = 8
+LINK_LAST_PATTERN = re.compile(r'<([^>]+)>\s*;\s*rel="last"')
+
+
+def get_total_pages(headers, page_size: int) -> int:
+    """
+    Total pages of a listing from first page response headers (case insensitive)
+
+    Returns:
+        int: Total pages, None if not provided (X-Total-Pages, X-Total-Count/X-Total or Link rel="last")
+    """
+    if headers.get('X-Total-Pages'):
+        return int(headers['X-Total-Pages'])
+    total = headers.get('X-Total-Count') or headers.get('X-Total')
+    if total:
+        return math.ceil(int(total) / page_size) if page_size > 0 else 1
+    link_last = LINK_LAST_PATTERN.search(headers.get('Link', ''))
+    if link_last:
+        pages = parse_qs(urlparse(link_last.group(1)).query).get('page')
+        if pages:
+            return int(pages[0])
+    return None
+
+
+def has_next_page(headers) -> bool:
+    # From 'X-Next-Page' or 'Link' headers, True if not provided
+    if 'X-Next-Page' in headers:
+        return len(headers['X-Next-Page']) > 0
+    if 'Link' in headers:
+        return 'rel="next"' in headers['Link']
+    return True
+
+
+def fetch_all_pages(fetch_page, page_size: int, max_workers: int = MAX_CONCURRENT_PAGES) -> list:
+    """
+    Fetch all pages of a listing, 'fetch_page(page)' (page starting at 1) returning page items and response headers.
+
+    When total is known from first page, other pages are fetched concurrently. Otherwise they are fetched sequentially,
+    until last page (from headers) or an empty page.
+    """
+    items, headers = fetch_page(1)
+    items = list(items)
+    if len(items) == 0:
+        return items
+
+    # Page size from first page, platforms could cap the requested one
+    total_pages = get_total_pages(headers, max(len(items), 1) if len(items) < page_size else page_size)
+    if total_pages is None:
+        page = 2
+        while has_next_page(headers):
+            page_items, headers = fetch_page(page)
+            if len(page_items) == 0:
+                break
+            items.extend(page_items)
+            page += 1
+        return items
+
+    if total_pages > 1:
+        with ThreadPoolExecutor(max_workers=min(max_workers, total_pages - 1), thread_name_prefix='page') as executor:
+            for page_items in executor.map(lambda page: fetch_page(page)[0], range(2, total_pages + 1)):
+                items.extend(page_items)
+    return items
@@ -0,0 +1,97 @@
+import threading
+from queue import Queue
+from dataclasses import dataclass
+from typing import Callable
+
+# End of items, forwarded to next stage once all workers of a stage are finished
+_END = object()
+
+
+@dataclass
+class Stage:
+    """
+    Pipeline stage, 'function(item)' returning the item for next stage (None when item processing is finished).
+
+    Items not processed because of a previous failure are given to 'cancel(item)' if provided (releasing their resources).
+    """
+    name: str
+    function: Callable
+    workers: int = 1
+    cancel: Callable = None
+
+
+def run_pipeline(items: list, stages: list, queue_size: int = 1):
+    """
+    Process items through successive stages, each one with its own workers (threads named from stage), so that
+    an item is processed by a stage while next ones are processed by previous stages.
+
+    Stages are connected by queues bounded to 'queue_size' items. On failure, remaining items are cancelled
+    and the first error is raised once all workers are finished.
+    """
+    for stage in stages:
+        if stage.workers < 1:
+            raise ValueError('Pipeline stage "{}" must have at least one worker ({} given).'.format(stage.name, stage.workers))
+    pipeline = _Pipeline(stages, queue_size)
+    threads = []
+    for index, stage in enumerate(stages):
+        for worker in range(stage.workers):
+            thread = threading.Thread(target=pipeline.work, args=(index,), name='{}_{}'.format(stage.name, worker), daemon=True)
+            thread.start()
+            threads.append(thread)
+    try:
+        for item in items:
+            if pipeline.errors:
+                break
+            pipeline.queues[0].put(item)
+    finally:
+        pipeline.queues[0].put(_END)
+        for thread in threads:
+            thread.join()
+    if pipeline.errors:
+        raise pipeline.errors[0]
+
+
+class _Pipeline:
+    # Stages queues and workers state of a running pipeline
+
+    def __init__(self, stages: list, queue_size: int):
+        self.stages = stages
+        self.queues = [Queue(maxsize=max(1, queue_size)) for _ in stages]
+        self.workers_running = [stage.workers for stage in stages]
+        self.errors = []
+        self._lock = threading.Lock()
+
+    def work(self, index: int):
+        while True:
+            item = self.queues[index].get()
+            if item is _END:
+                self._end(index)
+                return
+            if self.errors:
+                _cancel(self.stages[index], item)
+                continue
+            item = self._process(index, item)
+            if item is not None and index + 1 < len(self.stages):
+                self.queues[index + 1].put(item)
+
+    def _process(self, index: int, item):
+        try:
+            return self.stages[index].function(item)
+        except BaseException as e:
+            with self._lock:
+                self.errors.append(e)
+            return None
+
+    def _end(self, index: int):
+        # Other workers of stage also have to stop, next stage once last worker stopped
+        self.queues[index].put(_END)
+        with self._lock:
+            self.workers_running[index] -= 1
+            last = self.workers_running[index] == 0
+        if last and index + 1 < len(self.stages):
+            self.queues[index + 1].put(_END)
+
+
+def _cancel(stage: Stage, item):
+    if stage.cancel is not None:
+        stage.cancel(item)
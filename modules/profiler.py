@@ -0,0 +1,196 @@
+import os
+import sys
+import time
+import logging
+import threading
+from collections import Counter
+from contextlib import nullcontext
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 0.005
+PHASES = ['scan', 'metadata', 'clone', 'push']
+
+# Samples categories, from sampled stack: waiting for a subprocess (git commands), for network (HTTP requests), for other threads, or running Python
+CATEGORIES = ['git', 'network', 'wait', 'python']
+GIT_FILES = (os.path.join('git', 'cmd.py'), 'subprocess.py')
+NETWORK_FILES = ('socket.py', 'ssl.py', os.path.join('http', 'client.py'))
+WAIT_FILES = ('threading.py', 'queue.py', 'selectors.py', os.path.join('concurrent', 'futures', '_base.py'), os.path.join('concurrent', 'futures', 'thread.py'))
+# Sleeping functions (e.g. PyGithub pause between requests)
+WAIT_FUNCTIONS = ('__deferRequest',)
+
+# Active profiler of the process, see start()
+_profiler = None
+
+
+class SamplingProfiler:
+    """
+    Sampling profiler of synchronization phases: stacks of threads running a phase are sampled every 'interval' seconds, whatever the
+    number of threads (parallel stages), and collapsed by phase from phase entry (SDK internals kept below synchronization functions).
+
+    Samples are categorized (see CATEGORIES), time of a category being the sum of its threads time.
+    """
+
+    def __init__(self, phases: list = None, interval: float = DEFAULT_INTERVAL):
+        self.phases = phases if phases is not None else PHASES
+        self.interval = interval
+        self.stacks = {}
+        self.seconds = {}
+        self._threads_phases = {}
+        self._all_threads_phase = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def phase(self, name: str, all_threads: bool = False):
+        # Context manager of a phase run by current thread, or by all threads not in another phase
+        if name not in self.phases:
+            return nullcontext()
+        return ProfiledPhase(self, name, all_threads)
+
+    def summary(self) -> list:
+        """
+        Returns:
+            list: Phases with their time (seconds) by category
+        """
+        with self._lock:
+            return [dict({'phase': phase}, **{category: seconds.get(category, 0.0) for category in CATEGORIES}) for phase, seconds in self.seconds.items()]
+
+    def write(self, directory: str) -> list:
+        """
+        Write collapsed stacks of each phase ('<phase>.collapsed', flame graph tools format) and summary ('summary.txt')
+
+        Returns:
+            list: Written files
+        """
+        os.makedirs(directory, exist_ok=True)
+        files = []
+        with self._lock:
+            stacks = {phase: dict(counts) for phase, counts in self.stacks.items()}
+        for phase, counts in stacks.items():
+            files.append(os.path.join(directory, phase + '.collapsed'))
+            with open(files[-1], 'w') as f:
+                for stack, count in sorted(counts.items()):
+                    f.write('{} {}\n'.format(stack, count))
+        files.append(os.path.join(directory, 'summary.txt'))
+        with open(files[-1], 'w') as f:
+            f.write('phase {}\n'.format(' '.join('{}_seconds'.format(category) for category in CATEGORIES)))
+            for phase in self.summary():
+                f.write('{} {}\n'.format(phase['phase'], ' '.join('{:.3f}'.format(phase[category]) for category in CATEGORIES)))
+        return files
+
+    def _enter(self, name: str, all_threads: bool, frame) -> tuple:
+        with self._lock:
+            if all_threads:
+                previous, self._all_threads_phase = self._all_threads_phase, name
+            else:
+                thread = threading.get_ident()
+                previous, self._threads_phases[thread] = self._threads_phases.get(thread), (name, frame)
+        return previous
+
+    def _exit(self, all_threads: bool, previous: tuple):
+        with self._lock:
+            if all_threads:
+                self._all_threads_phase = previous
+            elif previous is None:
+                self._threads_phases.pop(threading.get_ident(), None)
+            else:
+                self._threads_phases[threading.get_ident()] = previous
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            elapsed, last = now - last, now
+            frames = sys._current_frames()
+            with self._lock:
+                for thread, frame in frames.items():
+                    if thread == threading.get_ident():
+                        continue
+                    phase, entry = self._threads_phases.get(thread, (self._all_threads_phase, None))
+                    if phase is not None:
+                        self._sample(phase, entry, frame, elapsed)
+
+    def _sample(self, phase: str, entry, frame, elapsed: float):
+        stack = []
+        while frame is not None:
+            stack.append(frame.f_code)
+            if frame is entry:
+                break
+            frame = frame.f_back
+        self.stacks.setdefault(phase, Counter())[';'.join(get_frame_name(code) for code in reversed(stack))] += 1
+        self.seconds.setdefault(phase, Counter())[get_category(stack)] += elapsed
+
+
+class ProfiledPhase:
+
+    def __init__(self, profiler: SamplingProfiler, name: str, all_threads: bool):
+        self.profiler = profiler
+        self.name = name
+        self.all_threads = all_threads
+
+    def __enter__(self):
+        # Stacks collapsed from caller frame
+        self.previous = self.profiler._enter(self.name, self.all_threads, sys._getframe(1))
+
+    def __exit__(self, *exc):
+        self.profiler._exit(self.all_threads, self.previous)
+
+
+def get_frame_name(code) -> str:
+    # Module path (from site-packages or current directory) and function
+    filename = code.co_filename
+    if 'site-packages' in filename:
+        filename = filename.split('site-packages', 1)[1].lstrip(os.sep)
+    elif filename.startswith(os.getcwd()):
+        filename = os.path.relpath(filename)
+    else:
+        filename = os.path.basename(filename)
+    return '{}:{}'.format(filename.replace(os.sep, '/'), getattr(code, 'co_qualname', code.co_name))
+
+
+def get_category(stack: list) -> str:
+    # From leaf frame, any frame waiting for a subprocess being a git command
+    if any(code.co_filename.endswith(GIT_FILES) for code in stack):
+        return 'git'
+    if stack[0].co_filename.endswith(NETWORK_FILES):
+        return 'network'
+    if stack[0].co_filename.endswith(WAIT_FILES) or stack[0].co_name in WAIT_FUNCTIONS:
+        return 'wait'
+    return 'python'
+
+
+def start(phases: list = None, interval: float = DEFAULT_INTERVAL) -> SamplingProfiler:
+    global _profiler
+    _profiler = SamplingProfiler(phases, interval)
+    _profiler.start()
+    return _profiler
+
+
+def stop() -> SamplingProfiler:
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is not None:
+        profiler.stop()
+    return profiler
+
+
+def profile_phase(name: str, all_threads: bool = False):
+    # Phase of active profiler, nothing done if not started
+    return _profiler.phase(name, all_threads) if _profiler is not None else nullcontext()
+
+
+def profiled(name: str, function):
+    # Function running in a phase of active profiler (e.g. pipeline stage function)
+    def run(*args, **kwargs):
+        with profile_phase(name):
+            return function(*args, **kwargs)
+    return run
@@ -0,0 +1,67 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from modules.git_clients import GitClient
+
+DEFAULT_SCAN_CONCURRENCY = 32
+
+
+class RepoScan:
+    """
+    Repository metadata needed by synchronization ("to" existence, branches and tags on both platforms).
+
+    Each item is requested on first access, unless already fetched by scan_repos().
+    """
+
+    def __init__(self, git_from: GitClient, git_to: GitClient, org_from: str, org_to: str, repo: str):
+        self.git_from = git_from
+        self.git_to = git_to
+        self.org_from = org_from
+        self.org_to = org_to
+        self.repo = repo
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def exists_to(self) -> bool:
+        return self._get('exists_to', lambda: self.git_to.has_repo(self.org_to, self.repo))
+
+    def branches_from(self) -> dict:
+        return self._get('branches_from', lambda: self.git_from.get_branches(self.org_from, self.repo))
+
+    def branches_to(self) -> dict:
+        return self._get('branches_to', lambda: self.git_to.get_branches(self.org_to, self.repo))
+
+    def tags_from(self) -> dict:
+        return self._get('tags_from', lambda: self.git_from.get_tags(self.org_from, self.repo))
+
+    def tags_to(self) -> dict:
+        return self._get('tags_to', lambda: self.git_to.get_tags(self.org_to, self.repo))
+
+    def is_scanned(self, item: str) -> bool:
+        with self._lock:
+            return item in self._items
+
+    def _get(self, item: str, request):
+        with self._lock:
+            if item in self._items:
+                return self._items[item]
+        value = request()
+        with self._lock:
+            return self._items.setdefault(item, value)
+
+
+def scan_repos(scans: list, concurrency: int = DEFAULT_SCAN_CONCURRENCY) -> list:
+    """
+    Scan repositories metadata on both platforms concurrently, before synchronization (scans of any platforms/organizations,
+    e.g. several synchronization pairs), at most 'concurrency' requests at once for all of them.
+    Repositories requested stage by stage, tags only fetched when branches will be compared (repository not mirrored).
+
+    Returns:
+        list: Scanned RepoScan
+    """
+    # Platforms clients being synchronous, concurrency comes from scan threads (shut down once scanned)
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='scan') as executor:
+        existing = [scan for scan, exists in zip(scans, executor.map(lambda scan: scan.exists_to(), scans)) if exists]
+        list(executor.map(lambda item: item(), [item for scan in existing for item in (scan.branches_from, scan.branches_to)]))
+        compared = [scan for scan in existing if len(scan.branches_from()) > 0 and len(scan.branches_to()) > 0]
+        list(executor.map(lambda item: item(), [item for scan in compared for item in (scan.tags_from, scan.tags_to)]))
+    return scans
@@ -0,0 +1,77 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from modules.git_clients import GitClient, IMPORT_FINISHED, IMPORT_FAILED
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_POLL_INTERVAL = 5.0
+DEFAULT_TIMEOUT = 3600.0
+
+
+class ServerImports:
+    """
+    Repositories imported by the platform itself (server-side) instead of being mirrored through the runner.
+
+    At most 'max_concurrency' imports are in progress, each one being polled every 'poll_interval' seconds until finished
+    (failed after 'timeout' seconds). Others are queued.
+    """
+
+    def __init__(self, client: GitClient, max_concurrency: int = DEFAULT_MAX_CONCURRENCY, poll_interval: float = DEFAULT_POLL_INTERVAL,
+                 timeout: float = DEFAULT_TIMEOUT, sleep=time.sleep, clock=time.monotonic):
+        self.client = client
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.sleep = sleep
+        self.clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='import')
+        self._futures = []
+        self._lock = threading.Lock()
+
+    def submit(self, org: str, repo: str, clone_url: str, login_or_token: str = None, password: str = None, description: str = '', on_finished=None):
+        # 'on_finished()' called once repository imported
+        future = self._executor.submit(self._import, org, repo, clone_url, login_or_token, password, description, on_finished)
+        with self._lock:
+            self._futures.append((repo, future))
+
+    def wait(self) -> list:
+        """
+        Wait for all imports end
+
+        Returns:
+            list: Repositories whose import failed (errors logged)
+        """
+        with self._lock:
+            futures = list(self._futures)
+        failed = []
+        for repo, future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                logger.error('Server-side import of repository %s failed: %s', repo, e)
+                failed.append(repo)
+        self._executor.shutdown()
+        return failed
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._futures)
+
+    def _import(self, org: str, repo: str, clone_url: str, login_or_token: str, password: str, description: str, on_finished):
+        logger.info('  Server-side import of repository %s started...', repo)
+        self.client.import_repo(org, repo, clone_url, login_or_token, password, description)
+        started = self.clock()
+        while True:
+            status = self.client.get_import_status(org, repo)
+            if status == IMPORT_FINISHED:
+                break
+            if status == IMPORT_FAILED:
+                raise ValueError('Import failed on "to" platform.')
+            if self.clock() - started > self.timeout:
+                raise TimeoutError('Import not finished after {}s (last status: {}).'.format(self.timeout, status))
+            self.sleep(self.poll_interval)
+        logger.info('  Server-side import of repository %s finished.', repo)
+        if on_finished is not None:
+            on_finished()
@@ -0,0 +1,48 @@
+import os
+import copy
+import json
+import threading
+
+
+class SyncState:
+    """
+    Last activity timestamp of "from" repositories successfully synchronized, persisted between runs in a JSON file.
+
+    States are scoped (typically by "from" and "to" platforms/organizations), the same file being usable for several synchronizations.
+    """
+
+    def __init__(self, path: str, scope: str):
+        self.path = path
+        self.scope = scope
+        self._states = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as file:
+                self._states = json.load(file)
+
+    def with_scope(self, scope: str) -> 'SyncState':
+        # Other scope of the same file: states and lock shared, saved by any of them
+        sync_state = copy.copy(self)
+        sync_state.scope = scope
+        return sync_state
+
+    def is_unchanged(self, repo: str, last_activity: str) -> bool:
+        # Unknown last activity (not provided by platform) is always considered as changed
+        if last_activity is None:
+            return False
+        with self._lock:
+            return self._states.get(self.scope, {}).get(repo) == last_activity
+
+    def update(self, repo: str, last_activity: str):
+        if last_activity is None:
+            return
+        with self._lock:
+            self._states.setdefault(self.scope, {})[repo] = last_activity
+
+    def save(self):
+        with self._lock:
+            # Written aside then renamed, to not corrupt the state file if interrupted
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(self._states, file, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
@@ -1,12 +1,43 @@
 import os
+import re
+import base64
 import shutil
+import hashlib
 
 
 TMP_REPO_GIT_DIRECTORY = 'tmp-git-repo/'
 ENV_TEST_MODE = 'TEST_MODE'
+GIT_ASKPASS_SCRIPT = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'git_askpass.py')
 
 
-def delete_temporary_repo_git_directory(force_if_test_mode: bool = False):
+def get_worker_repo_git_directory(worker: int) -> str:
+    return os.path.join(TMP_REPO_GIT_DIRECTORY, 'worker-{}'.format(worker)) + '/'
+
+
+def get_cache_repo_git_directory(cache_dir: str, url: str) -> str:
+    # Readable repository name, suffixed by URL hash to avoid collisions between platforms/organizations
+    name = re.sub(r'[^\w.-]', '_', url.rstrip('/').rsplit('/', 1)[-1])
+    return os.path.join(cache_dir, '{}-{}'.format(name, hashlib.sha256(url.encode()).hexdigest()[:16])) + '/'
+
+
+def get_git_credentials_env(username: str, password: str, url: str = None) -> dict:
+    """
+    Credentials of a single git command, overriding process ones. Never prompt on terminal.
+
+    With 'url', credentials are sent upfront as an 'Authorization' header limited to this URL (git >= 2.31 'GIT_CONFIG_*' environment,
+    not visible in command line), without starting git_askpass.py for username and password prompts. This script still answers
+    if the header is refused or ignored (older git).
+    """
+    env = {'GIT_TERMINAL_PROMPT': '0', 'GIT_ASKPASS': '', 'GIT_USERNAME': username or '', 'GIT_PASSWORD': password or '', 'GIT_CONFIG_COUNT': '0'}
+    if username or password:
+        env['GIT_ASKPASS'] = GIT_ASKPASS_SCRIPT
+        if url and url.startswith(('http://', 'https://')):
+            basic = base64.b64encode('{}:{}'.format(username or '', password or '').encode()).decode()
+            env.update({'GIT_CONFIG_COUNT': '1', 'GIT_CONFIG_KEY_0': 'http.{}.extraHeader'.format(url), 'GIT_CONFIG_VALUE_0': 'Authorization: Basic ' + basic})
+    return env
+
+
+def delete_temporary_repo_git_directory(force_if_test_mode: bool = False, directory: str = TMP_REPO_GIT_DIRECTORY):
     if os.environ.get(ENV_TEST_MODE) != 'true' or force_if_test_mode:
-        if os.path.exists(TMP_REPO_GIT_DIRECTORY) and os.path.isdir(TMP_REPO_GIT_DIRECTORY):
-            shutil.rmtree(TMP_REPO_GIT_DIRECTORY)
+        if os.path.exists(directory) and os.path.isdir(directory):
+            shutil.rmtree(directory)
@@ -1,16 +1,18 @@
+import os
+import shutil
 import tarfile
 import git_platforms_synchro
-from modules.utils import delete_temporary_repo_git_directory
+from modules.utils import delete_temporary_repo_git_directory, get_cache_repo_git_directory, get_git_credentials_env
 from pytest import LogCaptureFixture, raises
 from pytest_httpserver import HTTPServer
+from concurrent.futures import ThreadPoolExecutor
 from git import GitCommandError
-from tests.test_utils import get_url_root
+from tests.test_utils import get_url_root, extract_fetched_repo
 
 
 def test_cloned_reuse(caplog: LogCaptureFixture):
-    delete_temporary_repo_git_directory()
-    with tarfile.open('tests/resources/spring-petclinic.git.tgz', 'r:gz') as tar:
-        tar.extractall(path=git_platforms_synchro.TMP_REPO_GIT_DIRECTORY, filter='tar')
+    delete_temporary_repo_git_directory(force_if_test_mode=True)
+    extract_fetched_repo(git_platforms_synchro.TMP_REPO_GIT_DIRECTORY, 'https://github.com/spring-projects/spring-petclinic.git')
     git_platforms_synchro.git_clone('https://github.com/spring-projects/spring-petclinic.git')
 
     assert 'Reusing existing cloned repo https://github.com/spring-projects/spring-petclinic.git' in caplog.text
@@ -156,3 +158,132 @@ def test_clone_proxy_disable_ssl(httpserver: HTTPServer, caplog: LogCaptureFixtu
 
     assert 'Cloning repo ' + clone_url in caplog.text
     assert 'Failed to connect to localhost port ' + proxy_port in caplog.text
+
+
+def extract_bare_origin(tmp_path) -> str:
+    with tarfile.open('tests/resources/spring-petclinic.git.bare.tgz', 'r:gz') as tar:
+        tar.extractall(path=os.path.join(tmp_path, 'origin.git'), filter='tar')
+    return os.path.join(tmp_path, 'origin.git')
+
+
+def test_cache_new_then_fetch(tmp_path, caplog: LogCaptureFixture):
+    origin = extract_bare_origin(tmp_path)
+    cache_dir = os.path.join(tmp_path, 'cache')
+
+    repo = git_platforms_synchro.git_clone(origin, cache_dir=cache_dir)
+    assert repo.bare
+    assert 'Cloning repo ' + origin in caplog.text
+    assert os.path.abspath(repo.git_dir) == os.path.abspath(get_cache_repo_git_directory(cache_dir, origin))
+    assert 'Fetching cached mirror repo' not in caplog.text
+
+    # Second usage (next run), incremental fetch (with prune) instead of clone
+    caplog.clear()
+    repo = git_platforms_synchro.git_clone(origin, mirror=True, cache_dir=cache_dir)
+    assert repo.bare
+    assert 'Fetching cached mirror repo ' + origin in caplog.text
+    assert 'Cloning repo' not in caplog.text
+
+
+def test_cache_concurrent_workers(tmp_path, caplog: LogCaptureFixture):
+    origin = extract_bare_origin(tmp_path)
+    cache_dir = os.path.join(tmp_path, 'cache')
+
+    # Same cached mirror needed by several fetch workers: cloned once, then fetched
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        repos = list(executor.map(lambda _: git_platforms_synchro.git_clone(origin, cache_dir=cache_dir), range(4)))
+    assert 1 == caplog.text.count('Cloning repo ' + origin)
+    assert 3 == caplog.text.count('Fetching cached mirror repo ' + origin)
+    assert 'Discarding invalid cached mirror repo' not in caplog.text
+    assert all(repo.bare and repo.head.commit == repos[0].head.commit for repo in repos)
+
+
+def test_clone_bare_without_worktree(tmp_path):
+    origin = extract_bare_origin(tmp_path)
+
+    repo = git_platforms_synchro.git_clone(origin, git_dir=os.path.join(tmp_path, 'clone'))
+
+    # Branches pushed from remote-tracking ones
+    assert repo.bare
+    assert not git_platforms_synchro.is_mirror(repo)
+    assert 'origin/main' in [ref.name for ref in repo.remote('origin').refs]
+    assert 'refs/remotes/origin/main:refs/heads/main' == git_platforms_synchro.get_branch_refspec(repo, 'main')
+    assert git_platforms_synchro.is_mirror(git_platforms_synchro.git_clone(origin, mirror=True, git_dir=os.path.join(tmp_path, 'mirror')))
+
+
+def test_fetch_delta(tmp_path):
+    # "from" with main updated and a new branch, "to" with previous main
+    origin = extract_bare_origin(tmp_path)
+    to = os.path.join(tmp_path, 'to.git')
+    shutil.copytree(origin, to)
+    repo_from = git_platforms_synchro.Repo(origin)
+    repo_from.git.update_environment(GIT_AUTHOR_NAME='foo', GIT_AUTHOR_EMAIL='foo@bar.dev', GIT_COMMITTER_NAME='foo', GIT_COMMITTER_EMAIL='foo@bar.dev')
+    main = repo_from.git.rev_parse('main')
+    commit = repo_from.git.commit_tree(main + '^{tree}', '-p', main, '-m', 'Update')
+    repo_from.git.update_ref('refs/heads/main', commit)
+    repo_from.git.update_ref('refs/heads/feature', commit)
+    repo_from.git.tag('1.0', commit)
+
+    repo = git_platforms_synchro.git_fetch_delta('file://' + origin, os.path.join(tmp_path, 'delta'), ['main', 'feature'], ['1.0'],
+                                                 clone_url_to='file://' + to, branches_to=['main'])
+
+    assert commit == repo.git.rev_parse('refs/remotes/origin/main')
+    assert commit == repo.git.rev_parse('refs/remotes/origin/feature')
+    assert commit == repo.git.rev_parse('refs/tags/1.0')
+    assert main == repo.git.rev_parse('refs/remotes/sync-to/main')
+    assert 'true' == repo.git.rev_parse('--is-shallow-repository')
+    assert 'refs/remotes/origin/main:refs/heads/main' == git_platforms_synchro.get_branch_refspec(repo, 'main')
+
+
+def test_clone_credentials_env(tmp_path, monkeypatch):
+    origin = extract_bare_origin(tmp_path)
+    monkeypatch.delenv('GIT_USERNAME', raising=False)
+    monkeypatch.delenv('GIT_PASSWORD', raising=False)
+
+    repo = git_platforms_synchro.git_clone(origin, git_dir=os.path.join(tmp_path, 'clone'), env=get_git_credentials_env('foo', 'bar'))
+
+    # Credentials of cloned repository commands only, not of process
+    assert 'foo' == repo.git.environment()['GIT_USERNAME']
+    assert 'GIT_USERNAME' not in os.environ
+    assert 'GIT_PASSWORD' not in os.environ
+
+
+def test_clone_credentials_header(httpserver: HTTPServer, tmp_path):
+    # Credentials sent with first request, without 401 challenge and askpass prompts
+    httpserver.expect_request('/spring-projects/spring-petclinic.git/info/refs', query_string='service=git-upload-pack', method='GET',
+                              headers={'Authorization': 'Basic Zm9vOmJhcg=='}).respond_with_data(status=542)
+    clone_url = get_url_root(httpserver) + '/spring-projects/spring-petclinic.git'
+
+    with raises(GitCommandError, match='The requested URL returned error: 542'):
+        git_platforms_synchro.git_clone(clone_url, git_dir=os.path.join(tmp_path, 'clone'), env=get_git_credentials_env('foo', 'bar', clone_url))
+
+
+def test_cache_invalid_discarded(tmp_path, caplog: LogCaptureFixture):
+    origin = extract_bare_origin(tmp_path)
+    cache_dir = os.path.join(tmp_path, 'cache')
+    os.makedirs(get_cache_repo_git_directory(cache_dir, origin))
+
+    repo = git_platforms_synchro.git_clone(origin, cache_dir=cache_dir)
+
+    assert repo.bare
+    assert 'Discarding invalid cached mirror repo' in caplog.text
+    assert 'Cloning repo ' + origin in caplog.text
+
+
+def test_cache_fetch_error(httpserver: HTTPServer, tmp_path, caplog: LogCaptureFixture):
+    cache_dir = os.path.join(tmp_path, 'cache')
+    clone_url = get_url_root(httpserver) + '/spring-projects/spring-petclinic.git'
+    with tarfile.open('tests/resources/spring-petclinic.git.bare.tgz', 'r:gz') as tar:
+        tar.extractall(path=get_cache_repo_git_directory(cache_dir, clone_url), filter='tar')
+    git_platforms_synchro.Repo(get_cache_repo_git_directory(cache_dir, clone_url)).remote('origin').set_url(clone_url)
+
+    httpserver.expect_request(
+        '/spring-projects/spring-petclinic.git/info/refs',
+        query_string='service=git-upload-pack',
+        method='GET').respond_with_data(
+        status=542)
+
+    with raises(GitCommandError):
+        git_platforms_synchro.git_clone(clone_url, cache_dir=cache_dir)
+
+    assert 'Fetching cached mirror repo ' + clone_url in caplog.text
+    assert '"GET /spring-projects/spring-petclinic.git/info/refs?service=git-upload-pack HTTP/1.1" 542 -' in caplog.text
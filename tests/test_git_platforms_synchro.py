@@ -1,11 +1,17 @@
 import re
 import sys
+import os
+import json
+import tarfile
 import git_platforms_synchro
-from git import GitCommandError
+import modules.profiler as profiler
+import modules.input_parser as input_parser
+from git import GitCommandError, Repo
+from modules.utils import TMP_REPO_GIT_DIRECTORY
 from unittest.mock import patch
 from pytest_httpserver import HTTPServer
 from pytest import LogCaptureFixture, raises
-from tests.test_utils import get_url_root, expect_request, mock_cloned_repo
+from tests.test_utils import get_url_root, expect_request, mock_cloned_repo, load_json, count_requests
 
 
 def get_test_args_github_to_gitea(httpserver: HTTPServer):
@@ -27,8 +33,8 @@ def prepare_github_with_spring_projects(httpserver: HTTPServer, prepare_branches
 
 def prepare_gitea_with_spring_projects(httpserver: HTTPServer, prepare_branches: bool = True, prepare_tags: bool = True, update_commit: bool = False):
     expect_request(httpserver, 'gitea', '/api/v1/users/MyOrg')
-    expect_request(httpserver, 'gitea', '/api/v1/users/MyOrg/repos', query_string='page=1')
-    httpserver.expect_request('/api/v1/users/MyOrg/repos', query_string='page=2').respond_with_json([])
+    expect_request(httpserver, 'gitea', '/api/v1/users/MyOrg/repos', query_string='page=1&limit=50')
+    httpserver.expect_request('/api/v1/users/MyOrg/repos', query_string='page=2&limit=50').respond_with_json([])
     expect_request(httpserver, 'gitea', '/api/v1/repos/MyOrg/spring-petclinic')
     if prepare_branches:
         if update_commit:
@@ -36,15 +42,15 @@ def prepare_gitea_with_spring_projects(httpserver: HTTPServer, prepare_branches:
                 httpserver,
                 'gitea',
                 '/api/v1/repos/MyOrg/spring-petclinic/branches',
-                query_string='page=1',
+                query_string='page=1&limit=50',
                 str_to_replace='6148ddd9671ccab86a3f0ae2dfa77d833b713ee8',
                 str_replacement='bbbbddd9671ccab86a3f0ae2dfa77d833b713ee8')
         else:
-            expect_request(httpserver, 'gitea', '/api/v1/repos/MyOrg/spring-petclinic/branches', query_string='page=1')
-        httpserver.expect_request('/api/v1/repos/MyOrg/spring-petclinic/branches', query_string='page=2').respond_with_json([])
+            expect_request(httpserver, 'gitea', '/api/v1/repos/MyOrg/spring-petclinic/branches', query_string='page=1&limit=50')
+        httpserver.expect_request('/api/v1/repos/MyOrg/spring-petclinic/branches', query_string='page=2&limit=50').respond_with_json([])
     if prepare_tags:
-        expect_request(httpserver, 'gitea', '/api/v1/repos/MyOrg/spring-petclinic/tags', query_string='page=1')
-        httpserver.expect_request('/api/v1/repos/MyOrg/spring-petclinic/tags', query_string='page=2').respond_with_json([])
+        expect_request(httpserver, 'gitea', '/api/v1/repos/MyOrg/spring-petclinic/tags', query_string='page=1&limit=50')
+        httpserver.expect_request('/api/v1/repos/MyOrg/spring-petclinic/tags', query_string='page=2&limit=50').respond_with_json([])
 
 
 def test_git_type_undefined(httpserver: HTTPServer):
@@ -200,7 +206,8 @@ def test_from_github_to_gitea_mirror_create(httpserver: HTTPServer, caplog: LogC
 
     # Gitea with "Empty" org
     expect_request(httpserver, 'gitea', '/api/v1/orgs/MyOrg')
-    httpserver.expect_request('/api/v1/users/MyOrg/repos', query_string='page=1').respond_with_json([])
+    expect_request(httpserver, 'gitea', '/api/v1/users/MyOrg')
+    httpserver.expect_request('/api/v1/users/MyOrg/repos', query_string='page=1&limit=50').respond_with_json([])
     httpserver.expect_oneshot_request('/api/v1/repos/MyOrg/spring-petclinic').respond_with_data(status=404)
     httpserver.expect_request(
         '/api/v1/orgs/MyOrg/repos',
@@ -236,11 +243,12 @@ def test_from_github_to_gitea_mirror_exist(httpserver: HTTPServer, caplog: LogCa
 
     # Gitea with "Empty" org
     expect_request(httpserver, 'gitea', '/api/v1/orgs/MyOrg')
-    httpserver.expect_request('/api/v1/users/MyOrg/repos', query_string='page=1').respond_with_json([])
+    expect_request(httpserver, 'gitea', '/api/v1/users/MyOrg')
+    httpserver.expect_request('/api/v1/users/MyOrg/repos', query_string='page=1&limit=50').respond_with_json([])
 
     # Empty repo on first call and newly created repo at second call ('empty' value not important in this case)
     expect_request(httpserver, 'gitea', '/api/v1/repos/MyOrg/spring-petclinic', str_to_replace='"empty": false,', str_replacement='"empty": true,')
-    httpserver.expect_request('/api/v1/repos/MyOrg/spring-petclinic/branches', query_string='page=1').respond_with_json([])
+    httpserver.expect_request('/api/v1/repos/MyOrg/spring-petclinic/branches', query_string='page=1&limit=50').respond_with_json([])
 
     # httpserver doesn't support KeepAlive, so we need to mock the git clone
     # as already existing bare directory (reuse mechanism) and mock the git
@@ -283,14 +291,34 @@ def test_from_github_to_gitea_sync(httpserver: HTTPServer, caplog: LogCaptureFix
 
     assert 'Reusing existing cloned repo ' + get_url_root(httpserver) + '/spring-projects/spring-petclinic.git' in caplog.text
     assert 'Synchronize branch...' in caplog.text
+    assert 'Push 1 branch(es) and 0 tag(s) to "to" platform...' in caplog.text
+    assert "'push', '--porcelain', '--', 'sync-to', 'refs/remotes/origin/main:refs/heads/main'" in caplog.text
     assert 'The requested URL returned error: 542' in caplog.text
 
 
+def test_from_github_to_gitea_sync_atomic(httpserver: HTTPServer, caplog: LogCaptureFixture):
+    mock_cloned_repo(httpserver, bare=False)
+    httpserver.expect_request(
+        '/MyOrg/spring-petclinic.git/info/refs',
+        query_string='service=git-receive-pack',
+        method='GET').respond_with_data(
+        status=542)
+    prepare_github_with_spring_projects(httpserver)
+    prepare_gitea_with_spring_projects(httpserver, update_commit=True)
+
+    with raises(GitCommandError):
+        with patch.object(sys, 'argv', get_test_args_github_to_gitea(httpserver) + ['--atomic-push']):
+            git_platforms_synchro.main()
+
+    assert "'push', '--porcelain', '--atomic', '--', 'sync-to', 'refs/remotes/origin/main:refs/heads/main'" in caplog.text
+
+
 def test_from_github_to_gitea_tags_only(httpserver: HTTPServer, caplog: LogCaptureFixture):
     # httpserver doesn't support KeepAlive, so we need to mock the git clone
     # as already existing bare directory (reuse mechanism) and mock the git
     # push failure
     mock_cloned_repo(httpserver, bare=False)
+    Repo(TMP_REPO_GIT_DIRECTORY).create_tag('1.5.x', 'refs/remotes/origin/main')
     httpserver.expect_request(
         '/MyOrg/spring-petclinic.git/info/refs',
         query_string='service=git-receive-pack',
@@ -310,9 +338,45 @@ def test_from_github_to_gitea_tags_only(httpserver: HTTPServer, caplog: LogCaptu
 
     assert 'Reusing existing cloned repo ' + get_url_root(httpserver) + '/spring-projects/spring-petclinic.git' in caplog.text
     assert 'All branches already synchronized, do tags only...' in caplog.text
+    assert 'Push 0 branch(es) and 1 tag(s) to "to" platform...' in caplog.text
+    assert "'push', '--porcelain', '--', 'sync-to', '+refs/tags/1.5.x:refs/tags/1.5.x'" in caplog.text
     assert 'The requested URL returned error: 542' in caplog.text
 
 
+def test_from_github_to_gitea_tag_moved_with_branches(httpserver: HTTPServer, caplog: LogCaptureFixture):
+    mock_cloned_repo(httpserver, bare=False)
+    Repo(TMP_REPO_GIT_DIRECTORY).create_tag('1.5.x', 'refs/remotes/origin/main')
+    httpserver.expect_request(
+        '/MyOrg/spring-petclinic.git/info/refs',
+        query_string='service=git-receive-pack',
+        method='GET').respond_with_data(
+        status=542)
+    prepare_github_with_spring_projects(httpserver)
+
+    # Same tags count, but tag on another commit ; and branch to update
+    prepare_gitea_with_spring_projects(httpserver, prepare_tags=False, update_commit=True)
+    expect_request(httpserver, 'gitea', '/api/v1/repos/MyOrg/spring-petclinic/tags', query_string='page=1&limit=50',
+                   str_to_replace='c36452a2c34443ae26b4ecbba4f149906af14717', str_replacement='ccccccc2c34443ae26b4ecbba4f149906af14717')
+    httpserver.expect_request('/api/v1/repos/MyOrg/spring-petclinic/tags', query_string='page=2&limit=50').respond_with_json([])
+
+    with raises(GitCommandError):
+        with patch.object(sys, 'argv', get_test_args_github_to_gitea(httpserver)):
+            git_platforms_synchro.main()
+
+    assert 'Tags to synchronize: 1' in caplog.text
+    assert 'All branches already synchronized, do tags only...' not in caplog.text
+    assert "'push', '--porcelain', '--', 'sync-to', 'refs/remotes/origin/main:refs/heads/main', '+refs/tags/1.5.x:refs/tags/1.5.x'" in caplog.text
+
+
+def test_tags_to_sync():
+    assert [] == git_platforms_synchro.get_tags_to_sync({}, {})
+    assert [] == git_platforms_synchro.get_tags_to_sync({'v1': 'a', 'v2': 'b'}, {'v1': 'a', 'v2': 'b'})
+    # Extra tags on "to" are kept as is
+    assert [] == git_platforms_synchro.get_tags_to_sync({'v1': 'a'}, {'v1': 'a', 'v0': 'z'})
+    assert ['v2'] == git_platforms_synchro.get_tags_to_sync({'v1': 'a', 'v2': 'b'}, {'v1': 'a'})
+    assert ['v1', 'v2'] == git_platforms_synchro.get_tags_to_sync({'v1': 'a', 'v2': 'b'}, {'v1': 'c', 'v3': 'b'})
+
+
 def test_from_github_to_gitea_all_already_sync(httpserver: HTTPServer, caplog: LogCaptureFixture):
     # GitHub with spring-projects
     prepare_github_with_spring_projects(httpserver)
@@ -327,3 +391,243 @@ def test_from_github_to_gitea_all_already_sync(httpserver: HTTPServer, caplog: L
     assert 'Synchronize branch...' not in caplog.text
     assert 'All branches already synchronized, do tags only...' not in caplog.text
     assert 'Git Platforms Synchronization finished sucessfully. Repos updated: 0/1. Branches updated: 0/2' in caplog.text
+    assert 'API requests by host:' in caplog.text
+    assert re.search(r'localhost:\d+: \d+ requests, 0 throttled, 0 retries.', caplog.text)
+
+
+def test_from_github_to_gitea_state_file(httpserver: HTTPServer, caplog: LogCaptureFixture, tmp_path):
+    prepare_github_with_spring_projects(httpserver)
+    prepare_gitea_with_spring_projects(httpserver)
+    testargs = get_test_args_github_to_gitea(httpserver) + ['--state-file', str(tmp_path / 'state.json')]
+
+    with patch.object(sys, 'argv', testargs):
+        git_platforms_synchro.main()
+    assert 'Already synchronized.' in caplog.text
+    assert 1 == count_requests(httpserver, '/repos/spring-projects/spring-petclinic/branches')
+
+    # Second run, "from" repository last activity unchanged
+    caplog.clear()
+    with patch.object(sys, 'argv', testargs):
+        git_platforms_synchro.main()
+    assert 'Repository unchanged on "from" platform since last synchronization, skipping.' in caplog.text
+    assert 'Already synchronized.' not in caplog.text
+    assert 1 == count_requests(httpserver, '/repos/spring-projects/spring-petclinic/branches')
+    assert 'Git Platforms Synchronization finished sucessfully. Repos updated: 0/1. Branches updated: 0/0' in caplog.text
+
+
+def test_from_github_to_gitea_scan_concurrency(httpserver: HTTPServer, caplog: LogCaptureFixture):
+    prepare_github_with_spring_projects(httpserver)
+    prepare_gitea_with_spring_projects(httpserver)
+
+    with patch.object(sys, 'argv', get_test_args_github_to_gitea(httpserver) + ['--scan-concurrency', '4']):
+        git_platforms_synchro.main()
+
+    assert 'Scanning 1 repositories metadata...' in caplog.text
+    assert 'Already synchronized.' in caplog.text
+    # Scanned branches not requested again by synchronization
+    assert 1 == count_requests(httpserver, '/repos/spring-projects/spring-petclinic/branches')
+    assert 1 == count_requests(httpserver, '/repos/spring-projects/spring-petclinic/tags')
+    assert 'Git Platforms Synchronization finished sucessfully. Repos updated: 0/1. Branches updated: 0/2' in caplog.text
+
+
+def test_from_github_to_gitea_config_pairs(httpserver: HTTPServer, caplog: LogCaptureFixture, tmp_path):
+    prepare_github_with_spring_projects(httpserver)
+    prepare_gitea_with_spring_projects(httpserver)
+    # Same organizations synchronized by two pairs, with different branches
+    config = tmp_path / 'config.toml'
+    config.write_text('''
+[defaults]
+from-url = "{url}"
+from-type = "GitHub"
+from-login = "foo"
+from-password = "bar"
+to-url = "{url}"
+to-type = "Gitea"
+to-login = "foo"
+to-password = "bar"
+from-org = "spring-projects"
+to-org = "MyOrg"
+repos-include = "spring-petclinic"
+state-file = "{state}"
+
+[[pairs]]
+branches-include = "main"
+
+[[pairs]]
+branches_include = ["springboot3", "not-existing"]
+'''.format(url=get_url_root(httpserver), state=tmp_path / 'state.json'))
+
+    with patch.object(sys, 'argv', ['prog', '--config', str(config), '--scan-concurrency', '4']):
+        git_platforms_synchro.main()
+
+    # Platforms clients shared by pairs: organizations listed once
+    assert 1 == count_requests(httpserver, '/users/spring-projects/repos')
+    # Two pages
+    assert 2 == count_requests(httpserver, '/api/v1/users/MyOrg/repos')
+    assert 'Synchronization pair 2/2:' in caplog.text
+    assert 'Scanning 2 repositories metadata...' in caplog.text
+    assert '{0} spring-projects -> {0} MyOrg: Repos updated: 0/1. Branches updated: 0/1.'.format(get_url_root(httpserver)) in caplog.text
+    with open(tmp_path / 'state.json') as f:
+        assert 2 == len(json.load(f))
+    assert 'Git Platforms Synchronization finished sucessfully. Repos updated: 0/2. Branches updated: 0/2' in caplog.text
+
+
+def test_from_github_to_gitea_reports(httpserver: HTTPServer, caplog: LogCaptureFixture, tmp_path):
+    prepare_github_with_spring_projects(httpserver)
+    prepare_gitea_with_spring_projects(httpserver)
+
+    testargs = get_test_args_github_to_gitea(httpserver) + ['--report-file', str(tmp_path / 'report.json'), '--prometheus-file', str(tmp_path / 'metrics.prom')]
+    with patch.object(sys, 'argv', testargs):
+        git_platforms_synchro.main()
+
+    with open(tmp_path / 'report.json') as f:
+        report = json.load(f)
+    assert {'repos_scanned': 1, 'repos_updated': 0, 'branches_scanned': 2, 'branches_updated': 0} == report['counters']
+    assert 2 == report['phases']['list_repos']['calls']
+    assert 2 == report['repos']['spring-projects/spring-petclinic -> MyOrg']['phases']['list_branches']['calls']
+    assert 1 == report['methods']['from.get_tags']['calls']
+    assert report['http'][get_url_root(httpserver).split('://')[1]]['received_bytes'] > 0
+    with open(tmp_path / 'metrics.prom') as f:
+        assert 'git_platforms_synchro_client_calls_total{platform="to",method="get_branches"} 1\n' in f.read()
+    assert 'Git Platforms Synchronization finished sucessfully. Repos updated: 0/1. Branches updated: 0/2' in caplog.text
+
+
+def test_from_github_to_gitea_profile(httpserver: HTTPServer, caplog: LogCaptureFixture, tmp_path):
+    prepare_github_with_spring_projects(httpserver)
+    prepare_gitea_with_spring_projects(httpserver)
+
+    with patch.object(sys, 'argv', get_test_args_github_to_gitea(httpserver) + ['--scan-concurrency', '4', '--profile', str(tmp_path)]):
+        git_platforms_synchro.main()
+
+    assert 'Profiles written to {}, threads time by phase:'.format(tmp_path) in caplog.text
+    with open(tmp_path / 'summary.txt') as f:
+        assert f.readline().startswith('phase git_seconds')
+    assert 'Git Platforms Synchronization finished sucessfully. Repos updated: 0/1. Branches updated: 0/2' in caplog.text
+
+
+def test_from_github_profile_listing_failure(httpserver: HTTPServer, tmp_path):
+    # GitHub organization not found
+    with patch.object(sys, 'argv', get_test_args_github_to_gitea(httpserver) + ['--profile', str(tmp_path)]):
+        with raises(Exception):
+            git_platforms_synchro.main()
+
+    # Profiler stopped, profiles until failure written
+    assert profiler._profiler is None
+    assert (tmp_path / 'summary.txt').exists()
+
+
+def test_from_github_to_gitea_server_import(httpserver: HTTPServer, caplog: LogCaptureFixture, tmp_path):
+    # GitHub with spring-projects, 'spring-ai-examples' described as 'spring-petclinic' copy, not existing on Gitea
+    prepare_github_with_spring_projects(httpserver)
+    httpserver.expect_request('/repos/spring-projects/spring-ai-examples').respond_with_json(
+        load_json('tests/http_mocks/github/repos/spring-projects/spring-petclinic.json', 'spring-petclinic', 'spring-ai-examples'))
+    prepare_gitea_with_spring_projects(httpserver)
+    httpserver.expect_request('/api/v1/repos/MyOrg/spring-ai-examples').respond_with_data(status=404)
+    httpserver.expect_request('/api/v1/repos/migrate', method='POST').respond_with_json(status=201, response_json={'id': 42, 'name': 'spring-ai-examples'})
+
+    testargs = get_test_args_github_to_gitea(httpserver) + ['--server-import', '--repos-include', 'spring-petclinic,spring-ai-examples',
+                                                            '--report-file', str(tmp_path / 'report.json')]
+    with patch.object(sys, 'argv', testargs):
+        git_platforms_synchro.main()
+
+    # Imported by Gitea, not cloned and pushed by runner
+    assert 1 == count_requests(httpserver, '/api/v1/repos/migrate', 'POST')
+    assert 'Server-side import of repository spring-ai-examples finished.' in caplog.text
+    assert 'Push repository spring-ai-examples as mirror' not in caplog.text
+    assert 'Server-side imports: 1 requested, 0 failed.' in caplog.text
+    with open(tmp_path / 'report.json') as f:
+        assert 1 == json.load(f)['methods']['to.import_repo']['calls']
+    assert 'Git Platforms Synchronization finished sucessfully. Repos updated: 1/2. Branches updated: 0/2' in caplog.text
+
+
+def test_from_github_to_gitea_server_import_failed(httpserver: HTTPServer, caplog: LogCaptureFixture, tmp_path):
+    prepare_github_with_spring_projects(httpserver)
+    httpserver.expect_request('/repos/spring-projects/spring-ai-examples').respond_with_json(
+        load_json('tests/http_mocks/github/repos/spring-projects/spring-petclinic.json', 'spring-petclinic', 'spring-ai-examples'))
+    prepare_gitea_with_spring_projects(httpserver)
+    httpserver.expect_request('/api/v1/repos/MyOrg/spring-ai-examples').respond_with_data(status=404)
+    httpserver.expect_request('/api/v1/repos/migrate', method='POST').respond_with_data(status=500)
+
+    testargs = get_test_args_github_to_gitea(httpserver) + ['--server-import', '--repos-include', 'spring-petclinic,spring-ai-examples',
+                                                            '--state-file', str(tmp_path / 'state.json')]
+    with patch.object(sys, 'argv', testargs):
+        assert 1 == git_platforms_synchro.main()
+
+    assert 'Server-side imports: 1 requested, 1 failed.' in caplog.text
+    assert 'Git Platforms Synchronization finished with 1 failed server-side import(s). Repos updated: 1/2. Branches updated: 0/2.' in caplog.text
+    assert 'finished sucessfully' not in caplog.text
+    # Synchronized repository state saved, failed one synchronized again on next run
+    with open(tmp_path / 'state.json') as f:
+        assert ['spring-petclinic'] == [repo for scope in json.load(f).values() for repo in scope]
+
+
+def test_from_github_to_gitea_parallel_jobs(httpserver: HTTPServer, caplog: LogCaptureFixture):
+    # GitHub with spring-projects, 'spring-ai-examples' described as 'spring-petclinic' copy
+    prepare_github_with_spring_projects(httpserver)
+    httpserver.expect_request('/repos/spring-projects/spring-ai-examples').respond_with_json(
+        load_json('tests/http_mocks/github/repos/spring-projects/spring-petclinic.json', 'spring-petclinic', 'spring-ai-examples'))
+
+    # Gitea with same repo, 'spring-ai-examples' not existing
+    prepare_gitea_with_spring_projects(httpserver)
+    httpserver.expect_request('/api/v1/repos/MyOrg/spring-ai-examples').respond_with_data(status=404)
+
+    testargs = get_test_args_github_to_gitea(httpserver) + ['--dry-run', '--jobs', '2', '--repos-include', 'spring-petclinic,spring-ai-examples']
+    with patch.object(sys, 'argv', testargs):
+        git_platforms_synchro.main()
+
+    assert 'Repository: spring-ai-examples' in caplog.text
+    assert 'Repository does not exist on "to" plaform, create as mirror...' in caplog.text
+    assert 'Dry-run mode, skipping repository creation and mirroring.' in caplog.text
+    assert 'Already synchronized.' in caplog.text
+    assert 'Git Platforms Synchronization finished sucessfully. Repos updated: 1/2. Branches updated: 0/2' in caplog.text
+
+
+class LocalGitClient:
+    # Platform of local bare repositories ('<root>/<org>/<repo>.git'), "to" ones having an 'other' branch only
+    def __init__(self, root: str, branches: dict = None):
+        self.root = root
+        self.branches = branches
+
+    def get_repo_clone_url(self, org: str, repo: str) -> str:
+        return os.path.join(self.root, org, repo + '.git')
+
+    def has_repo(self, org: str, repo: str) -> bool:
+        return True
+
+    def get_branches(self, org: str, repo: str) -> dict:
+        if self.branches is not None:
+            return self.branches
+        return {ref.remote_head if ref.is_remote() else ref.name: ref.commit.hexsha for ref in Repo(self.get_repo_clone_url(org, repo)).references}
+
+    def get_tags(self, org: str, repo: str) -> dict:
+        return {}
+
+    def get_login_or_token(self) -> str:
+        return None
+
+    def get_password(self) -> str:
+        return None
+
+
+def test_pairs_same_from_repo_cache_dir(tmp_path):
+    # "from" repository synchronized to two organizations, by pairs sharing its cached mirror, in parallel
+    with tarfile.open('tests/resources/spring-petclinic.git.bare.tgz', 'r:gz') as tar:
+        tar.extractall(path=os.path.join(tmp_path, 'spring-projects', 'spring-petclinic.git'), filter='tar')
+    git_from = LocalGitClient(str(tmp_path))
+    git_to = LocalGitClient(str(tmp_path), {'other': '0'})
+    for org in ['OrgA', 'OrgB']:
+        Repo.init(git_to.get_repo_clone_url(org, 'spring-petclinic'), bare=True)
+
+    pairs = []
+    for org in ['OrgA', 'OrgB']:
+        args = input_parser.parse(['--from-url', 'from', '--from-org', 'spring-projects', '--to-url', 'to', '--to-login', 'foo', '--to-org', org,
+                                   '--cache-dir', str(tmp_path / 'cache'), '--jobs', '2'])
+        pairs.append(git_platforms_synchro.SyncPair(args, git_from, git_to, ['spring-petclinic']))
+    for _ in range(5):
+        for org in ['OrgA', 'OrgB']:
+            Repo(git_to.get_repo_clone_url(org, 'spring-petclinic')).git.update_ref('-d', 'refs/heads/main')
+        assert [[(1, 1, 1)], [(1, 1, 1)]] == git_platforms_synchro.repos_sync_pipeline(pairs[0].args, pairs)
+
+        # Each pair pushed to its own "to" repository
+        for org in ['OrgA', 'OrgB']:
+            assert git_from.get_branches('spring-projects', 'spring-petclinic')['main'] == Repo(git_to.get_repo_clone_url(org, 'spring-petclinic')).heads.main.commit.hexsha
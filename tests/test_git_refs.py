@@ -0,0 +1,73 @@
+import os
+import tarfile
+from git import Repo
+from modules.git_clients import GitClient
+from modules.git_refs import LsRemoteGitClient, parse_ls_remote
+from modules.utils import get_git_credentials_env, GIT_ASKPASS_SCRIPT
+
+MAIN_COMMIT = '5f5879f1ec02aec551c03da2a66bea03c5b34d97'
+
+
+class LocalGitClient(GitClient):
+    # Platform repositories as local bare repositories (ls-remote only)
+    def __init__(self, path: str):
+        self.path = path
+        self.clone_url_requests = 0
+
+    def get_repo_clone_url(self, org: str, repo: str) -> str:
+        self.clone_url_requests += 1
+        return self.path
+
+
+def test_parse_ls_remote():
+    output = '\n'.join([
+        'aaaa\tHEAD',
+        'bbbb\trefs/heads/main',
+        'cccc\trefs/heads/feature/foo',
+        'dddd\trefs/tags/1.0',
+        'eeee\trefs/tags/1.0^{}',
+        'ffff\trefs/tags/2.0',
+        '1111\trefs/pull/1/head'])
+    branches, tags = parse_ls_remote(output)
+    assert {'main': 'bbbb', 'feature/foo': 'cccc'} == branches
+    assert {'1.0': 'eeee', '2.0': 'ffff'} == tags
+
+
+def test_ls_remote_client(tmp_path):
+    origin = os.path.join(tmp_path, 'origin.git')
+    with tarfile.open('tests/resources/spring-petclinic.git.bare.tgz', 'r:gz') as tar:
+        tar.extractall(path=origin, filter='tar')
+    repo = Repo(origin)
+    repo.git.tag('lightweight', MAIN_COMMIT)
+    with repo.config_writer() as config:
+        config.set_value('user', 'name', 'foo')
+        config.set_value('user', 'email', 'foo@bar.dev')
+    repo.create_tag('annotated', MAIN_COMMIT, message='Annotated tag')
+    repo.git.update_ref('refs/pull/1/head', MAIN_COMMIT)
+
+    local = LocalGitClient(origin)
+    client = LsRemoteGitClient(local)
+
+    assert {'main': MAIN_COMMIT} == client.get_branches('MyOrg', 'spring-petclinic')
+    assert {'lightweight': MAIN_COMMIT, 'annotated': MAIN_COMMIT} == client.get_tags('MyOrg', 'spring-petclinic')
+    # Single ls-remote for branches and tags, other methods delegated
+    assert 1 == local.clone_url_requests
+    assert origin == client.get_repo_clone_url('MyOrg', 'spring-petclinic')
+
+
+def test_git_credentials_env():
+    assert '' == get_git_credentials_env(None, None)['GIT_ASKPASS']
+    env = get_git_credentials_env('foo', 'bar')
+    assert GIT_ASKPASS_SCRIPT == env['GIT_ASKPASS']
+    assert 'foo' == env['GIT_USERNAME']
+    assert 'bar' == env['GIT_PASSWORD']
+    assert '0' == env['GIT_TERMINAL_PROMPT']
+    assert '0' == env['GIT_CONFIG_COUNT']
+
+    # Authorization header limited to repository URL, not for local paths
+    env = get_git_credentials_env('foo', 'bar', 'https://git.company.com/MyOrg/foo.git')
+    assert '1' == env['GIT_CONFIG_COUNT']
+    assert 'http.https://git.company.com/MyOrg/foo.git.extraHeader' == env['GIT_CONFIG_KEY_0']
+    assert 'Authorization: Basic Zm9vOmJhcg==' == env['GIT_CONFIG_VALUE_0']
+    assert '0' == get_git_credentials_env('foo', 'bar', '/tmp/foo.git')['GIT_CONFIG_COUNT']
+    assert '0' == get_git_credentials_env(None, None, 'https://git.company.com/MyOrg/foo.git')['GIT_CONFIG_COUNT']
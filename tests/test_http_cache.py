@@ -0,0 +1,118 @@
+import os
+import json
+import requests
+from werkzeug import Request, Response
+from pytest_httpserver import HTTPServer
+from modules.git_clients import GitClientFactory
+from modules.http_cache import HttpCache, CachingHTTPAdapter
+from tests.test_utils import get_url_root, load_json
+
+
+def etag_handler(body: str, etag: str = '"v1"'):
+    def handler(request: Request) -> Response:
+        if request.headers.get('If-None-Match') == etag:
+            return Response(status=304, headers={'ETag': etag})
+        return Response(body, status=200, headers={'ETag': etag, 'Content-Type': 'application/json'})
+    return handler
+
+
+def test_conditional_request(httpserver: HTTPServer, tmp_path):
+    httpserver.expect_request('/api/v1/users/MyOrg/repos').respond_with_handler(etag_handler('[{"name": "spring-petclinic"}]'))
+    adapter = CachingHTTPAdapter(HttpCache(str(tmp_path)))
+    session = requests.Session()
+    session.mount('http://', adapter)
+
+    assert [{'name': 'spring-petclinic'}] == session.get(httpserver.url_for('/api/v1/users/MyOrg/repos')).json()
+    response = session.get(httpserver.url_for('/api/v1/users/MyOrg/repos'))
+    assert 200 == response.status_code
+    assert [{'name': 'spring-petclinic'}] == response.json()
+    assert 1 == adapter.not_modified
+    assert '"v1"' == httpserver.log[1][0].headers.get('If-None-Match')
+    assert 304 == httpserver.log[1][1].status_code
+
+    # Kept between runs, other credentials not sharing entries
+    adapter = CachingHTTPAdapter(HttpCache(str(tmp_path)))
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.get(httpserver.url_for('/api/v1/users/MyOrg/repos'))
+    assert 1 == adapter.not_modified
+    session.get(httpserver.url_for('/api/v1/users/MyOrg/repos'), auth=('foo', 'bar'))
+    assert 1 == adapter.not_modified
+    assert 2 == len(adapter.cache)
+
+
+def test_no_validator_not_cached(httpserver: HTTPServer, tmp_path):
+    httpserver.expect_request('/api/v1/users/MyOrg').respond_with_json({'login': 'MyOrg'})
+    adapter = CachingHTTPAdapter(HttpCache(str(tmp_path)))
+    session = requests.Session()
+    session.mount('http://', adapter)
+
+    session.get(httpserver.url_for('/api/v1/users/MyOrg'))
+    assert 0 == len(adapter.cache)
+
+
+def test_size_eviction(tmp_path):
+    cache = HttpCache(str(tmp_path), max_size=10)
+    cache.put('a', {'etag': '"a"', 'headers': {}}, b'12345')
+    cache.put('b', {'etag': '"b"', 'headers': {}}, b'12345')
+    # 'a' most recently used, 'b' evicted
+    assert b'12345' == cache.get('a')[1]
+    cache.put('c', {'etag': '"c"', 'headers': {}}, b'12345')
+    assert cache.get('b') == (None, None)
+    assert 2 == len(cache)
+    assert 10 == cache.size()
+    assert not os.path.exists(os.path.join(tmp_path, 'b.body'))
+
+    # Bigger than cache never stored, replacing previous entry
+    cache.put('d', {'etag': '"d"', 'headers': {}}, b'12345678901')
+    assert cache.get('d') == (None, None)
+    cache.put('c', {'etag': '"c2"', 'headers': {}}, b'12345678901')
+    assert cache.get('c') == (None, None)
+    assert 1 == len(cache)
+    assert 5 == cache.size()
+    cache.put('c', {'etag': '"c"', 'headers': {}}, b'12345')
+
+    # Reloaded from disk with same bound
+    assert 2 == len(HttpCache(str(tmp_path), max_size=10))
+    assert 1 == len(HttpCache(str(tmp_path), max_size=5))
+
+
+def test_key_credentials():
+    def key(headers: dict) -> str:
+        return HttpCache.key(requests.Request('GET', 'http://localhost/api/v4/projects', headers=headers).prepare())
+
+    assert key({}) == key({'Accept': 'application/json'})
+    assert key({'PRIVATE-TOKEN': 'foo'}) == key({'private-token': 'foo'})
+    keys = [key({}), key({'Authorization': 'token foo'}), key({'PRIVATE-TOKEN': 'foo'}), key({'PRIVATE-TOKEN': 'bar'}),
+            key({'JOB-TOKEN': 'foo'}), key({'Cookie': 'session=foo'}), key({'X-Auth-Token': 'foo'})]
+    assert len(keys) == len(set(keys))
+
+
+def test_github_client_conditional_request(httpserver: HTTPServer, tmp_path):
+    repos = load_json('tests/http_mocks/github/users/spring-projects/repos.json', 'https://api.github.com', get_url_root(httpserver))
+    httpserver.expect_request('/users/spring-projects').respond_with_json(
+        load_json('tests/http_mocks/github/users/spring-projects.json', 'https://api.github.com', get_url_root(httpserver)))
+    httpserver.expect_request('/users/spring-projects/repos').respond_with_handler(etag_handler(json.dumps(repos)))
+    httpserver.expect_request('/repos/spring-projects/spring-petclinic/branches').respond_with_handler(
+        etag_handler(json.dumps(load_json('tests/http_mocks/github/repos/spring-projects/spring-petclinic/branches.json', 'https://api.github.com', get_url_root(httpserver)))))
+    adapter = CachingHTTPAdapter(HttpCache(str(tmp_path)))
+    github = GitClientFactory.create_client(get_url_root(httpserver), 'github', 'ghu_xxxx')
+    github.mount_http_adapter(adapter)
+
+    assert 30 == len(github.get_repos('spring-projects'))
+    assert 30 == len(github.get_repos('spring-projects'))
+    assert 1 == adapter.not_modified
+    # Also mounted for repositories built without request
+    assert 8 == len(github.get_branches('spring-projects', 'spring-petclinic'))
+    assert 8 == len(github.get_branches('spring-projects', 'spring-petclinic'))
+    assert 2 == adapter.not_modified
+
+
+def test_clients_sessions_mount(tmp_path):
+    adapter = CachingHTTPAdapter(HttpCache(str(tmp_path)))
+    bitbucket = GitClientFactory.create_client('https://fake.url.dev', 'bitbucket', 'login', 'password')
+    gitea = GitClientFactory.create_client('https://fake.url.dev', 'gitea', 'login', 'password')
+    gitlab = GitClientFactory.create_client('https://fake.url.dev', 'gitlab', 'login', 'password')
+    for client, session in ((bitbucket, bitbucket.bitbucket._session), (gitea, gitea.gitea.requests), (gitlab, gitlab.gitlab.session)):
+        client.mount_http_adapter(adapter)
+        assert adapter is session.get_adapter('https://fake.url.dev/api')
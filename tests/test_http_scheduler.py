@@ -0,0 +1,113 @@
+import requests
+from pytest_httpserver import HTTPServer
+from pytest import approx
+from modules.http_scheduler import RateLimitScheduler, ScheduledHTTPAdapter
+
+
+class FakeClock:
+    def __init__(self, now: float):
+        self.now = now
+        self.sleeps = []
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, delay: float):
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+def create_session(scheduler: RateLimitScheduler) -> requests.Session:
+    session = requests.Session()
+    session.mount('http://', ScheduledHTTPAdapter(scheduler))
+    return session
+
+
+def test_retry_after(httpserver: HTTPServer):
+    httpserver.expect_oneshot_request('/repos').respond_with_data(status=429, headers={'Retry-After': '2'})
+    httpserver.expect_request('/repos').respond_with_json([])
+    sleeps = []
+    scheduler = RateLimitScheduler(max_concurrency=4, backoff_base=0.5, sleep=sleeps.append)
+
+    assert 200 == create_session(scheduler).get(httpserver.url_for('/repos')).status_code
+    assert 1 == len(sleeps)
+    assert 2 <= sleeps[0] <= 2.5
+    report = scheduler.report()[0]
+    assert 2 == report['requests']
+    assert 1 == report['throttled']
+    assert 1 == report['retries']
+
+
+def test_forbidden_not_retried(httpserver: HTTPServer):
+    httpserver.expect_request('/repos').respond_with_data(status=403)
+    sleeps = []
+    scheduler = RateLimitScheduler(sleep=sleeps.append)
+
+    assert 403 == create_session(scheduler).get(httpserver.url_for('/repos')).status_code
+    assert 0 == len(sleeps)
+    assert 0 == scheduler.report()[0]['throttled']
+
+
+def test_max_retries_jittered_backoff(httpserver: HTTPServer):
+    httpserver.expect_request('/repos').respond_with_data(status=429)
+    sleeps = []
+    scheduler = RateLimitScheduler(max_retries=3, backoff_base=1, backoff_max=3, sleep=sleeps.append)
+
+    assert 429 == create_session(scheduler).get(httpserver.url_for('/repos')).status_code
+    assert 3 == len(sleeps)
+    assert all(0 <= delay <= bound for delay, bound in zip(sleeps, [1, 2, 3]))
+    assert 4 == scheduler.report()[0]['requests']
+
+
+def test_exhausted_budget_wait_reset(httpserver: HTTPServer):
+    headers = {'X-RateLimit-Limit': '5000', 'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': '1030'}
+    httpserver.expect_oneshot_request('/repos').respond_with_data(status=403, headers=headers)
+    httpserver.expect_request('/repos').respond_with_json([], headers={'X-RateLimit-Limit': '5000', 'X-RateLimit-Remaining': '4999', 'X-RateLimit-Reset': '4600'})
+    clock = FakeClock(1000)
+    scheduler = RateLimitScheduler(backoff_base=0.5, sleep=clock.sleep, clock=clock.time)
+
+    assert 200 == create_session(scheduler).get(httpserver.url_for('/repos')).status_code
+    # Waiting budget reset before retry
+    assert 1 == len(clock.sleeps)
+    assert 30 <= clock.sleeps[0] <= 30.5
+    assert 1 == scheduler.report()[0]['retries']
+
+
+def test_budget_consumed_and_pacing(httpserver: HTTPServer):
+    httpserver.expect_oneshot_request('/repos').respond_with_json([], headers={'RateLimit-Limit': '100', 'RateLimit-Remaining': '12', 'RateLimit-Reset': '1100'})
+    httpserver.expect_oneshot_request('/repos').respond_with_json([], headers={'RateLimit-Limit': '100', 'RateLimit-Remaining': '10', 'RateLimit-Reset': '1100'})
+    httpserver.expect_request('/repos').respond_with_json([], headers={'RateLimit-Limit': '100', 'RateLimit-Remaining': '10', 'RateLimit-Reset': '1100'})
+    sleeps = []
+    scheduler = RateLimitScheduler(sleep=sleeps.append, clock=lambda: 1000)
+    session = create_session(scheduler)
+
+    for _ in range(3):
+        session.get(httpserver.url_for('/repos'))
+    report = scheduler.report()[0]
+    assert 2 == report['consumed']
+    assert 10 == report['remaining']
+    assert 100 == report['limit']
+    # Low budget (10%), next requests spread until reset
+    assert [approx(10.0)] == sleeps
+
+
+def test_aimd_concurrency():
+    scheduler = RateLimitScheduler(max_concurrency=8, sleep=lambda delay: None)
+    throttled = requests.Response()
+    throttled.status_code = 429
+    ok = requests.Response()
+    ok.status_code = 200
+
+    scheduler.acquire('host')
+    scheduler.release('host', throttled)
+    assert 4 == scheduler.hosts['host'].concurrency
+    scheduler.acquire('host')
+    scheduler.release('host', throttled)
+    assert 2 == scheduler.hosts['host'].concurrency
+    scheduler.acquire('host')
+    scheduler.release('host', ok)
+    assert 2.5 == scheduler.hosts['host'].concurrency
+    for _ in range(100):
+        scheduler.acquire('host')
+        scheduler.release('host', ok)
+    assert 8 == scheduler.hosts['host'].concurrency
@@ -0,0 +1,85 @@
+import time
+import requests
+import threading
+from pytest import raises, mark
+from pytest_httpserver import HTTPServer
+from werkzeug import Request, Response
+from concurrent.futures import ThreadPoolExecutor
+from modules.git_clients import GitClientFactory
+from modules.http_transport import PooledHTTPAdapter, HTTP2_AVAILABLE, enable_http2
+from tests.test_utils import get_url_root
+
+
+def test_pool_configuration():
+    adapter = PooledHTTPAdapter(pool_size=4, retries=2)
+    assert 4 == adapter._pool_maxsize
+    assert 4 == adapter._pool_connections
+    assert 2 == adapter.max_retries.total
+    # HTTP status retries done by requests scheduler
+    assert 0 == adapter.max_retries.status
+
+
+def test_connections_report(httpserver: HTTPServer):
+    httpserver.expect_request('/api/v1/users/MyOrg').respond_with_json({'login': 'MyOrg'})
+    adapter = PooledHTTPAdapter()
+    session = requests.Session()
+    session.mount('http://', adapter)
+
+    for _ in range(3):
+        session.get(httpserver.url_for('/api/v1/users/MyOrg'))
+
+    report = adapter.connections_report()
+    assert 1 == len(report)
+    assert get_url_root(httpserver).split('//')[1] == report[0]['host']
+    assert 3 == report[0]['requests']
+    assert report[0]['requests'] - report[0]['connections'] == report[0]['reused']
+
+
+@mark.skipif(HTTP2_AVAILABLE, reason='"h2" python dependency installed')
+def test_http2_unavailable():
+    with raises(ValueError, match='HTTP/2 requires "h2" python dependency'):
+        enable_http2()
+
+
+def test_github_concurrent_requests(httpserver: HTTPServer):
+    for login in ('foo', 'bar'):
+        httpserver.expect_request('/users/' + login).respond_with_json({'login': login})
+    github = GitClientFactory.create_client(get_url_root(httpserver), 'github', 'ghu_xxxx')
+    github.mount_http_adapter(PooledHTTPAdapter())
+
+    def get_login(login: str) -> str:
+        return github.github.requester.requestJsonAndCheck('GET', '/users/' + login)[1]['login']
+
+    logins = ['foo', 'bar'] * 20
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert logins == list(executor.map(get_login, logins))
+
+
+def test_github_concurrent_requests_overlap():
+    # Slow responses, served by threads: requests of client threads are sent together
+    server = HTTPServer(threaded=True)
+    server.start()
+    running = []
+    overlaps = []
+    lock = threading.Lock()
+
+    def handler(request: Request) -> Response:
+        with lock:
+            running.append(request.path)
+            overlaps.append(len(running))
+        time.sleep(0.2)
+        with lock:
+            running.remove(request.path)
+        return Response('{"login": "foo"}', content_type='application/json')
+
+    server.expect_request('/users/foo').respond_with_handler(handler)
+    try:
+        github = GitClientFactory.create_client(get_url_root(server), 'github', 'ghu_xxxx')
+        github.mount_http_adapter(PooledHTTPAdapter())
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda _: github.github.requester.requestJsonAndCheck('GET', '/users/foo'), range(8)))
+    finally:
+        server.clear()
+        server.stop()
+    assert 8 == len(overlaps)
+    assert max(overlaps) > 1
@@ -1,7 +1,7 @@
 import sys
 import modules.input_parser as input_parser
 from unittest.mock import patch
-from pytest import LogCaptureFixture
+from pytest import LogCaptureFixture, raises
 
 
 def test_parsing_required():
@@ -13,6 +13,123 @@ def test_parsing_required():
     assert args.from_disable_ssl_verify is False
     assert args.to_disable_ssl_verify is False
     assert args.dry_run is False
+    assert args.jobs == 1
+    assert args.fetch_jobs == 1
+
+
+def test_parsing_stage_jobs():
+    testargs = ['prog', '--from-url', 'https://from.git.com', '--to-url', 'https://to.git.com', '--to-login', 'foo', '--from-org', 'my-org', '--to-org', 'my-org',
+                '--jobs', '4', '--push-jobs', '2']
+    with patch.object(sys, 'argv', testargs):
+        args = input_parser.parse()
+
+    assert (4, 4, 2, 4) == (args.metadata_jobs, args.fetch_jobs, args.push_jobs, args.queue_size)
+
+
+def test_parsing_jobs_not_positive():
+    testargs = ['prog', '--from-url', 'https://from.git.com', '--to-url', 'https://to.git.com', '--to-login', 'foo', '--from-org', 'my-org', '--to-org', 'my-org',
+                '--jobs', '0']
+    with patch.object(sys, 'argv', testargs):
+        with raises(SystemExit):
+            input_parser.parse()
+
+
+def test_parsing_limits_not_positive():
+    for option in ['--api-cache-size', '--server-import-max-concurrency', '--api-max-concurrency']:
+        testargs = ['prog', '--from-url', 'https://from.git.com', '--to-url', 'https://to.git.com', '--to-login', 'foo', '--from-org', 'my-org', '--to-org', 'my-org',
+                    option, '0']
+        with patch.object(sys, 'argv', testargs):
+            with raises(SystemExit):
+                input_parser.parse()
+
+
+def test_parsing_scan_concurrency_negative(capsys):
+    testargs = ['prog', '--from-url', 'https://from.git.com', '--to-url', 'https://to.git.com', '--to-login', 'foo', '--from-org', 'my-org', '--to-org', 'my-org',
+                '--scan-concurrency', '0']
+    with patch.object(sys, 'argv', testargs):
+        assert 0 == input_parser.parse().scan_concurrency
+    with patch.object(sys, 'argv', testargs[:-1] + ['-1']):
+        with raises(SystemExit):
+            input_parser.parse()
+    assert '-1 is not a non-negative integer' in capsys.readouterr().err
+
+
+def test_parsing_profile_phases_unknown(capsys):
+    testargs = ['prog', '--from-url', 'https://from.git.com', '--to-url', 'https://to.git.com', '--to-login', 'foo', '--from-org', 'my-org', '--to-org', 'my-org',
+                '--profile-phases', 'scan,clones']
+    with patch.object(sys, 'argv', testargs):
+        with raises(SystemExit):
+            input_parser.parse()
+    assert 'unknown phase(s) clones (among scan, metadata, clone, push)' in capsys.readouterr().err
+
+
+def test_parsing_pairs_without_config():
+    testargs = ['prog', '--from-url', 'https://from.git.com', '--to-url', 'https://to.git.com', '--to-login', 'foo', '--from-org', 'my-org', '--to-org', 'my-org']
+    with patch.object(sys, 'argv', testargs):
+        pairs = input_parser.parse_pairs()
+
+    assert 1 == len(pairs)
+    assert 'https://from.git.com' == pairs[0].from_url
+
+
+def test_parsing_pairs_toml(tmp_path):
+    config = tmp_path / 'config.toml'
+    config.write_text('''
+[defaults]
+from-url = "https://from.git.com"
+to-url = "https://to.git.com"
+to_login = "foo"
+jobs = 4
+
+[[pairs]]
+from-org = "org-a"
+to-org = "mirror-a"
+repos-include = ["a.*", "b"]
+dry-run = true
+
+[[pairs]]
+from-org = "org-b"
+to-org = "mirror-b"
+dry-run = false
+''')
+    with patch.object(sys, 'argv', ['prog', '--config', str(config), '--to-login', 'bar']):
+        pairs = input_parser.parse_pairs()
+
+    assert [('org-a', 'mirror-a'), ('org-b', 'mirror-b')] == [(args.from_org, args.to_org) for args in pairs]
+    assert ['a.*,b', ''] == [args.repos_include for args in pairs]
+    assert [True, False] == [args.dry_run for args in pairs]
+    # Defaults, overridden by command line
+    assert [(4, 'bar'), (4, 'bar')] == [(args.jobs, args.to_login) for args in pairs]
+
+
+def test_parsing_pairs_yaml(tmp_path):
+    config = tmp_path / 'config.yaml'
+    config.write_text('''
+defaults:
+  from-url: https://from.git.com
+  to-url: https://to.git.com
+  to-login: foo
+pairs:
+  - from-org: org-a
+    to-org: mirror-a
+    branches-exclude: [dev]
+''')
+    with patch.object(sys, 'argv', ['prog', '--config', str(config)]):
+        pairs = input_parser.parse_pairs()
+
+    assert [('org-a', 'mirror-a', 'dev')] == [(args.from_org, args.to_org, args.branches_exclude) for args in pairs]
+
+
+def test_parsing_pairs_process_option(tmp_path):
+    config = tmp_path / 'config.toml'
+    config.write_text('''
+[[pairs]]
+from-url = "https://from.git.com"
+jobs = 4
+''')
+    with patch.object(sys, 'argv', ['prog', '--config', str(config)]):
+        with raises(ValueError, match='Option "jobs" is a process one'):
+            input_parser.parse_pairs()
 
 
 def test_reduce_simple():
@@ -0,0 +1,63 @@
+import time
+from modules.memo_cache import MemoCache
+
+
+def test_memoized_once():
+    cache = MemoCache()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return 'value'
+
+    assert 'value' == cache.get(('repo', 'org', 'repo'), loader)
+    assert 'value' == cache.get(('repo', 'org', 'repo'), loader)
+    assert 1 == len(calls)
+    assert 1 == cache.hits
+    assert 1 == cache.misses
+
+
+def test_exception_not_memoized():
+    cache = MemoCache()
+
+    def loader():
+        raise ValueError('Not found')
+
+    for _ in range(2):
+        try:
+            cache.get('key', loader)
+            assert False
+        except ValueError:
+            pass
+    assert 0 == len(cache)
+    assert 2 == cache.misses
+
+
+def test_ttl():
+    cache = MemoCache(ttl=0.05)
+    assert 1 == cache.get('key', lambda: 1)
+    assert 1 == cache.get('key', lambda: 2)
+    time.sleep(0.1)
+    assert 3 == cache.get('key', lambda: 3)
+
+
+def test_lru_bound():
+    cache = MemoCache(max_size=2)
+    cache.get('a', lambda: 'a')
+    cache.get('b', lambda: 'b')
+    # 'a' recently used, so 'b' evicted when 'c' added
+    cache.get('a', lambda: 'x')
+    cache.get('c', lambda: 'c')
+    assert 2 == len(cache)
+    assert 'a' == cache.get('a', lambda: 'x')
+    assert 'y' == cache.get('b', lambda: 'y')
+
+
+def test_invalidate():
+    cache = MemoCache()
+    cache.get('a', lambda: 'a')
+    cache.get('b', lambda: 'b')
+    cache.invalidate('a')
+    assert 'x' == cache.get('a', lambda: 'x')
+    cache.invalidate()
+    assert 0 == len(cache)
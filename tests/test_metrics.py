@@ -0,0 +1,133 @@
+import os
+import json
+import requests
+from git import Repo
+from pytest_httpserver import HTTPServer
+from modules.metrics import Metrics, MeasuredGitClient, MetricsHTTPAdapter, PushProgress, measure, get_repo_key, get_objects_files, get_fetched_size, parse_size
+from tests.test_utils import get_url_root, extract_fetched_repo
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeGitClient:
+    def __init__(self, clock: FakeClock):
+        self.clock = clock
+
+    def get_branches(self, org: str, repo: str) -> dict:
+        self.clock.now += 2
+        return {'main': 'c36452a2c34443ae26b4ecbba4f149906af14717'}
+
+    def get_url(self) -> str:
+        return 'https://github.com'
+
+
+def test_metrics_phases_and_counters():
+    clock = FakeClock()
+    metrics = Metrics(clock)
+
+    with metrics.phase('clone', 'repo1'):
+        clock.now += 3
+    with metrics.phase('clone', 'repo2'):
+        clock.now += 1
+    with metrics.phase('push'):
+        clock.now += 0.5
+    with measure(None, 'push', 'repo1'):
+        clock.now += 10
+    metrics.add('cloned_bytes', 1024, 'repo1')
+    metrics.add('cloned_bytes', 2048, 'repo2')
+
+    report = metrics.report()
+    assert {'calls': 2, 'seconds': 4.0} == report['phases']['clone']
+    assert {'calls': 1, 'seconds': 0.5} == report['phases']['push']
+    assert 3072 == report['counters']['cloned_bytes']
+    assert {'phases': {'clone': {'calls': 1, 'seconds': 3.0}}, 'counters': {'cloned_bytes': 1024}} == report['repos']['repo1']
+    assert 14.5 == report['duration_seconds']
+
+
+def test_measured_git_client():
+    clock = FakeClock()
+    metrics = Metrics(clock)
+    client = MeasuredGitClient(FakeGitClient(clock), metrics, 'from')
+
+    assert 1 == len(client.get_branches('MyOrg', 'repo1'))
+    assert 'https://github.com' == client.get_url()
+
+    report = metrics.report()
+    assert {'from.get_branches': {'calls': 1, 'seconds': 2.0}} == report['methods']
+    assert {'calls': 1, 'seconds': 2.0} == report['phases']['list_branches']
+    assert {'calls': 1, 'seconds': 2.0} == report['repos']['repo1']['phases']['list_branches']
+
+
+def test_measured_git_client_repo_key():
+    clock = FakeClock()
+    metrics = Metrics(clock)
+    # Same repository name in two pairs
+    for from_org, to_org in [('OrgA', 'MirrorA'), ('OrgB', 'MirrorB')]:
+        client = MeasuredGitClient(FakeGitClient(clock), metrics, 'from', lambda repo, from_org=from_org, to_org=to_org: get_repo_key(from_org, repo, to_org))
+        client.get_branches(from_org, 'repo1')
+
+    assert ['OrgA/repo1 -> MirrorA', 'OrgB/repo1 -> MirrorB'] == list(metrics.report()['repos'])
+
+
+def test_parse_size():
+    assert 886 == parse_size('886 bytes | 295.00 KiB/s')
+    assert 1536 == parse_size('1.50 KiB | 1.00 MiB/s, done.')
+    assert 0 == parse_size('')
+
+
+def test_fetched_and_pushed_bytes(tmp_path):
+    fetched = os.path.join(tmp_path, 'fetched.git')
+    repo = extract_fetched_repo(fetched, 'https://github.com/spring-projects/spring-petclinic.git')
+    assert get_fetched_size(fetched, {}) > 0
+    # Already present objects not counted
+    assert 0 == get_fetched_size(fetched, get_objects_files(fetched))
+
+    Repo.init(os.path.join(tmp_path, 'to.git'), bare=True)
+    remote = repo.create_remote('to', os.path.join(tmp_path, 'to.git'))
+    progress = PushProgress()
+    remote.push('refs/remotes/origin/main:refs/heads/main', progress=progress).raise_if_error()
+    assert progress.written_bytes > 0
+    # Nothing to send once pushed
+    progress = PushProgress()
+    remote.push('refs/remotes/origin/main:refs/heads/main', progress=progress).raise_if_error()
+    assert 0 == progress.written_bytes
+
+
+def test_metrics_http_adapter(httpserver: HTTPServer):
+    httpserver.expect_request('/api/v1/repos/migrate', method='POST').respond_with_data('{"id": 42}')
+    httpserver.expect_request('/api/v1/users/MyOrg').respond_with_data('0123456789')
+    metrics = Metrics()
+    session = requests.Session()
+    session.mount('http://', MetricsHTTPAdapter(metrics, requests.adapters.HTTPAdapter()))
+
+    session.post(get_url_root(httpserver) + '/api/v1/repos/migrate', json={'repo_name': 'new-repo'})
+    assert '0123456789' == session.get(get_url_root(httpserver) + '/api/v1/users/MyOrg').text
+
+    host = get_url_root(httpserver).split('://')[1]
+    assert {host: {'requests': 2, 'sent_bytes': len(json.dumps({'repo_name': 'new-repo'})), 'received_bytes': 20}} == metrics.report()['http']
+
+
+def test_metrics_prometheus(tmp_path):
+    metrics = Metrics()
+    metrics.add_phase('clone', 1.5, 'repo1')
+    metrics.add_method('to', 'has_repo', 0.25)
+    metrics.add_http('localhost:3000', 10, 100)
+    metrics.add('repos_updated', 3)
+
+    metrics.write_prometheus(str(tmp_path / 'metrics.prom'))
+    with open(tmp_path / 'metrics.prom') as f:
+        content = f.read()
+
+    assert '# TYPE git_platforms_synchro_phase_seconds_total counter\n' in content
+    assert 'git_platforms_synchro_phase_seconds_total{phase="clone"} 1.5\n' in content
+    assert 'git_platforms_synchro_client_calls_total{platform="to",method="has_repo"} 1\n' in content
+    assert 'git_platforms_synchro_http_received_bytes_total{host="localhost:3000"} 100\n' in content
+    assert 'git_platforms_synchro_repos_updated 3\n' in content
+    # Repositories not exported
+    assert 'repo1' not in content
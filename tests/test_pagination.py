@@ -0,0 +1,55 @@
+import threading
+from requests.structures import CaseInsensitiveDict
+from modules.pagination import get_total_pages, fetch_all_pages
+
+
+def create_fetch_page(total: int, page_size: int, headers: dict = None):
+    requested = []
+    threads = set()
+
+    def fetch_page(page: int) -> tuple:
+        requested.append(page)
+        threads.add(threading.current_thread().name)
+        start = (page - 1) * page_size
+        return list(range(start, min(start + page_size, total))), CaseInsensitiveDict(headers or {})
+    return fetch_page, requested, threads
+
+
+def test_get_total_pages():
+    assert 4 == get_total_pages(CaseInsensitiveDict({'X-Total-Pages': '4'}), 50)
+    assert 3 == get_total_pages(CaseInsensitiveDict({'X-Total-Count': '101'}), 50)
+    assert 2 == get_total_pages(CaseInsensitiveDict({'x-total': '100'}), 50)
+    link = '<https://api.github.com/repositories/1/branches?per_page=100&page=2>; rel="next", <https://api.github.com/repositories/1/branches?per_page=100&page=7>; rel="last"'
+    assert 7 == get_total_pages(CaseInsensitiveDict({'Link': link}), 100)
+    assert get_total_pages(CaseInsensitiveDict({}), 50) is None
+
+
+def test_concurrent_pages_from_total():
+    fetch_page, requested, threads = create_fetch_page(230, 50, {'X-Total-Count': '230'})
+    assert list(range(230)) == fetch_all_pages(fetch_page, 50)
+    assert [1, 2, 3, 4, 5] == sorted(requested)
+    assert any(thread.startswith('page') for thread in threads)
+
+
+def test_concurrent_pages_capped_page_size():
+    # Platform answering 30 items per page, whereas 50 requested
+    fetch_page, requested, _ = create_fetch_page(65, 30, {'X-Total-Count': '65'})
+    assert list(range(65)) == fetch_all_pages(fetch_page, 50)
+    assert [1, 2, 3] == sorted(requested)
+
+
+def test_sequential_pages_without_total():
+    fetch_page, requested, _ = create_fetch_page(65, 30)
+    assert list(range(65)) == fetch_all_pages(fetch_page, 50)
+    # Until empty page
+    assert [1, 2, 3, 4] == requested
+
+    fetch_page, requested, _ = create_fetch_page(65, 30, {'X-Next-Page': ''})
+    assert list(range(30)) == fetch_all_pages(fetch_page, 50)
+    assert [1] == requested
+
+
+def test_empty_listing():
+    fetch_page, requested, _ = create_fetch_page(0, 50, {'X-Total-Count': '0'})
+    assert [] == fetch_all_pages(fetch_page, 50)
+    assert [1] == requested
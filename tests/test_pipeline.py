@@ -0,0 +1,84 @@
+import time
+import threading
+from pytest import raises
+from modules.pipeline import Stage, run_pipeline
+
+
+def test_pipeline_stages_overlap():
+    events = []
+    lock = threading.Lock()
+
+    def stage(name: str):
+        def process(item: int) -> int:
+            with lock:
+                events.append((name, item, 'start'))
+            time.sleep(0.02)
+            with lock:
+                events.append((name, item, 'end'))
+            return item
+        return process
+
+    run_pipeline(range(3), [Stage('fetch', stage('fetch')), Stage('push', stage('push'))])
+
+    assert 12 == len(events)
+    # Item 1 fetched while item 0 pushed
+    assert events.index(('fetch', 1, 'start')) < events.index(('push', 0, 'end'))
+    assert events.index(('fetch', 0, 'end')) < events.index(('push', 0, 'start'))
+
+
+def test_pipeline_finished_items_and_workers():
+    pushed = []
+    threads = set()
+
+    def push(item: int):
+        threads.add(threading.current_thread().name)
+        pushed.append(item)
+
+    # Odd items finished at first stage
+    run_pipeline(range(10), [Stage('metadata', lambda item: item if item % 2 == 0 else None, 2), Stage('push', push, 3)], queue_size=2)
+
+    assert [0, 2, 4, 6, 8] == sorted(pushed)
+    assert threads <= {'push_0', 'push_1', 'push_2'}
+
+
+def test_pipeline_bounded_queue():
+    fetched = []
+    fetched_while_first_push = []
+
+    def push(item: int):
+        if item == 0:
+            time.sleep(0.1)
+            fetched_while_first_push.append(len(fetched))
+
+    run_pipeline(range(6), [Stage('fetch', lambda item: fetched.append(item) or item), Stage('push', push)], queue_size=2)
+
+    # During first push: two items waiting in queue, a third fetched waiting for queue
+    assert [4] == fetched_while_first_push
+    assert 6 == len(fetched)
+
+
+def test_pipeline_failure():
+    fetched = []
+    cancelled = []
+
+    def fetch(item: int) -> int:
+        fetched.append(item)
+        if item == 2:
+            raise ValueError('Fetch failure')
+        return item
+
+    def push(item: int):
+        time.sleep(0.01)
+
+    with raises(ValueError, match='Fetch failure'):
+        run_pipeline(range(100), [Stage('fetch', fetch), Stage('push', push, cancel=cancelled.append)])
+
+    # Next items not fetched, fetched ones not pushed being cancelled
+    assert len(fetched) < 10
+    assert 0 not in cancelled
+    assert 2 not in cancelled
+
+
+def test_pipeline_stage_without_worker():
+    with raises(ValueError, match='Pipeline stage "m" must have at least one worker'):
+        run_pipeline(range(3), [Stage('m', lambda item: item, 0), Stage('p', lambda item: None, 1)], 0)
@@ -0,0 +1,71 @@
+import sys
+import time
+import threading
+import subprocess
+import modules.profiler as profiler
+from modules.profiler import SamplingProfiler, profile_phase, profiled
+
+
+def busy(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def run_command(seconds: float):
+    subprocess.run([sys.executable, '-c', 'import time; time.sleep({})'.format(seconds)], check=True)
+
+
+def test_profiler_phases_categories(tmp_path):
+    phases_profiler = SamplingProfiler(['clone', 'push'], interval=0.002)
+    phases_profiler.start()
+    with phases_profiler.phase('clone'):
+        run_command(0.3)
+    with phases_profiler.phase('push'):
+        busy(0.3)
+    with phases_profiler.phase('scan'):
+        busy(0.1)
+    phases_profiler.stop()
+
+    summary = {phase['phase']: phase for phase in phases_profiler.summary()}
+    # Not selected phase not profiled
+    assert ['clone', 'push'] == sorted(summary)
+    assert summary['clone']['git'] > 0.2
+    assert summary['clone']['python'] < 0.1
+    assert summary['push']['python'] > 0.2
+    assert summary['push']['git'] == 0
+
+    files = phases_profiler.write(str(tmp_path))
+    assert 3 == len(files)
+    with open(tmp_path / 'push.collapsed') as f:
+        stacks = f.read()
+    # Collapsed from phase entry
+    assert stacks.startswith('tests/test_profiler.py:test_profiler_phases_categories;tests/test_profiler.py:busy ')
+    with open(tmp_path / 'summary.txt') as f:
+        assert 'phase git_seconds network_seconds wait_seconds python_seconds\n' == f.readline()
+
+
+def test_profiler_parallel_threads():
+    phases_profiler = profiler.start(interval=0.002)
+    workers = [threading.Thread(target=profiled('clone', busy), args=(0.3,)) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    with profile_phase('scan', all_threads=True):
+        # Other threads not in a phase attributed to 'scan'
+        other = threading.Thread(target=run_command, args=(0.3,))
+        other.start()
+        other.join()
+    for worker in workers:
+        worker.join()
+    assert phases_profiler is profiler.stop()
+
+    summary = {phase['phase']: phase for phase in phases_profiler.summary()}
+    # Threads time: sum of workers ones
+    assert summary['clone']['python'] > 0.5
+    assert summary['scan']['git'] > 0.2
+    assert 'metadata' not in summary
+
+
+def test_profiler_not_started():
+    with profile_phase('clone'):
+        assert 42 == profiled('push', lambda: 42)()
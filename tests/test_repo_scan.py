@@ -0,0 +1,87 @@
+import time
+import threading
+from modules.git_clients import GitClient
+from modules.repo_scan import RepoScan, scan_repos
+
+
+class InFlight:
+    # Concurrent requests of all clients
+    def __init__(self):
+        self.current = 0
+        self.max = 0
+        self.lock = threading.Lock()
+
+
+class FakeGitClient(GitClient):
+    # Platform repositories as dictionaries, with slow requests recorded
+    def __init__(self, branches: dict, tags: dict = None, in_flight: InFlight = None):
+        self.branches = branches
+        self.tags = tags if tags is not None else {}
+        self.requests = []
+        self.in_flight = in_flight if in_flight is not None else InFlight()
+
+    def _request(self, name: str, repo: str, value):
+        with self.in_flight.lock:
+            self.requests.append((name, repo))
+            self.in_flight.current += 1
+            self.in_flight.max = max(self.in_flight.max, self.in_flight.current)
+        time.sleep(0.01)
+        with self.in_flight.lock:
+            self.in_flight.current -= 1
+        return value
+
+    def has_repo(self, org: str, repo: str) -> bool:
+        return self._request('has_repo', repo, repo in self.branches)
+
+    def get_branches(self, org: str, repo: str) -> dict:
+        return self._request('branches', repo, self.branches[repo])
+
+    def get_tags(self, org: str, repo: str) -> dict:
+        return self._request('tags', repo, self.tags.get(repo, {}))
+
+
+def test_repo_scan_lazy():
+    git_from = FakeGitClient({'foo': {'main': '1'}}, {'foo': {'1.0': '1'}})
+    git_to = FakeGitClient({'foo': {'main': '0'}})
+    scan = RepoScan(git_from, git_to, 'OrgFrom', 'OrgTo', 'foo')
+    assert not scan.is_scanned('branches_from')
+    assert {'main': '1'} == scan.branches_from()
+    assert {'main': '1'} == scan.branches_from()
+    assert scan.is_scanned('branches_from')
+    assert {'1.0': '1'} == scan.tags_from()
+    assert [('branches', 'foo'), ('tags', 'foo')] == git_from.requests
+    assert [] == git_to.requests
+
+
+def test_scan_repos():
+    repos = ['repo{}'.format(i) for i in range(20)]
+    branches_from = {repo: {'main': '1'} for repo in repos}
+    # 'repo0' missing on "to" (mirror), 'repo1' empty on "to" (mirror), others to compare
+    branches_to = {repo: {'main': '0'} for repo in repos[2:]}
+    branches_to['repo1'] = {}
+    in_flight = InFlight()
+    git_from = FakeGitClient(branches_from, in_flight=in_flight)
+    git_to = FakeGitClient(branches_to, in_flight=in_flight)
+
+    scans = {scan.repo: scan for scan in scan_repos([RepoScan(git_from, git_to, 'OrgFrom', 'OrgTo', repo) for repo in repos], concurrency=4)}
+
+    assert repos == list(scans.keys())
+    assert not scans['repo0'].exists_to()
+    assert not scans['repo0'].is_scanned('branches_from')
+    assert scans['repo1'].is_scanned('branches_to')
+    assert not scans['repo1'].is_scanned('tags_from')
+    for repo in repos[2:]:
+        for item in ['exists_to', 'branches_from', 'branches_to', 'tags_from', 'tags_to']:
+            assert scans[repo].is_scanned(item)
+        assert {'main': '0'} == scans[repo].branches_to()
+
+    # Global concurrency limit for both platforms, no request sent again once scanned
+    assert 4 == in_flight.max
+    # Scan threads shut down once scanned
+    assert not [thread for thread in threading.enumerate() if thread.name.startswith('scan')]
+    requests_count = len(git_from.requests) + len(git_to.requests)
+    assert 20 + 19 * 2 + 18 * 2 == requests_count
+    for repo in repos[1:]:
+        scans[repo].branches_from()
+        scans[repo].branches_to()
+    assert requests_count == len(git_from.requests) + len(git_to.requests)
@@ -0,0 +1,85 @@
+import threading
+from pytest import LogCaptureFixture
+from modules.git_clients import GitClient, IMPORT_FINISHED, IMPORT_FAILED
+from modules.server_import import ServerImports
+
+
+class FakeImportClient(GitClient):
+    # Import statuses returned successively by repository, last one repeated
+    def __init__(self, statuses: dict):
+        super().__init__()
+        self.statuses = statuses
+        self.imported = []
+        self.in_progress = 0
+        self.max_in_progress = 0
+        self.lock = threading.Lock()
+
+    def import_repo(self, org: str, repo: str, clone_url: str, login_or_token: str = None, password: str = None, description: str = ''):
+        with self.lock:
+            self.imported.append((org, repo, clone_url, login_or_token, password))
+            self.in_progress += 1
+            self.max_in_progress = max(self.max_in_progress, self.in_progress)
+
+    def get_import_status(self, org: str, repo: str) -> str:
+        with self.lock:
+            statuses = self.statuses[repo]
+            status = statuses.pop(0) if len(statuses) > 1 else statuses[0]
+            if status in [IMPORT_FINISHED, IMPORT_FAILED]:
+                self.in_progress -= 1
+            return status
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+    def clock(self) -> float:
+        return self.now
+
+
+def test_server_imports_finished():
+    client = FakeImportClient({'repo1': ['scheduled', 'started', IMPORT_FINISHED], 'repo2': [IMPORT_FINISHED]})
+    fake = FakeClock()
+    finished = []
+    imports = ServerImports(client, 2, poll_interval=5, sleep=fake.sleep, clock=fake.clock)
+
+    imports.submit('MyOrg', 'repo1', 'https://github.com/MyOrg/repo1.git', 'foo', 'bar', on_finished=lambda: finished.append('repo1'))
+    imports.submit('MyOrg', 'repo2', 'https://github.com/MyOrg/repo2.git', on_finished=lambda: finished.append('repo2'))
+
+    assert [] == imports.wait()
+    assert 2 == len(imports)
+    assert ['repo1', 'repo2'] == sorted(finished)
+    assert ('MyOrg', 'repo1', 'https://github.com/MyOrg/repo1.git', 'foo', 'bar') in client.imported
+    # Two polls waited before repo1 import finished
+    assert 10 == fake.now
+
+
+def test_server_imports_max_concurrency():
+    client = FakeImportClient({'repo{}'.format(i): ['started', 'started', IMPORT_FINISHED] for i in range(10)})
+    fake = FakeClock()
+    imports = ServerImports(client, 3, sleep=fake.sleep, clock=fake.clock)
+
+    for i in range(10):
+        imports.submit('MyOrg', 'repo{}'.format(i), 'https://github.com/MyOrg/repo{}.git'.format(i))
+
+    assert [] == imports.wait()
+    assert 10 == len(client.imported)
+    assert client.max_in_progress <= 3
+
+
+def test_server_imports_failed_and_timeout(caplog: LogCaptureFixture):
+    client = FakeImportClient({'repo1': ['started', IMPORT_FAILED], 'repo2': ['started'], 'repo3': [IMPORT_FINISHED]})
+    fake = FakeClock()
+    finished = []
+    imports = ServerImports(client, 1, poll_interval=10, timeout=60, sleep=fake.sleep, clock=fake.clock)
+
+    for repo in ['repo1', 'repo2', 'repo3']:
+        imports.submit('MyOrg', repo, 'https://github.com/MyOrg/{}.git'.format(repo), on_finished=lambda repo=repo: finished.append(repo))
+
+    assert ['repo1', 'repo2'] == imports.wait()
+    assert ['repo3'] == finished
+    assert 'Server-side import of repository repo1 failed: Import failed on "to" platform.' in caplog.text
+    assert 'Server-side import of repository repo2 failed: Import not finished after 60s (last status: started).' in caplog.text
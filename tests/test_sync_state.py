@@ -0,0 +1,22 @@
+from modules.sync_state import SyncState
+
+
+def test_sync_state(tmp_path):
+    path = str(tmp_path / 'state.json')
+    state = SyncState(path, 'scope')
+    assert not state.is_unchanged('repo', '2025-10-14T10:41:09+00:00')
+
+    state.update('repo', '2025-10-14T10:41:09+00:00')
+    state.save()
+
+    state = SyncState(path, 'scope')
+    assert state.is_unchanged('repo', '2025-10-14T10:41:09+00:00')
+    assert not state.is_unchanged('repo', '2025-10-15T08:00:00+00:00')
+    assert not state.is_unchanged('other-repo', '2025-10-14T10:41:09+00:00')
+    assert not SyncState(path, 'other-scope').is_unchanged('repo', '2025-10-14T10:41:09+00:00')
+
+
+def test_sync_state_unknown_last_activity(tmp_path):
+    state = SyncState(str(tmp_path / 'state.json'), 'scope')
+    state.update('repo', None)
+    assert not state.is_unchanged('repo', None)
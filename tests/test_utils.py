@@ -1,6 +1,7 @@
 import os
 import json
 import tarfile
+import tempfile
 from git import Repo
 from git_platforms_synchro import TMP_REPO_GIT_DIRECTORY, delete_temporary_repo_git_directory
 from modules.utils import ENV_TEST_MODE
@@ -16,13 +17,28 @@ def load_json(file: str, url_to_mock: str, url_replacement: str):
         return json.loads(f.read().replace(url_to_mock, url_replacement))
 
 
+def count_requests(httpserver: HTTPServer, uri: str, method: str = 'GET') -> int:
+    return len([request for request, _ in httpserver.log if request.path == uri and request.method == method])
+
+
+def extract_fetched_repo(git_dir: str, url: str) -> Repo:
+    # Bare repository with branches as remote-tracking ones, as fetched for synchronization (not mirror)
+    with tempfile.TemporaryDirectory() as origin:
+        with tarfile.open('tests/resources/spring-petclinic.git.bare.tgz', 'r:gz') as tar:
+            tar.extractall(path=origin, filter='fully_trusted')
+        repo = Repo.init(git_dir, bare=True)
+        repo.create_remote('origin', origin).fetch(tags=True)
+    repo.remote('origin').set_url(url)
+    return repo
+
+
 def mock_cloned_repo(httpserver: HTTPServer, bare: bool = False):
     delete_temporary_repo_git_directory(force_if_test_mode=True)
     os.environ[ENV_TEST_MODE] = 'true'
-    suffix = ''
-    if bare:
-        suffix = '.bare'
-    with tarfile.open('tests/resources/spring-petclinic.git' + suffix + '.tgz', 'r:gz') as tar:
+    if not bare:
+        extract_fetched_repo(TMP_REPO_GIT_DIRECTORY, get_url_root(httpserver) + '/spring-projects/spring-petclinic.git')
+        return
+    with tarfile.open('tests/resources/spring-petclinic.git.bare.tgz', 'r:gz') as tar:
         tar.extractall(path=TMP_REPO_GIT_DIRECTORY, filter='fully_trusted')
 
     # Replace remote origin URL to point to httpserver
@@ -31,7 +47,7 @@ def mock_cloned_repo(httpserver: HTTPServer, bare: bool = False):
 
 
 def expect_request(httpserver: HTTPServer, type: str, uri: str, query_string: str = None,
-                   str_to_replace: str = None, str_replacement: str = None, file_suffix: str = ''):
+                   str_to_replace: str = None, str_replacement: str = None, file_suffix: str = '', headers: dict = None):
     with open('tests/http_mocks/' + type + uri + file_suffix + '.json') as f:
         content = f.read()
     if type == 'github':
@@ -44,4 +60,4 @@ def expect_request(httpserver: HTTPServer, type: str, uri: str, query_string: st
         content = content.replace('https://gitlab.com', get_url_root(httpserver))
     if str_to_replace and str_replacement:
         content = content.replace(str_to_replace, str_replacement)
-    httpserver.expect_request(uri, query_string=query_string).respond_with_json(json.loads(content))
+    httpserver.expect_request(uri, query_string=query_string).respond_with_json(json.loads(content), headers=headers)